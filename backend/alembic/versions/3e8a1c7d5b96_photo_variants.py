@@ -0,0 +1,29 @@
+"""Photo variants
+
+Revision ID: 3e8a1c7d5b96
+Revises: 7b3d5f9e2c41
+Create Date: 2026-10-18 21:04:12.318406
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3e8a1c7d5b96"
+down_revision: Union[str, Sequence[str], None] = "7b3d5f9e2c41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing photos keep serving their originals until they are reprocessed
+    op.add_column("photos", sa.Column("variants", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("photos", "variants")
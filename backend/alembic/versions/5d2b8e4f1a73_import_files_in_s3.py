@@ -0,0 +1,41 @@
+"""Import uploads in S3
+
+Revision ID: 5d2b8e4f1a73
+Revises: 3e8a1c7d5b96
+Create Date: 2026-10-19 10:12:45.207913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2b8e4f1a73"
+down_revision: Union[str, Sequence[str], None] = "3e8a1c7d5b96"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Queued uploads are not copied to the bucket: those jobs fail and the
+    # rides have to be uploaded again
+    op.execute(
+        "UPDATE import_jobs SET status = 'failed', "
+        "error = 'Import interrupted by an upgrade, please upload again' "
+        "WHERE status IN ('pending', 'running')"
+    )
+    op.execute("DELETE FROM import_job_files")
+    op.drop_column("import_job_files", "content")
+    op.add_column("import_job_files", sa.Column("s3_key", sa.String(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM import_job_files")
+    op.drop_column("import_job_files", "s3_key")
+    op.add_column(
+        "import_job_files", sa.Column("content", sa.LargeBinary(), nullable=False)
+    )
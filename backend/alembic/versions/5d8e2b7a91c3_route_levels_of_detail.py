@@ -0,0 +1,54 @@
+"""Route levels of detail
+
+Revision ID: 5d8e2b7a91c3
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 11:40:05.918274
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8e2b7a91c3"
+down_revision: Union[str, Sequence[str], None] = "3f1c9a7d2b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same tolerances as app.services.route_services.ROUTE_TOLERANCES
+TOLERANCES = {"low": 1e-3, "medium": 1e-4, "high": 1e-5}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("trips", "rides"):
+        for detail, tolerance in TOLERANCES.items():
+            op.add_column(
+                table,
+                sa.Column(
+                    f"route_{detail}",
+                    geoalchemy2.types.Geometry(
+                        geometry_type="LINESTRING",
+                        srid=4326,
+                        dimension=2,
+                        from_text="ST_GeomFromEWKT",
+                        name="geometry",
+                        spatial_index=False,
+                    ),
+                    nullable=True,
+                ),
+            )
+            op.execute(
+                f"UPDATE {table} SET route_{detail} = "
+                f"ST_Simplify(route, {tolerance}, true) WHERE route IS NOT NULL"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("trips", "rides"):
+        for detail in TOLERANCES:
+            op.drop_column(table, f"route_{detail}")
@@ -0,0 +1,64 @@
+"""Photo geotags and ride elapsed time
+
+Revision ID: 7b3d5f9e2c41
+Revises: e4f1a8c6d352
+Create Date: 2026-10-18 18:20:37.552910
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3d5f9e2c41"
+down_revision: Union[str, Sequence[str], None] = "e4f1a8c6d352"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # taken_at was never written, so there is nothing to convert
+    op.alter_column(
+        "photos",
+        "taken_at",
+        existing_type=sa.String(),
+        type_=sa.DateTime(timezone=True),
+        postgresql_using="NULL",
+    )
+    op.add_column(
+        "photos",
+        sa.Column(
+            "location",
+            geoalchemy2.types.Geometry(
+                geometry_type="POINT",
+                srid=4326,
+                dimension=2,
+                from_text="ST_GeomFromEWKT",
+                name="geometry",
+                spatial_index=False,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "idx_photos_location", "photos", ["location"], postgresql_using="gist"
+    )
+    # Rides imported before this revision fall back to their moving time
+    op.add_column("rides", sa.Column("elapsed_time", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("rides", "elapsed_time")
+    op.drop_index("idx_photos_location", table_name="photos", postgresql_using="gist")
+    op.drop_column("photos", "location")
+    op.alter_column(
+        "photos",
+        "taken_at",
+        existing_type=sa.DateTime(timezone=True),
+        type_=sa.String(),
+    )
@@ -0,0 +1,33 @@
+"""Published trips feed index
+
+Revision ID: 9a4c6e1f0b27
+Revises: 5d8e2b7a91c3
+Create Date: 2026-10-18 14:05:44.120586
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4c6e1f0b27"
+down_revision: Union[str, Sequence[str], None] = "5d8e2b7a91c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_trips_published_start_date_id",
+        "trips",
+        ["start_date", "id"],
+        postgresql_where=sa.text("is_published"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_trips_published_start_date_id", table_name="trips")
@@ -0,0 +1,33 @@
+"""Tile versions
+
+Revision ID: 9c4e2a7f6b18
+Revises: 5d2b8e4f1a73
+Create Date: 2026-10-19 14:36:02.518340
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4e2a7f6b18"
+down_revision: Union[str, Sequence[str], None] = "5d2b8e4f1a73"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tile_versions",
+        sa.Column("scope", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("scope"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("tile_versions")
@@ -0,0 +1,58 @@
+"""Secondary and spatial indexes
+
+Revision ID: c27b5f3e8d10
+Revises: 9a4c6e1f0b27
+Create Date: 2026-10-18 15:22:10.503817
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c27b5f3e8d10"
+down_revision: Union[str, Sequence[str], None] = "9a4c6e1f0b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# rides (trip_id, date) and trips (user_id, start_date) are already covered
+# by their unique constraints, the published feed by ix_trips_published_start_date_id
+BTREE_INDEXES = [
+    ("photos", "trip_id"),
+    ("photos", "user_id"),
+    ("refresh_tokens", "user_id"),
+    ("onetime_tokens", "user_id"),
+    ("import_jobs", "trip_id"),
+    ("import_job_files", "job_id"),
+]
+
+# Same names geoalchemy2 gives them, so databases built with create_all
+# already have them and are skipped
+GIST_INDEXES = [
+    ("rides", "route"),
+    ("trips", "route"),
+    ("trips", "bounding_box"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in BTREE_INDEXES:
+        op.create_index(f"ix_{table}_{column}", table, [column], if_not_exists=True)
+    for table, column in GIST_INDEXES:
+        op.create_index(
+            f"idx_{table}_{column}",
+            table,
+            [column],
+            postgresql_using="gist",
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in GIST_INDEXES:
+        op.drop_index(f"idx_{table}_{column}", table_name=table, if_exists=True)
+    for table, column in BTREE_INDEXES:
+        op.drop_index(f"ix_{table}_{column}", table_name=table, if_exists=True)
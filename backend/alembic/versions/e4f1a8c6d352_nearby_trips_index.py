@@ -0,0 +1,34 @@
+"""Nearby trips geography index
+
+Revision ID: e4f1a8c6d352
+Revises: c27b5f3e8d10
+Create Date: 2026-10-18 16:42:10.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e4f1a8c6d352"
+down_revision: Union[str, Sequence[str], None] = "c27b5f3e8d10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_trips_published_route_geography",
+        "trips",
+        [sa.text("geography(route)")],
+        postgresql_using="gist",
+        postgresql_where=sa.text("is_published"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_trips_published_route_geography", table_name="trips")
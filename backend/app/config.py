@@ -12,16 +12,38 @@ def EnvOrThrow(key: str):
 
 
 class DBConfig:
-    def __init__(self, url: str, echo_flag: str):
+    def __init__(
+        self,
+        url: str,
+        echo_flag: str,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+    ):
         self.url = url
         self.echo_flag = echo_flag
+        # Both split between the sync and async engines
+        self.pool_size = pool_size  # connections kept open
+        self.max_overflow = max_overflow  # extra connections allowed under load
+        self.pool_timeout = pool_timeout  # seconds to wait for a free connection
+        self.pool_recycle = pool_recycle  # seconds before a connection is replaced
+        self.pool_pre_ping = pool_pre_ping  # test connections on checkout
 
 
 class AuthConfig:
-    def __init__(self, secret: str, admin_token: str, jwt_expiry: int = 3600):
+    def __init__(
+        self,
+        secret: str,
+        admin_token: str,
+        jwt_expiry: int = 3600,
+        bcrypt_rounds: int = 12,
+    ):
         self.secret = secret
         self.jwt_expiry = jwt_expiry
         self.admin_token = admin_token
+        self.bcrypt_rounds = bcrypt_rounds  # other costs are rehashed at login
 
 
 class APILimits:
@@ -29,15 +51,64 @@ class APILimits:
         self.max_upload_size = 15 * (1 << 20)
 
 
+class WorkerConfig:
+    def __init__(
+        self,
+        cpu_workers: int,
+        inline_imports: bool,
+        poll_interval: float,
+        password_workers: int = 2,
+    ):
+        self.cpu_workers = cpu_workers
+        self.inline_imports = inline_imports  # drain import jobs in the API process
+        self.poll_interval = poll_interval
+        self.password_workers = password_workers  # threads hashing passwords
+
+
+class CacheConfig:
+    def __init__(
+        self,
+        trip_size: int,
+        tile_size: int,
+        user_size: int = 1024,
+        user_ttl: float = 60,
+        user_backend: str = "local",
+        url_size: int = 10000,
+    ):
+        self.trip_size = trip_size  # published trip responses kept in memory
+        self.tile_size = tile_size  # vector tiles kept in memory
+        self.user_size = user_size  # authenticated users kept in memory
+        self.user_ttl = user_ttl  # seconds before a cached user is re-read
+        self.user_backend = user_backend  # "local" or "postgres" invalidations
+        self.url_size = url_size  # presigned urls kept in memory
+
+
 class S3Config:
     def __init__(
-        self, region: str, access_key: str, secret_key: str, token: str, bucket: str
+        self,
+        region: str,
+        access_key: str,
+        secret_key: str,
+        token: str,
+        bucket: str,
+        max_connections: int = 50,
+        upload_concurrency: int = 20,
+        part_size: int = 8 * (1 << 20),
+        part_concurrency: int = 4,
+        url_ttl: int = 3600,
+        url_reuse: int = 3000,
     ):
         self.region = region
         self.key = access_key
         self.secret_key = secret_key
         self.token = token
         self.bucket = bucket
+        self.max_connections = max_connections  # HTTP pool of the shared client
+        self.upload_concurrency = upload_concurrency  # puts in flight per request
+        self.part_size = part_size  # multipart chunk, S3 needs at least 5 MB
+        self.part_concurrency = part_concurrency  # parts in memory per upload
+        self.url_ttl = url_ttl  # lifetime of a presigned GET url
+        self.url_reuse = url_reuse  # seconds the same url is handed out again
 
 
 class APIConfig:
@@ -48,6 +119,8 @@ class APIConfig:
         auth: AuthConfig,
         api_limits: APILimits,
         s3_config: S3Config,
+        workers: WorkerConfig,
+        cache: CacheConfig,
         env: str,
         resend: str,
     ):
@@ -58,14 +131,24 @@ class APIConfig:
         self.environment = env
         self.resend = resend
         self.s3 = s3_config
+        self.workers = workers
+        self.cache = cache
 
 
 config = APIConfig(
     db=DBConfig(
-        url=EnvOrThrow("DB_URL"), echo_flag=False
-    ),  # Echo flag enables SQLAlchemy on std out
+        url=EnvOrThrow("DB_URL"),
+        echo_flag=False,  # Echo flag enables SQLAlchemy on std out
+        pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    ),
     auth=AuthConfig(
-        secret=EnvOrThrow("SERVER_SECRET"), admin_token=EnvOrThrow("ADMIN_TOKEN")
+        secret=EnvOrThrow("SERVER_SECRET"),
+        admin_token=EnvOrThrow("ADMIN_TOKEN"),
+        bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", 12)),
     ),
     s3_config=S3Config(
         region=EnvOrThrow("AWS_REGION"),
@@ -73,8 +156,28 @@ config = APIConfig(
         secret_key=EnvOrThrow("AWS_SECRET_ACCESS_KEY_ID"),
         bucket=EnvOrThrow("AWS_BUCKET"),
         token=EnvOrThrow("AWS_TOKEN"),
+        max_connections=int(os.getenv("S3_MAX_CONNECTIONS", 50)),
+        upload_concurrency=int(os.getenv("S3_UPLOAD_CONCURRENCY", 20)),
+        part_size=int(os.getenv("S3_PART_SIZE", 8 * (1 << 20))),
+        part_concurrency=int(os.getenv("S3_PART_CONCURRENCY", 4)),
+        url_ttl=int(os.getenv("S3_URL_TTL", 3600)),
+        url_reuse=int(os.getenv("S3_URL_REUSE", 3000)),
     ),
     api_limits=APILimits(),
+    workers=WorkerConfig(
+        cpu_workers=int(os.getenv("CPU_WORKERS", os.cpu_count() or 1)),
+        inline_imports=os.getenv("INLINE_IMPORTS", "true").lower() == "true",
+        poll_interval=float(os.getenv("IMPORT_POLL_INTERVAL", 2)),
+        password_workers=int(os.getenv("PASSWORD_WORKERS", 2)),
+    ),
+    cache=CacheConfig(
+        trip_size=int(os.getenv("TRIP_CACHE_SIZE", 256)),
+        tile_size=int(os.getenv("TILE_CACHE_SIZE", 2048)),
+        user_size=int(os.getenv("USER_CACHE_SIZE", 1024)),
+        user_ttl=float(os.getenv("USER_CACHE_TTL", 60)),
+        user_backend=os.getenv("USER_CACHE_BACKEND", "local"),
+        url_size=int(os.getenv("URL_CACHE_SIZE", 10000)),
+    ),
     client=EnvOrThrow("CLIENT_BASE_URL"),
     env=EnvOrThrow("ENVIRONMENT"),
     resend=EnvOrThrow("RESEND_API_KEY"),
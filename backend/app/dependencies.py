@@ -2,8 +2,9 @@ from typing import Annotated
 from fastapi import Header, Request, Depends
 from app.security import verify_JWT
 from db.schema import User
-from db.queries.users import get_user_by_id
+from db.async_queries.users import get_user_by_id
 from app.errors import AuthenticationError, UnauthorizedError
+from app.services.user_cache import user_cache
 from app.services.email_services import (
     send_password_reset_email,
     send_password_changed_email,
@@ -21,7 +22,12 @@ async def get_auth_user(authorization: Annotated[str, Header()] = None):
         raise AuthenticationError("Missing bearer symbol")
     user_id = verify_JWT(parts[1])
 
-    return get_user_by_id(user_id)
+    user = user_cache.get(user_id)
+    if user is None:
+        generation = user_cache.generation
+        user = await get_user_by_id(user_id)
+        user_cache.set(user_id, user, generation)
+    return user
 
 
 def block_guest(req: Request, auth_user: Annotated[User, Depends(get_auth_user)]):
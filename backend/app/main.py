@@ -1,6 +1,6 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi import HTTPException
-from app.routers import users, auth, trips, admin, photos
+from app.routers import users, auth, trips, admin, photos, jobs, tiles
 from app.config import config
 from .errors import (
     NotFoundError,
@@ -13,7 +13,13 @@ from .errors import (
 )
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from db.schema import engine, Base
+from app.services.worker_pool import start_cpu_pool, shutdown_cpu_pool
+from app.services.trip_pages import NEXT_CURSOR_HEADER
+from app.services.user_cache import user_cache
+from app.services.passwords import password_pool
+from db.schema import engine, async_engine, Base
+from db.pool import pool_metrics
+from db.session import request_connection
 from db.queries.users import get_total_users
 from db.queries.trips import get_total_trips
 from datetime import datetime, UTC
@@ -22,10 +28,16 @@ from datetime import datetime, UTC
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    start_cpu_pool()
+    await user_cache.start()
     yield
+    await user_cache.stop()
+    password_pool.shutdown()
+    shutdown_cpu_pool()
+    await async_engine.dispose()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(request_connection)])
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(auth.auth_router)
@@ -44,6 +57,8 @@ app.include_router(users.user_router)
 app.include_router(trips.trip_router)
 app.include_router(trips.rides_router)
 app.include_router(photos.photo_router)
+app.include_router(jobs.jobs_router)
+app.include_router(tiles.tiles_router)
 
 if config.environment == "TEST":
     app.include_router(admin.admin_router)
@@ -115,5 +130,8 @@ def metrics():
     return {
         "trips_count": get_total_trips(),
         "users_count": get_total_users(),
+        "db_pool": pool_metrics(engine.pool),
+        "db_async_pool": pool_metrics(async_engine.pool),
+        "password_pool": password_pool.metrics(),
         "version": "0.1.0"
     }
\ No newline at end of file
@@ -107,6 +107,10 @@ class TripsResponse(BaseModel):
     thumbnail_id: str | None
 
 
+class NearbyTripResponse(TripsResponse):
+    distance_km: float
+
+
 ### Ride Models
 class RideResponse(BaseModel):
     model_config = ConfigDict(
@@ -131,6 +135,69 @@ class RideModel(BaseModel):
     notes: str | None
 
 
+### Photo models
+class PhotoUploadFile(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+
+
+class PhotoUploadRequest(BaseModel):
+    files: list[PhotoUploadFile]
+
+
+class PhotoUploadTicket(BaseModel):
+    id: str
+    key: str
+    url: str
+    fields: dict[str, str]  # form fields to send before the file itself
+
+
+class PhotoUploadsResponse(BaseModel):
+    uploads: list[PhotoUploadTicket]
+    expiry: int
+
+
+class PhotoUploadComplete(BaseModel):
+    keys: list[str]
+
+
+class PhotoResponse(BaseModel):
+    id: str
+    url: str  # the original
+    width: int | None
+    height: int | None
+    # content type -> srcset of its variants, empty until they are rendered
+    srcset: dict[str, str]
+
+
+class RoutePhotoResponse(BaseModel):
+    id: str
+    url: str
+    srcset: dict[str, str]
+    ride_id: str
+    taken_at: datetime | None
+    fraction: float  # position along the ride, 0 at the start and 1 at the end
+    lon: float
+    lat: float
+    geotagged: bool
+
+
+### Import job models
+class ImportJobResponse(BaseModel):
+    model_config = ConfigDict(
+        from_attributes=True
+    )  # Allows conversion from SQLAlchemy model
+
+    id: str
+    trip_id: str
+    status: str
+    error: str | None
+    ride_ids: list[str] | None
+    created_at: datetime
+    updated_at: datetime
+
+
 ### Complex models
 class TripDetailResponse(BaseModel):
     trip: TripResponse
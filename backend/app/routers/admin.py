@@ -3,6 +3,8 @@ from fastapi import APIRouter, Depends
 from app.dependencies import get_bearer_token
 from app.config import config
 from app.errors import UnauthorizedError, DatabaseError
+from app.services.user_cache import user_cache
+from app.services.cache import tile_cache
 from db.schema import engine, Base
 
 admin_router = APIRouter(prefix="/admin", tags=["Administrator"])
@@ -18,5 +20,8 @@ async def handler_reset(authorization: Annotated[str, Depends(get_bearer_token)]
     try:
         Base.metadata.drop_all(bind=engine)
         Base.metadata.create_all(bind=engine)
+        user_cache.clear()
+        # Tile versions start over with the tables
+        tile_cache.clear()
     except Exception as e:
         raise DatabaseError(f"Error while resetting the Database: {str(e)}") from e
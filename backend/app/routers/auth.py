@@ -1,6 +1,7 @@
 from typing import Annotated, Callable
 import resend
-from fastapi import APIRouter, Depends, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, Form
+from fastapi.concurrency import run_in_threadpool
 from db.queries.users import (
     get_user_by_email,
     User,
@@ -19,10 +20,9 @@ from db.queries.one_time_tokens import register_reset_token, register_verify_tok
 from app.security import (
     verify_onetime_token,
     make_JWT,
-    verify_password,
+    needs_rehash,
     create_refresh_Token,
     create_one_time_token,
-    hash_password,
     validate_password,
     hash_token,
 )
@@ -30,6 +30,7 @@ from app.models import loginForm, LoginResponse, RefreshResponse
 from app.dependencies import get_bearer_token
 from app.config import config
 from app.errors import NotFoundError, AuthenticationError, ServerError
+from app.services.passwords import hash_password, verify_password, rehash_password
 from app.dependencies import (
     get_auth_user,
     get_password_reset_email,
@@ -43,16 +44,22 @@ auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @auth_router.post("/login/", status_code=200)
-def loginHandler(form_data: Annotated[loginForm, Form()]) -> LoginResponse:
+async def loginHandler(
+    form_data: Annotated[loginForm, Form()], background_tasks: BackgroundTasks
+) -> LoginResponse:
     try:
-        user: User = get_user_by_email(form_data.email)
+        user: User = await run_in_threadpool(get_user_by_email, form_data.email)
 
     except NotFoundError:
         raise AuthenticationError("Wrong email or password")
 
-    if verify_password(form_data.password, user.hashed_password):
+    if await verify_password(form_data.password, user.hashed_password):
+        if needs_rehash(user.hashed_password):
+            background_tasks.add_task(rehash_password, user.id, form_data.password)
         access_token = make_JWT(user.id)
-        refresh_token = register_refresh_token(user.id, create_refresh_Token())
+        refresh_token = await run_in_threadpool(
+            register_refresh_token, user.id, create_refresh_Token()
+        )
         return {
             "access_token": access_token,
             "refresh_token": refresh_token.token,
@@ -87,7 +94,7 @@ def refresh_handler(
 async def handler_guestLogin() -> LoginResponse:
     user = None
     try:
-        user = get_user_by_email("guest@trailstory.com")
+        user = await run_in_threadpool(get_user_by_email, "guest@trailstory.com")
     except Exception:
         pass
 
@@ -95,15 +102,17 @@ async def handler_guestLogin() -> LoginResponse:
         user_dict = {
             "email": "guest@trailstory.com",
             "username": "Bikepacker",
-            "hashed_password": hash_password("Trailstorybikepackingadventure229"),
+            "hashed_password": await hash_password("Trailstorybikepackingadventure229"),
             "firstname": "Olaf",
             "lastname": "Trailblaze",
             "email_verified": True,
         }
-        user = create_user(User(**user_dict))
+        user = await run_in_threadpool(create_user, User(**user_dict))
 
     access_token = make_JWT(user_id=user.id)
-    refresh_token = register_refresh_token(user.id, create_refresh_Token())
+    refresh_token = await run_in_threadpool(
+        register_refresh_token, user.id, create_refresh_Token()
+    )
 
     return {
         "access_token": access_token,
@@ -135,17 +144,18 @@ def reset_pwd_handler(
 
 
 @auth_router.post("/password/confirm/", status_code=204)
-def confirm_pwd_handler(
+async def confirm_pwd_handler(
     token: str,
     password: Annotated[str, Form()],
     pwd_changed: Annotated[Callable, Depends(get_password_changed_email)],
 ):
-    user = get_user_by_id(verify_onetime_token(token))
+    user_id = await run_in_threadpool(verify_onetime_token, token)
+    user = await run_in_threadpool(get_user_by_id, user_id)
     validate_password(password)
-    password_dict = {"hashed_password": hash_password(password)}
-    update_user(user.id, password_dict)
-    revoke_tokens_for_user(user.id)
-    pwd_changed(user.email, user.username)
+    password_dict = {"hashed_password": await hash_password(password)}
+    await run_in_threadpool(update_user, user.id, password_dict)
+    await run_in_threadpool(revoke_tokens_for_user, user.id)
+    await run_in_threadpool(pwd_changed, user.email, user.username)
 
 
 @auth_router.post("/email/verify/confirm/", status_code=204)
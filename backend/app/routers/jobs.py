@@ -0,0 +1,19 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends
+from db.schema import User
+from db.async_queries.import_jobs import get_import_job
+from app.models import ImportJobResponse
+from app.dependencies import get_auth_user
+from app.errors import UnauthorizedError
+
+jobs_router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@jobs_router.get("/{job_id}/", status_code=200)
+async def handler_get_job(
+    job_id: str, auth_user: Annotated[User, Depends(get_auth_user)]
+) -> ImportJobResponse:
+    job = await get_import_job(job_id)
+    if job.user_id != auth_user.id:
+        raise UnauthorizedError("Error: Job does not belong to user")
+    return job
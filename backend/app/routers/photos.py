@@ -1,26 +1,62 @@
-import io
+import os
+import re
 from uuid import uuid4
-from PIL import Image
 from typing import Annotated
-from fastapi import APIRouter, Depends, UploadFile
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from db.schema import Photo, User
-from db.queries.photos import add_photo, get_trip_photos, get_photo, delete_photo
-from db.queries.trips import get_trip, update_trip
-from db.queries.users import get_user_by_id, update_user
+from db.queries.photos import add_photo, add_photos, delete_photo
+from db.queries.trips import update_trip
+from db.queries.users import update_user
+from db.async_queries.photos import (
+    get_trip_photos,
+    get_photo,
+    get_photos_along_route,
+)
+from db.async_queries.trips import get_trip
+from db.async_queries.users import get_user_by_id
 from app.config import config
 from app.dependencies import get_auth_user, block_guest
 from app.errors import UnauthorizedError, InputError
+from app.models import (
+    PhotoResponse,
+    RoutePhotoResponse,
+    PhotoUploadFile,
+    PhotoUploadRequest,
+    PhotoUploadTicket,
+    PhotoUploadsResponse,
+    PhotoUploadComplete,
+)
 from app.routers.trips import trip_router
 from app.routers.users import user_router
-from app.services.file_services import s3, upload_to_s3, remove_from_s3
+from app.services.file_services import (
+    presigned_url,
+    url_expiry,
+    upload_stream_to_s3,
+    upload_many_to_s3,
+    remove_from_s3,
+    presigned_post,
+    head_objects,
+)
+from app.services.photo_services import (
+    AVATAR_WIDTH,
+    read_upload_metadata,
+    extract_photos_metadata,
+    create_photos_variants,
+    photo_srcset,
+    sized_photo_url,
+)
 
 
 photo_router = APIRouter(
     prefix="/photos", tags=["Photos"], dependencies=[Depends(block_guest)]
 )
 
+MAX_TRIP_PHOTOS = 20
+UPLOAD_EXPIRY = 600  # seconds a browser has to start a direct upload
 
-def validate_photo(file: UploadFile):
+
+def validate_photo(file: UploadFile | PhotoUploadFile):
     if file.size == 0:
         raise InputError(f"File : {file.filename} is empty")
     if not file.filename.lower().endswith((".jpg", ".png", ".heic", ".jpeg")):
@@ -38,48 +74,79 @@ def validate_photo(file: UploadFile):
 async def deletePhotosHandler(
     photo_id: str, auth_user: Annotated[User, Depends(get_auth_user)]
 ):
-    photo = get_photo(photo_id)
+    photo = await get_photo(photo_id)
     if photo.trip_id:
-        trip = get_trip(photo.trip_id)
+        trip = await get_trip(photo.trip_id)
         if auth_user.id != trip.user_id:
             raise UnauthorizedError("Photo does not belong to user")
     if photo.user_id:
-        user = get_user_by_id(photo.user_id)
+        user = await get_user_by_id(photo.user_id)
         if auth_user.id != user.id:
             raise UnauthorizedError("Photo does not belong to user")
 
-    if await remove_from_s3([photo.s3_key]):
-        delete_photo(photo_id)
+    # The row goes first: variants recorded until then are in the keys it
+    # returns, and any rendered later are removed by create_photos_variants
+    keys = await run_in_threadpool(delete_photo, photo_id)
+    await remove_from_s3(keys)
 
 
 # Trip photos endpoints
 
 
 @trip_router.get("/{trip_id}/photos/", status_code=200)
-def getPhotosHandler(trip_id: str):
-    trip = get_trip(trip_id)
-    photos = get_trip_photos(trip.id)
+async def getPhotosHandler(trip_id: str):
+    trip = await get_trip(trip_id)
+    photos = await get_trip_photos(trip.id)
 
     links = {}
     for photo in photos:
-        url = s3.meta.client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": config.s3.bucket, "Key": photo.s3_key},
-            ExpiresIn=3600,
-        )
+        url = presigned_url(photo.s3_key)
         links[photo.id] = url
 
     return links
 
 
+@trip_router.get("/{trip_id}/photos/gallery", status_code=200)
+async def getPhotoGalleryHandler(trip_id: str) -> list[PhotoResponse]:
+    trip = await get_trip(trip_id, None)
+    photos = await get_trip_photos(trip.id)
+
+    return [
+        PhotoResponse(
+            id=photo.id,
+            url=presigned_url(photo.s3_key),
+            width=photo.w_dimm,
+            height=photo.h_dimm,
+            srcset=photo_srcset(photo.variants),
+        )
+        for photo in photos
+    ]
+
+
+@trip_router.get("/{trip_id}/photos/along-route", status_code=200)
+async def getPhotosAlongRouteHandler(trip_id: str) -> list[RoutePhotoResponse]:
+    trip = await get_trip(trip_id, None)
+    photos = await get_photos_along_route(trip.id)
+
+    return [
+        RoutePhotoResponse(
+            **photo._mapping,
+            url=presigned_url(photo.s3_key),
+            srcset=photo_srcset(photo.variants),
+        )
+        for photo in photos
+    ]
+
+
 @trip_router.post("/{trip_id}/photos/", status_code=201)
 async def uploadPhotosHandler(
     trip_id: str,
     files: list[UploadFile],
     auth_user: Annotated[User, Depends(get_auth_user)],
+    background_tasks: BackgroundTasks,
 ):
-    trip = get_trip(trip_id)
-    allowance = 20 - len(get_trip_photos(trip_id))
+    trip = await get_trip(trip_id)
+    allowance = MAX_TRIP_PHOTOS - len(await get_trip_photos(trip_id))
 
     if allowance <= 0:
         raise InputError(
@@ -87,8 +154,8 @@ async def uploadPhotosHandler(
         )
     print(f"Received {len(files)} files")
 
-    if len(files) > 20:
-        raise InputError("Max number of images: 20")
+    if len(files) > MAX_TRIP_PHOTOS:
+        raise InputError(f"Max number of images: {MAX_TRIP_PHOTOS}")
 
     if trip.user_id != auth_user.id:
         raise UnauthorizedError("Trip does not belong to this user")
@@ -96,37 +163,128 @@ async def uploadPhotosHandler(
     for file in files:
         validate_photo(file)
 
-    photos_links = []
-
+    uploads = []
+    photos = []
     for file in files:
-        content = await file.read()
         item_id = str(uuid4())
+        metadata = await read_upload_metadata(file)
+        uploads.append((file, trip_id, item_id))
+        photos.append(
+            {
+                "id": item_id,
+                "trip_id": trip_id,
+                "mime_type": file.content_type,
+                "file_size": file.size,
+                "h_dimm": metadata.height,
+                "w_dimm": metadata.width,
+                "taken_at": metadata.taken_at,
+                "location": metadata.location(),
+            }
+        )
 
-        key = await upload_to_s3(file, content, trip_id, item_id)
+    keys = await upload_many_to_s3(uploads)
+    for photo, key in zip(photos, keys):
+        photo["s3_key"] = key
+    await run_in_threadpool(add_photos, photos)
+    background_tasks.add_task(
+        create_photos_variants, {photo["id"]: photo["s3_key"] for photo in photos}
+    )
 
-        with Image.open(io.BytesIO(content)) as im:
-            width, height = im.size
+    # Read first: links signed after a window turns over only last longer
+    expiry = url_expiry()
+    photos_links = [presigned_url(key) for key in keys]
 
-        photo_data = {
-            "id": item_id,
-            "trip_id": trip_id,
-            "mime_type": file.content_type,
-            "file_size": file.size,
-            "h_dimm": height,
-            "w_dimm": width,
-            "s3_key": key,
-        }
+    return {"links": photos_links, "expiry": expiry}
+
+
+@trip_router.post("/{trip_id}/photos/uploads", status_code=201)
+async def createPhotoUploadsHandler(
+    trip_id: str,
+    request: PhotoUploadRequest,
+    auth_user: Annotated[User, Depends(get_auth_user)],
+) -> PhotoUploadsResponse:
+    """Presigned POST policies to upload photos straight to S3.
+
+    The API never sees the bytes: the browser posts each file to S3, then
+    calls /uploads/complete with the keys it uploaded.
+    """
+    trip = await get_trip(trip_id, None)
+    if trip.user_id != auth_user.id:
+        raise UnauthorizedError("Trip does not belong to this user")
+
+    allowance = MAX_TRIP_PHOTOS - len(await get_trip_photos(trip_id))
+    if len(request.files) > allowance:
+        raise InputError(
+            f"File allowance exceeded. You can upload {max(allowance, 0)} more files"
+        )
+    for file in request.files:
+        validate_photo(file)
 
-        db_photo = add_photo(Photo(**photo_data))
-        
-        url = s3.meta.client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": config.s3.bucket, "Key": db_photo.s3_key},
-            ExpiresIn=3600,
+    uploads = []
+    for file in request.files:
+        item_id = str(uuid4())
+        key = f"{trip_id}/{item_id}{os.path.splitext(file.filename)[1]}"
+        post = presigned_post(
+            key, file.content_type, config.limits.max_upload_size, UPLOAD_EXPIRY
         )
-        photos_links.append(url)
+        uploads.append(PhotoUploadTicket(id=item_id, key=key, **post))
 
-    return {"links": photos_links, "expiry": 3600}
+    return PhotoUploadsResponse(uploads=uploads, expiry=UPLOAD_EXPIRY)
+
+
+@trip_router.post("/{trip_id}/photos/uploads/complete", status_code=201)
+async def completePhotoUploadsHandler(
+    trip_id: str,
+    request: PhotoUploadComplete,
+    background_tasks: BackgroundTasks,
+    auth_user: Annotated[User, Depends(get_auth_user)],
+):
+    trip = await get_trip(trip_id, None)
+    if trip.user_id != auth_user.id:
+        raise UnauthorizedError("Trip does not belong to this user")
+
+    key_pattern = re.compile(rf"{re.escape(trip_id)}/([0-9a-f-]{{36}})\.\w+")
+    photos = {}
+    for key in request.keys:
+        match = key_pattern.fullmatch(key)
+        if not match:
+            raise InputError(f"Invalid upload key: {key}")
+        photos[match[1]] = key
+
+    # Completing twice only registers each photo once
+    existing = {photo.id for photo in await get_trip_photos(trip_id)}
+    photos = {id: key for id, key in photos.items() if id not in existing}
+    if len(photos) > MAX_TRIP_PHOTOS - len(existing):
+        raise InputError(f"Max number of images: {MAX_TRIP_PHOTOS}")
+
+    rows = []
+    for (photo_id, key), head in zip(
+        photos.items(), await head_objects(list(photos.values()))
+    ):
+        if head is None:
+            raise InputError(f"Upload {key} not found")
+        if head["ContentLength"] > config.limits.max_upload_size:
+            raise InputError("Maximum file size exceeded. 15MB")
+        rows.append(
+            {
+                "id": photo_id,
+                "trip_id": trip_id,
+                "mime_type": head["ContentType"],
+                "file_size": head["ContentLength"],
+                "s3_key": key,
+            }
+        )
+
+    # A concurrent completion may have registered some of them since the check
+    inserted = await run_in_threadpool(add_photos, rows) if rows else set()
+    added = {id: key for id, key in photos.items() if id in inserted}
+    if added:
+        background_tasks.add_task(extract_photos_metadata, added)
+        background_tasks.add_task(create_photos_variants, added)
+
+    expiry = url_expiry()
+    photos_links = [presigned_url(key) for key in photos.values()]
+    return {"links": photos_links, "expiry": expiry}
 
 
 @trip_router.put("/{trip_id}/thumbnail/", status_code=204)
@@ -134,8 +292,9 @@ async def uploadThumbnailHandler(
     trip_id: str,
     files: list[UploadFile],
     auth_user: Annotated[User, Depends(get_auth_user)],
+    background_tasks: BackgroundTasks,
 ):
-    trip = get_trip(trip_id)
+    trip = await get_trip(trip_id)
     print(f"Received {len(files)} files")
 
     if trip.user_id != auth_user.id:
@@ -145,80 +304,61 @@ async def uploadThumbnailHandler(
         validate_photo(file)
 
     for file in files:
-        content = await file.read()
         item_id = str(uuid4())
-        size = 290, 192
-
-        key = await upload_to_s3(file, content, trip_id, item_id)
-
-        with Image.open(io.BytesIO(content)) as im:
-            im.thumbnail(size)
-            buffer = io.BytesIO()
-            im.save(buffer, format="JPEG")  # or 'PNG', etc.
-            image_bytes = buffer.getvalue()
-            key = await upload_to_s3(file, image_bytes, auth_user.id, item_id)
+        metadata = await read_upload_metadata(file)
+        key = await upload_stream_to_s3(file, trip_id, item_id)
 
         photo_data = {
             "id": item_id,
             "trip_id": trip_id,
             "mime_type": file.content_type,
             "file_size": file.size,
-            "h_dimm": 192,
-            "w_dimm": 290,
+            "h_dimm": metadata.height,
+            "w_dimm": metadata.width,
             "s3_key": key,
         }
 
-        db_photo = add_photo(Photo(**photo_data))
-        update_trip(trip.id, {"thumbnail_id": db_photo.id})
+        db_photo = await run_in_threadpool(add_photo, Photo(**photo_data))
+        await run_in_threadpool(update_trip, trip.id, {"thumbnail_id": db_photo.id})
+        # The card sized copy is rendered after the response
+        background_tasks.add_task(create_photos_variants, {db_photo.id: key})
 
 
 ### User photo endpoints
 @user_router.post("/avatar/", status_code=201)
 async def uploadProfilePhotoHandler(
-    file: UploadFile, auth_user: Annotated[User, Depends(get_auth_user)]
+    file: UploadFile,
+    auth_user: Annotated[User, Depends(get_auth_user)],
+    background_tasks: BackgroundTasks,
 ):
     validate_photo(file)
-    content = await file.read()
     item_id = str(uuid4())
-    size = 120, 120
-
-    with Image.open(io.BytesIO(content)) as im:
-        im.thumbnail(size)
-        buffer = io.BytesIO()
-        im.save(buffer, format="JPEG")  # or 'PNG', etc.
-        image_bytes = buffer.getvalue()
-        key = await upload_to_s3(file, image_bytes, auth_user.id, item_id)
+    metadata = await read_upload_metadata(file)
+    key = await upload_stream_to_s3(file, auth_user.id, item_id)
 
     photo = {
         "id": item_id,
         "user_id": auth_user.id,
         "mime_type": file.content_type,
         "file_size": file.size,
-        "h_dimm": 120,
-        "w_dimm": 120,
+        "h_dimm": metadata.height,
+        "w_dimm": metadata.width,
         "s3_key": key,
     }
 
-    db_photo = add_photo(Photo(**photo))
-    update_user(auth_user.id, {"avatar_id": item_id})
-    url = s3.meta.client.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": config.s3.bucket, "Key": db_photo.s3_key},
-        ExpiresIn=3600,
-    )
+    db_photo = await run_in_threadpool(add_photo, Photo(**photo))
+    await run_in_threadpool(update_user, auth_user.id, {"avatar_id": item_id})
+    background_tasks.add_task(create_photos_variants, {db_photo.id: key})
+    url = presigned_url(db_photo.s3_key)
 
     return url
 
 
 @user_router.get("{user_id}/avatar/", status_code=200)
-def getAvatarHandler(user_id: str):
-    user = get_user_by_id(user_id)
-    photo = get_photo(user.avatar_id)
-
-    url = s3.meta.client.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": config.s3.bucket, "Key": photo.s3_key},
-        ExpiresIn=3600,
-    )
+async def getAvatarHandler(user_id: str):
+    user = await get_user_by_id(user_id)
+    photo = await get_photo(user.avatar_id)
+
+    url = sized_photo_url(photo.s3_key, photo.variants, AVATAR_WIDTH)
 
     return url
@@ -0,0 +1,38 @@
+from typing import Annotated
+from fastapi import APIRouter, Path, Response
+from db.async_queries.tiles import get_route_tile, get_tiles_version
+from app.errors import InputError
+from app.services.cache import tile_cache
+from app.services.route_services import detail_for_zoom, route_column
+
+tiles_router = APIRouter(prefix="/tiles", tags=["Tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+@tiles_router.get("/{z}/{x}/{y}.mvt", status_code=200)
+async def handler_get_tile(
+    z: Annotated[int, Path(ge=0, le=22)],
+    x: Annotated[int, Path(ge=0)],
+    y: Annotated[int, Path(ge=0)],
+    trip_id: str | None = None,
+    user_id: str | None = None,
+):
+    """Route tiles for one trip, one user, or every published trip."""
+    if x >= 2**z or y >= 2**z:
+        raise InputError(f"Tile {z}/{x}/{y} is outside the map")
+
+    version = await get_tiles_version(trip_id, user_id)
+    key = (z, x, y, trip_id, user_id, version)
+    tile = tile_cache.get(key)
+
+    if tile is None:
+        column = route_column(detail_for_zoom(z))
+        tile = await get_route_tile(z, x, y, column, trip_id, user_id)
+        tile_cache.set(key, tile)
+
+    return Response(
+        content=tile,
+        media_type=MVT_MEDIA_TYPE,
+        headers={"Cache-Control": "public, max-age=60"},
+    )
@@ -1,32 +1,69 @@
 import re
-import gpxpy
-from typing import Annotated
-from fastapi import APIRouter, Depends, UploadFile, Form
-from shapely.geometry import LineString, Polygon
-from shapely import bounds, to_geojson
-from geoalchemy2.shape import from_shape, to_shape
-from db.queries.trips import create_trip, get_trip, delete_trip, update_trip
-from db.queries.rides import (
-    get_trip_rides_asc,
-    create_rides,
-    get_ride,
-    update_ride,
-    delete_ride,
+from uuid import uuid4
+from typing import Annotated, BinaryIO
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    UploadFile,
+    Form,
+    Header,
+    Query,
+    Response,
 )
-from db.schema import User, Ride, Trip
+from fastapi.concurrency import run_in_threadpool
+from shapely import get_coordinates, to_geojson
+from geoalchemy2.shape import to_shape
+from db.queries.trips import (
+    create_trip,
+    delete_trip,
+    update_trip,
+    rebuild_trip_aggregates,
+)
+from db.queries.rides import update_ride, delete_ride
+from db.async_queries.trips import (
+    get_trip,
+    get_published_trips,
+    get_trips_in_bbox,
+    get_nearby_trips,
+)
+from db.async_queries.rides import get_trip_rides_asc, get_ride
+from db.schema import User, Trip, ImportJob, ImportJobFile
+from db.queries.import_jobs import create_import_job
 from app.models import (
     TripModel,
     RideResponse,
     TripDraft,
     TripDetailResponse,
     TripResponse,
+    TripsResponse,
+    NearbyTripResponse,
     RideModel,
+    ImportJobResponse,
 )
 from app.config import config
 from app.dependencies import get_auth_user, block_guest
-from app.errors import UnauthorizedError, InvalidGPXError, InputError, ServerError
-from app.services.file_services import s3
-from db.queries.photos import get_photo
+from app.errors import UnauthorizedError, InputError, ServerError
+from app.services.cache import trip_cache
+from app.services.file_services import (
+    url_window,
+    upload_many_to_s3,
+    remove_from_s3,
+)
+from app.services.gpx_services import read_gpx
+from app.services.ride_imports import build_ride, drain_import_jobs
+from app.services.route_services import (
+    BINARY_MEDIA_TYPE,
+    RouteDetail,
+    RouteFormat,
+    encode_polyline,
+    encode_routes_binary,
+    negotiate_route_format,
+    resolve_detail,
+    route_column,
+)
+from app.services.trip_pages import decode_cursor, thumbnail_url, trips_page
+from db.async_queries.photos import get_photo
 
 trip_router = APIRouter(prefix="/trips", tags=["Trips"])
 
@@ -40,99 +77,11 @@ def generate_slug(text: str) -> str:
     return slug
 
 
-def aggregate_trip(trip: Trip):
-    rides = get_trip_rides_asc(trip.id)
-    agg_route = []
-    distance = 0.0
-    elevation = 0.0
-    high_point = float("-inf")
-    if not rides:
-        raise ServerError("Error: No rides found in trip")
-
-    for ride in rides:
-        agg_route.extend(list(to_shape(ride.route).coords))
-        distance += ride.distance
-        elevation += ride.elevation_gain
-        if ride.high_point > high_point:
-            high_point = ride.high_point
-    route = LineString(agg_route)
-    return route, distance, elevation, high_point
-
-
-def generate_bounding_box(route):
-    coords = bounds(route).tolist()
-
-    box = Polygon(
-        [
-            (coords[0], coords[1]),  #   (min_x, min_y)
-            (coords[2], coords[1]),  #    (max_x, min_y)
-            (coords[2], coords[3]),  #   (max_x, max_y)
-            (coords[0], coords[3]),  #   (min_x, max_y)
-            (coords[0], coords[1]),
-        ]
-    )  #  (min_x, min_y)
-
-    return from_shape(box, srid=4326)
-
-
-def extract_gpx_data(trip_id: str, content: bytes):
-    try:
-        # Get route coordinates
-        coords = []
-        gpx = gpxpy.parse(content)
-
-        if not gpx.tracks:
-            raise InvalidGPXError("GPX file contains no tracks")
-        if len(gpx.tracks) > 1:
-            raise InvalidGPXError("GPX file contains multiple tracks")
-        for track in gpx.tracks:
-            if not track.segments:
-                raise InvalidGPXError("Track contains no segments")
-            for segment in track.segments:
-                if len(segment.points) < 10:
-                    raise InvalidGPXError(
-                        f"Segment has insufficient points (found {len(segment.points)}, minimum 10 required)"
-                    )
-
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for point in segment.points:
-                    coords.append((point.longitude, point.latitude))
-
-        timestamp = gpx.tracks[0].segments[0].points[0].time
-        print(timestamp)
-        if not timestamp:
-            raise InvalidGPXError("GPX does not contain timestamps.")
-
-        line = LineString(coords)
-        linestring = from_shape(line, srid=4326)
-
-        # Get moving data
-        moving_data = gpx.get_moving_data()
-        distance = gpx.length_2d()
-        ascent = gpx.get_uphill_downhill().uphill
-        high_point = gpx.get_elevation_extremes().maximum
-        moving_time = moving_data.moving_time
-
-        new_ride = Ride(
-            trip_id=trip_id,
-            notes=None,
-            date=timestamp,
-            distance=distance,
-            elevation_gain=ascent,
-            high_point=high_point,
-            moving_time=moving_time,
-            route=linestring,
-            title=None,
-        )
-        print(new_ride.date, new_ride.date.tzinfo)
-
-        return new_ride
-
-    except InvalidGPXError as e:
-        raise InvalidGPXError(f"Error creating ride: {e}")
-    except Exception as e:
-        raise InvalidGPXError(f"Error creating ride: {e}") from e
+def extract_gpx_data(
+    trip_id: str, content: bytes | BinaryIO, size: int | None = None
+):
+    coords, timestamp, metrics = read_gpx(content, size)
+    return build_ride(trip_id, coords, timestamp, metrics)
 
 
 def validate_gpx_upload(file: UploadFile):
@@ -156,39 +105,162 @@ def validate_gpx_upload(file: UploadFile):
     return True
 
 
-@trip_router.get("/{trip_id}/", status_code=200)
-async def handler_get_trip(trip_id: str) -> TripDetailResponse:
-    trip = get_trip(trip_id)
+def route_encoder(route_format: RouteFormat, precision: int):
+    def encode(route):
+        if route_format == "polyline":
+            return encode_polyline(get_coordinates(to_shape(route)), precision)
+        return to_geojson(to_shape(route))
+
+    return encode
+
+
+def encode_route(obj, detail: RouteDetail, encode):
+    route = getattr(obj, route_column(detail))
+    return encode(route) if route is not None else None
+
+
+def binary_routes(objs, detail: RouteDetail, precision: int) -> bytes:
+    routes = []
+    for obj in objs:
+        route = getattr(obj, route_column(detail))
+        if route is not None:
+            routes.append((obj.id, get_coordinates(to_shape(route))))
+    return encode_routes_binary(routes, precision)
+
+
+def binary_response(content: bytes):
+    return Response(
+        content=content, media_type=BINARY_MEDIA_TYPE, headers={"Vary": "Accept"}
+    )
+
+
+async def build_trip_detail(
+    trip_id: str, detail: RouteDetail, route_format: RouteFormat, precision: int
+):
+    trip = await get_trip(trip_id, detail)
+    rides = await get_trip_rides_asc(trip_id, detail)
 
-    if trip.route:
-        trip.route = to_geojson(to_shape(trip.route))
+    if route_format == "binary":
+        return binary_routes([trip, *rides], detail, precision), trip
+
+    encode = route_encoder(route_format, precision)
+
+    if trip.bounding_box is not None:
+        trip.route = encode_route(trip, detail, encode)
         trip.bounding_box = to_geojson(to_shape(trip.bounding_box))
+    else:
+        trip.route = None
 
     if trip.thumbnail_id:
-        db_photo = get_photo(trip.thumbnail_id)
+        db_photo = await get_photo(trip.thumbnail_id)
 
-        url = s3.meta.client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": config.s3.bucket, "Key": db_photo.s3_key},
-            ExpiresIn=3600,
-        )
+        url = thumbnail_url(db_photo.s3_key, db_photo.variants)
         trip.thumbnail_id = url
 
-    rides = get_trip_rides_asc(trip_id)
-
     for ride in rides:
         if ride:
-            ride.route = to_geojson(to_shape(ride.route))
+            ride.route = encode_route(ride, detail, encode)
+
+    response = TripDetailResponse.model_validate({"trip": trip, "rides": rides})
+    return response, trip
+
+
+@trip_router.get("/feed/", status_code=200)
+async def handler_get_feed(
+    response: Response,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> list[TripsResponse]:
+    rows = await get_published_trips(decode_cursor(cursor), limit)
+    return trips_page(rows, limit, response)
+
+
+@trip_router.get("/search/bbox", status_code=200)
+async def handler_search_bbox(
+    response: Response,
+    minx: Annotated[float, Query(ge=-180, le=180)],
+    miny: Annotated[float, Query(ge=-90, le=90)],
+    maxx: Annotated[float, Query(ge=-180, le=180)],
+    maxy: Annotated[float, Query(ge=-90, le=90)],
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+) -> list[TripsResponse]:
+    if minx >= maxx or miny >= maxy:
+        raise InputError("Bounding box must have minx < maxx and miny < maxy")
+
+    rows = await get_trips_in_bbox(
+        (minx, miny, maxx, maxy), decode_cursor(cursor), limit
+    )
+    return trips_page(rows, limit, response)
+
+
+@trip_router.get("/nearby", status_code=200)
+async def handler_nearby_trips(
+    lat: Annotated[float, Query(ge=-90, le=90)],
+    lon: Annotated[float, Query(ge=-180, le=180)],
+    radius_km: Annotated[float, Query(gt=0, le=500)] = 25,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+) -> list[NearbyTripResponse]:
+    rows = await get_nearby_trips(lat, lon, radius_km, limit)
+    return [
+        NearbyTripResponse(
+            **trip._mapping,
+            thumbnail_id=thumbnail_url(trip.thumbnail_key, trip.thumbnail_variants),
+        )
+        for trip in rows
+    ]
 
-    return {"trip": trip, "rides": rides}
 
+@trip_router.get("/{trip_id}/", status_code=200)
+async def handler_get_trip(
+    trip_id: str,
+    response: Response,
+    detail: RouteDetail | None = None,
+    zoom: Annotated[int | None, Query(ge=0, le=22)] = None,
+    precision: Annotated[int, Query(ge=0, le=7)] = 5,
+    accept: Annotated[str | None, Header()] = None,
+) -> TripDetailResponse:
+    detail = resolve_detail(detail, zoom)
+    route_format = negotiate_route_format(accept)
+    response.headers["Vary"] = "Accept"
+
+    # Published trips are served from memory until the trip or a ride changes,
+    # or the thumbnail url in the body moves to the next signing window
+    trip = await get_trip(trip_id, None)
+    window = url_window()
+    key = (trip.id, trip.updated_at, window, detail, route_format, precision)
+    if trip.is_published:
+        body = trip_cache.get(key)
+        if body is not None:
+            return binary_response(body) if route_format == "binary" else body
+
+    body, trip = await build_trip_detail(trip_id, detail, route_format, precision)
+    key = (trip.id, trip.updated_at, window, detail, route_format, precision)
+    if trip.is_published:
+        trip_cache.set(key, body)
+    return binary_response(body) if route_format == "binary" else body
 
-@trip_router.get("/{trip_id}/rides/", status_code=200)
-async def handler_get_rides(trip_id: str) -> RideResponse | list[RideResponse]:
-    rides = get_trip_rides_asc(trip_id)
 
+@trip_router.get("/{trip_id}/rides/", status_code=200)
+async def handler_get_rides(
+    trip_id: str,
+    response: Response,
+    detail: RouteDetail | None = None,
+    zoom: Annotated[int | None, Query(ge=0, le=22)] = None,
+    precision: Annotated[int, Query(ge=0, le=7)] = 5,
+    accept: Annotated[str | None, Header()] = None,
+) -> RideResponse | list[RideResponse]:
+    detail = resolve_detail(detail, zoom)
+    route_format = negotiate_route_format(accept)
+    response.headers["Vary"] = "Accept"
+    rides = await get_trip_rides_asc(trip_id, detail)
+
+    if route_format == "binary":
+        return binary_response(binary_routes(rides, detail, precision))
+
+    encode = route_encoder(route_format, precision)
     for ride in rides:
-        ride.route = to_geojson(to_shape(ride.route))
+        ride.route = encode_route(ride, detail, encode)
 
     return rides
 
@@ -209,19 +281,19 @@ async def handler_draft_trip(
         slug=slug,
     )
 
-    return create_trip(new_trip)
+    return await run_in_threadpool(create_trip, new_trip)
 
 
 @trip_router.post(
-    "/{trip_id}/rides/", status_code=201, dependencies=[Depends(block_guest)]
+    "/{trip_id}/rides/", status_code=202, dependencies=[Depends(block_guest)]
 )
 async def handler_add_rides(
     trip_id: str,
     files: list[UploadFile],
     auth_user: Annotated[User, Depends(get_auth_user)],
-) -> list[RideResponse]:
-    trip = get_trip(trip_id)
-    rides = []
+    background_tasks: BackgroundTasks,
+) -> ImportJobResponse:
+    trip = await get_trip(trip_id)
 
     if len(files) > 15:
         raise InputError("Max number of files: 15")
@@ -231,16 +303,30 @@ async def handler_add_rides(
     for file in files:
         validate_gpx_upload(file)
 
-    for file in files:
-        content = await file.read()
-        ride = extract_gpx_data(trip_id, content)
-        rides.append(ride)
+    # Uploads are streamed to the bucket; the job only keeps their keys
+    file_ids = [str(uuid4()) for _ in files]
+    folder = f"imports/{trip_id}"
+    keys = await upload_many_to_s3(
+        [(file, folder, file_id) for file, file_id in zip(files, file_ids)]
+    )
+    job_files = [
+        ImportJobFile(id=file_id, filename=file.filename, s3_key=key)
+        for file, file_id, key in zip(files, file_ids, keys)
+    ]
+    try:
+        job = await run_in_threadpool(
+            create_import_job,
+            ImportJob(trip_id=trip_id, user_id=auth_user.id, files=job_files),
+        )
+    except Exception:
+        await remove_from_s3(keys)
+        raise
 
-    rides = create_rides(rides)
-    for ride in rides:
-        ride.route = to_geojson(to_shape(ride.route))
+    # Parsing happens after the response; dedicated workers may get there first
+    if config.workers.inline_imports:
+        background_tasks.add_task(drain_import_jobs)
 
-    return rides
+    return job
 
 
 @trip_router.put("/{trip_id}/", dependencies=[Depends(block_guest)])
@@ -249,7 +335,7 @@ async def handler_save_trip(
     form_data: Annotated[TripModel, Form()],
     auth_user: Annotated[User, Depends(get_auth_user)],
 ) -> TripResponse:
-    trip = get_trip(trip_id)
+    trip = await get_trip(trip_id)
 
     if trip.user_id != auth_user.id:
         raise UnauthorizedError("Error: Trip does not belong to user")
@@ -258,17 +344,16 @@ async def handler_save_trip(
         raise InputError("Error: End date cannot be before start date")
 
     values_dict = form_data.model_dump()
-
-    route, total_distance, total_elevation, high_point = aggregate_trip(trip)
-
     values_dict["slug"] = generate_slug(form_data.title)
-    values_dict["route"] = from_shape(route, srid=4326)
-    values_dict["total_distance"] = total_distance
-    values_dict["total_elevation"] = total_elevation
-    values_dict["high_point"] = high_point
-    values_dict["bounding_box"] = generate_bounding_box(route)
     values_dict["is_published"] = form_data.is_published == "true"
-    trip = update_trip(trip.id, values_dict)
+
+    # Aggregates follow ride changes; only trips that predate that need them here.
+    # A trip without rides can't be saved, so check before writing anything.
+    if trip.route is None:
+        if not await run_in_threadpool(rebuild_trip_aggregates, trip.id):
+            raise ServerError("Error: No rides found in trip")
+
+    trip = await run_in_threadpool(update_trip, trip.id, values_dict)
     trip.bounding_box = to_geojson(to_shape(trip.bounding_box))
     trip.route = to_geojson(to_shape(trip.route))
     return trip
@@ -278,11 +363,11 @@ async def handler_save_trip(
 async def handler_delete_trip(
     trip_id: str, auth_user: Annotated[User, Depends(get_auth_user)]
 ):
-    trip = get_trip(trip_id)
+    trip = await get_trip(trip_id)
     if trip.user_id != auth_user.id:
         raise UnauthorizedError("Error:Trip does not belong to user")
 
-    delete_trip(trip_id)
+    await run_in_threadpool(delete_trip, trip_id)
 
 
 rides_router = APIRouter(prefix="/rides", tags=["Rides"])
@@ -294,11 +379,12 @@ async def handler_update_ride(
     form_data: Annotated[RideModel, Form()],
     auth_user: Annotated[User, Depends(get_auth_user)],
 ) -> RideResponse:
-    ride = get_ride(ride_id)
-    trip = get_trip(ride.trip_id)
+    ride = await get_ride(ride_id)
+    trip = await get_trip(ride.trip_id)
     if auth_user.id != trip.user_id:
         raise UnauthorizedError("Error: Ride does not belong to user")
-    ride = update_ride(ride_id, form_data.model_dump(exclude_unset=True))
+    values = form_data.model_dump(exclude_unset=True)
+    ride = await run_in_threadpool(update_ride, ride_id, values)
     ride.route = to_geojson(to_shape(ride.route))
     return ride
 
@@ -307,8 +393,8 @@ async def handler_update_ride(
 async def handler_delete_ride(
     ride_id: str, auth_user: Annotated[User, Depends(get_auth_user)]
 ):
-    ride = get_ride(ride_id)
-    trip = get_trip(ride.trip_id)
+    ride = await get_ride(ride_id)
+    trip = await get_trip(ride.trip_id)
     if trip.user_id != auth_user.id:
         raise UnauthorizedError("Error:Trip does not belong to user")
-    delete_ride(ride_id)
+    await run_in_threadpool(delete_ride, ride_id)
@@ -1,17 +1,17 @@
 from typing import Annotated, Callable
-from fastapi import APIRouter, Depends, Form
-from db.queries.users import User, delete_user, create_user, update_user, get_user_by_id
-from db.queries.photos import get_photo
-from db.queries.trips import get_user_trips
+from fastapi import APIRouter, Depends, Form, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from db.queries.users import User, delete_user, create_user, update_user
+from db.async_queries.users import get_user_by_id
+from db.async_queries.photos import get_photo
+from db.async_queries.trips import get_user_trips
 from db.queries.refresh_tokens import register_refresh_token
 from db.queries.one_time_tokens import register_verify_token
 from app.security import (
     make_JWT,
-    hash_password,
     create_refresh_Token,
     validate_email,
     validate_password,
-    verify_password,
     create_one_time_token,
 )
 from app.models import LoginResponse, UserModel, UserResponse, UserUpdate, TripsResponse
@@ -23,7 +23,9 @@ from app.dependencies import (
     get_password_changed_email,
     block_guest,
 )
-from app.services.file_services import s3
+from app.services.photo_services import AVATAR_WIDTH, sized_photo_url
+from app.services.passwords import hash_password, verify_password
+from app.services.trip_pages import decode_cursor, trips_page
 
 user_router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -38,15 +40,19 @@ async def handler_create_user(
 
     new_user = user_data.model_dump(exclude={"password"})
 
-    new_user["hashed_password"] = hash_password(user_data.password)
-    db_User: UserResponse = create_user(User(**new_user))
+    new_user["hashed_password"] = await hash_password(user_data.password)
+    db_User: UserResponse = await run_in_threadpool(create_user, User(**new_user))
     access_token = make_JWT(user_id=db_User.id)
-    refresh_token = register_refresh_token(db_User.id, create_refresh_Token())
+    refresh_token = await run_in_threadpool(
+        register_refresh_token, db_User.id, create_refresh_Token()
+    )
 
     try:
         verification_token = create_one_time_token()
-        register_verify_token(db_User.id, verification_token)
-        welcome_email(db_User.email, db_User.username, verification_token)
+        await run_in_threadpool(register_verify_token, db_User.id, verification_token)
+        await run_in_threadpool(
+            welcome_email, db_User.email, db_User.username, verification_token
+        )
 
     except Exception as e:
         raise ServerError(str(e))
@@ -64,49 +70,35 @@ async def handler_create_user(
 async def handler_get_current_user(
     authed_user: Annotated[User, Depends(get_auth_user)],
 ) -> UserResponse:
-    if authed_user.avatar_id:
-        avatar = get_photo(authed_user.avatar_id)
-        url = s3.meta.client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": config.s3.bucket, "Key": avatar.s3_key},
-            ExpiresIn=3600,
-        )
-        authed_user.avatar_id = url
+    # authed_user may be shared through the user cache, so leave it untouched
+    user = UserResponse.model_validate(authed_user)
+    if user.avatar_id:
+        avatar = await get_photo(user.avatar_id)
+        url = sized_photo_url(avatar.s3_key, avatar.variants, AVATAR_WIDTH)
+        user.avatar_id = url
 
-    return authed_user
+    return user
 
 
 @user_router.get("/{id}/", status_code=200)
 async def handler_get_user_id(id: str) -> UserResponse:
-    user = get_user_by_id(id)
+    user = await get_user_by_id(id)
     if user.avatar_id:
-        avatar = get_photo(user.avatar_id)
-        url = s3.meta.client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": config.s3.bucket, "Key": avatar.s3_key},
-            ExpiresIn=3600,
-        )
+        avatar = await get_photo(user.avatar_id)
+        url = sized_photo_url(avatar.s3_key, avatar.variants, AVATAR_WIDTH)
         user.avatar_id = url
     return user
 
 
 @user_router.get("/{user_id}/trips/", status_code=200)
-async def handler_get_trips(user_id: str) -> list[TripsResponse]:
-    trips: list[TripsResponse] = get_user_trips(user_id)
-    for trip in trips:
-        if trip.thumbnail_id:
-            db_photo = get_photo(trip.thumbnail_id)
-            if db_photo:
-                url = s3.meta.client.generate_presigned_url(
-                    "get_object",
-                    Params={"Bucket": config.s3.bucket, "Key": db_photo.s3_key},
-                    ExpiresIn=3600,
-                )
-                trip.thumbnail_id = url
-            else:
-                trip.thumbnail_id = None
-
-    return trips
+async def handler_get_trips(
+    user_id: str,
+    response: Response,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+) -> list[TripsResponse]:
+    rows = await get_user_trips(user_id, decode_cursor(cursor), limit)
+    return trips_page(rows, limit, response)
 
 
 @user_router.put("/", status_code=200, dependencies=[Depends(block_guest)])
@@ -118,7 +110,7 @@ async def handler_update_user(
         validate_email(user_data.email)
 
     updated_user = user_data.model_dump(exclude_unset=True)
-    user = update_user(authed_user.id, updated_user)
+    user = await run_in_threadpool(update_user, authed_user.id, updated_user)
     return user
 
 
@@ -129,18 +121,18 @@ async def handler_change_password(
     authed_user: Annotated[User, Depends(get_auth_user)],
     changed_password: Annotated[Callable, Depends(get_password_changed_email)],
 ):
-    if not verify_password(old_password, authed_user.hashed_password):
+    if not await verify_password(old_password, authed_user.hashed_password):
         raise AuthenticationError("Incorrect password")
 
-    if verify_password(new_password, authed_user.hashed_password):
+    if await verify_password(new_password, authed_user.hashed_password):
         raise AuthenticationError("Please choose a new password")
 
     validate_password(new_password)
-    password_dict = {"hashed_password": hash_password(new_password)}
-    update_user(authed_user.id, password_dict)
-    changed_password(authed_user.email, authed_user.username)
+    password_dict = {"hashed_password": await hash_password(new_password)}
+    await run_in_threadpool(update_user, authed_user.id, password_dict)
+    await run_in_threadpool(changed_password, authed_user.email, authed_user.username)
 
 
 @user_router.delete("/", status_code=204, dependencies=[Depends(block_guest)])
 async def handler_delete_user(authed_user: Annotated[User, Depends(get_auth_user)]):
-    delete_user(authed_user.id)
+    await run_in_threadpool(delete_user, authed_user.id)
@@ -17,7 +17,8 @@ class JWTPayload:
 
 
 def hash_password(password: str):
-    hashed_pwd = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    salt = bcrypt.gensalt(rounds=config.auth.bcrypt_rounds)
+    hashed_pwd = bcrypt.hashpw(password.encode("utf-8"), salt)
     return hashed_pwd
 
 
@@ -25,6 +26,15 @@ def verify_password(password: str, hashed_pwd: bytes):
     return bcrypt.checkpw(password.encode("utf-8"), hashed_pwd)
 
 
+def needs_rehash(hashed_pwd: bytes):
+    """True when a hash was made with another work factor than configured."""
+    try:
+        rounds = int(hashed_pwd.split(b"$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != config.auth.bcrypt_rounds
+
+
 def validate_email(email):
     email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
     if not re.match(email_pattern, email):
@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from app.config import config
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._items.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class TTLCache(LRUCache):
+    """LRU cache whose entries also expire ttl seconds after being set."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires <= time.monotonic():
+            self.pop(key)
+            return default
+        return value
+
+    def set(self, key, value):
+        super().set(key, (time.monotonic() + self.ttl, value))
+
+
+# Serialized GET /trips/{id}/ responses of published trips, keyed by
+# (trip id, updated_at, url window, route detail). Any change to the trip or
+# its rides moves updated_at, so stale entries are never read again and age out.
+trip_cache = LRUCache(config.cache.trip_size)
+
+# Encoded vector tiles, keyed by tile, filter and the filter's tile version,
+# which every write to its trips moves (see db.queries.tiles.bump_tile_versions).
+tile_cache = LRUCache(config.cache.tile_size)
+
+# Presigned GET urls, keyed by (S3 key, reuse window). Old windows are never
+# read again and age out (see file_services.presigned_url).
+url_cache = LRUCache(config.cache.url_size)
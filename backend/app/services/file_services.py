@@ -1,52 +1,274 @@
 import boto3
 import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from botocore.config import Config
 from fastapi import UploadFile
 from app.config import config
 from app.errors import ServerError
+from app.services.cache import url_cache
 
 
+# One client for the whole app: its connection pool is sized for the
+# concurrent puts of multi-photo uploads
 s3 = boto3.resource(
     "s3",
     aws_access_key_id=config.s3.key,
     aws_secret_access_key=config.s3.secret_key,
     region_name=config.s3.region,
+    config=Config(max_pool_connections=config.s3.max_connections),
 )
 
-async def upload_to_s3(file: UploadFile, content: bytes, owner_id: str, id: str):
+_process_client = (None, None)
+
+
+def process_s3_client():
+    """A client of the calling process's own, for work in the CPU pool.
+
+    Forked workers must not reuse the parent's connection pool.
+    """
+    global _process_client
+    pid, client = _process_client
+    if pid != os.getpid():
+        client = boto3.client(
+            "s3",
+            aws_access_key_id=config.s3.key,
+            aws_secret_access_key=config.s3.secret_key,
+            region_name=config.s3.region,
+        )
+        _process_client = (os.getpid(), client)
+    return client
+
+
+# Blocking boto3 calls get their own threads, one per pooled connection, so
+# a batch of uploads is not capped by the size of the default executor
+s3_threads = ThreadPoolExecutor(
+    max_workers=config.s3.max_connections, thread_name_prefix="s3"
+)
+
+
+def object_key(file: UploadFile, owner_id: str, id: str):
     extension = os.path.splitext(file.filename)[1]
-    key = f"{owner_id}/{id}{extension}"
-    content_type = file.content_type
-    
+    return f"{owner_id}/{id}{extension}"
+
+
+async def put_to_s3(key: str, content: bytes, content_type: str):
     def _upload():
-        s3.Bucket(config.s3.bucket).put_object(
-            Key=key, Body=content, ContentType=content_type
+        # The client is thread safe, resource objects are not
+        s3.meta.client.put_object(
+            Bucket=config.s3.bucket, Key=key, Body=content, ContentType=content_type
         )
-    
+
     try:
-        await asyncio.to_thread(_upload)
+        await asyncio.get_running_loop().run_in_executor(s3_threads, _upload)
     except Exception as e:
         raise ServerError(str(e))
-    
+
     return key
 
 
+async def upload_to_s3(file: UploadFile, content: bytes, owner_id: str, id: str):
+    key = object_key(file, owner_id, id)
+    return await put_to_s3(key, content, file.content_type)
+
+
+async def upload_stream_to_s3(file: UploadFile, owner_id: str, id: str):
+    """Stream an upload into S3 without holding the whole file in memory.
+
+    A file that fits in one part goes up in a single put. Anything larger
+    becomes a multipart upload, read part by part, with at most
+    part_concurrency parts read and in flight at once.
+    """
+    part_size = config.s3.part_size
+    slots = asyncio.Semaphore(config.s3.part_concurrency)
+    loop = asyncio.get_running_loop()
+    client = s3.meta.client
+    target = {"Bucket": config.s3.bucket, "Key": object_key(file, owner_id, id)}
+
+    def call(fn, **kwargs):
+        return loop.run_in_executor(s3_threads, partial(fn, **target, **kwargs))
+
+    await file.seek(0)
+    await slots.acquire()
+    chunk = await file.read(part_size)
+    if len(chunk) < part_size:
+        return await upload_to_s3(file, chunk, owner_id, id)
+
+    try:
+        upload = await call(
+            client.create_multipart_upload, ContentType=file.content_type
+        )
+    except Exception as e:
+        raise ServerError(str(e)) from e
+    upload_id = upload["UploadId"]
+
+    async def upload_part(number: int, body: bytes):
+        try:
+            response = await call(
+                client.upload_part, UploadId=upload_id, PartNumber=number, Body=body
+            )
+            return {"PartNumber": number, "ETag": response["ETag"]}
+        finally:
+            slots.release()
+
+    parts = []
+    try:
+        while chunk:
+            parts.append(asyncio.create_task(upload_part(len(parts) + 1, chunk)))
+            chunk = None  # only the task holds the part now
+            await slots.acquire()
+            chunk = await file.read(part_size)
+        slots.release()
+
+        await call(
+            client.complete_multipart_upload,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": list(await asyncio.gather(*parts))},
+        )
+    except Exception as e:
+        for part in parts:
+            part.cancel()
+        await call(client.abort_multipart_upload, UploadId=upload_id)
+        raise ServerError(str(e)) from e
+
+    return target["Key"]
+
+
+async def upload_many_to_s3(uploads: list[tuple], limit: int | None = None):
+    """Stream (file, owner_id, id) uploads concurrently.
+
+    At most limit puts are in flight at once. Returns the keys in order;
+    if any upload fails, the ones that succeeded are deleted again.
+    """
+    semaphore = asyncio.Semaphore(limit or config.s3.upload_concurrency)
+
+    async def upload(args):
+        async with semaphore:
+            return await upload_stream_to_s3(*args)
+
+    results = await asyncio.gather(
+        *(upload(args) for args in uploads), return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        uploaded = [{"Key": r} for r in results if not isinstance(r, Exception)]
+        if uploaded:
+            await asyncio.to_thread(
+                s3.meta.client.delete_objects,
+                Bucket=config.s3.bucket,
+                Delete={"Objects": uploaded},
+            )
+        raise errors[0]
+    return results
+
+
+def url_window() -> int:
+    """Index of the current url_reuse window, aligned to the clock."""
+    return int(time.time() // config.s3.url_reuse)
+
+
+def url_expiry() -> int:
+    """Seconds a url from presigned_url is still valid for, at least.
+
+    Its url was signed no earlier than the start of the current window.
+    """
+    elapsed = time.time() % config.s3.url_reuse
+    return int(config.s3.url_ttl - elapsed)
+
+
+def presigned_url(key: str) -> str:
+    """GET url for a stored object, signed once per key and reuse window.
+
+    Every read in a window gets the same url, so browsers and CDNs can cache
+    the image behind it. A url is handed out for at most url_reuse seconds
+    after it was signed, which leaves it valid for url_ttl - url_reuse more.
+    """
+    cache_key = (key, url_window())
+    url = url_cache.get(cache_key)
+    if url is None:
+        url = s3.meta.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": config.s3.bucket,
+                "Key": key,
+                # Keys are never reused, so the bytes behind one never change
+                "ResponseCacheControl": f"max-age={config.s3.url_ttl}, immutable",
+            },
+            ExpiresIn=config.s3.url_ttl,
+        )
+        url_cache.set(cache_key, url)
+    return url
+
+
+def presigned_post(key: str, content_type: str, max_size: int, expires_in: int):
+    """Policy letting a browser POST one object straight to the bucket.
+
+    S3 itself rejects uploads with another key, content type or a size
+    outside 1..max_size bytes.
+    """
+    return s3.meta.client.generate_presigned_post(
+        Bucket=config.s3.bucket,
+        Key=key,
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"Content-Type": content_type},
+            ["content-length-range", 1, max_size],
+        ],
+        ExpiresIn=expires_in,
+    )
+
+
+async def head_objects(keys: list[str]):
+    """Size and content type of each key, None for keys that do not exist."""
+    loop = asyncio.get_running_loop()
+
+    def _head(key):
+        try:
+            return s3.meta.client.head_object(Bucket=config.s3.bucket, Key=key)
+        except s3.meta.client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    try:
+        return await asyncio.gather(
+            *(loop.run_in_executor(s3_threads, _head, key) for key in keys)
+        )
+    except Exception as e:
+        raise ServerError(str(e)) from e
+
+
+async def read_from_s3(key: str, length: int | None = None) -> bytes:
+    """The whole object, or only its first length bytes."""
+
+    def _read():
+        kwargs = {"Range": f"bytes=0-{length - 1}"} if length else {}
+        response = s3.meta.client.get_object(Bucket=config.s3.bucket, Key=key, **kwargs)
+        return response["Body"].read()
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(s3_threads, _read)
+    except Exception as e:
+        raise ServerError(str(e)) from e
+
+
 async def remove_from_s3(keys):
     for key in keys:
         try:
             result = await asyncio.to_thread(
                 lambda: s3.Bucket(config.s3.bucket).Object(key).delete()
             )
-            if (
+            if not (
                 result.get("DeleteMarker")
                 or result.get("ResponseMetadata", {}).get("HTTPStatusCode") == 204
             ):
-                return True
-            else:
                 raise ServerError(f"Failed to delete object: {result}")
         except Exception as e:
             print(str(e))
             raise ServerError(str(e)) from e
+    return True
 
 
 async def clear_test_bucket():
@@ -0,0 +1,259 @@
+import io
+import numpy as np
+from datetime import datetime
+from typing import BinaryIO
+from xml.etree.ElementTree import iterparse
+from app.errors import InvalidGPXError
+
+# Same constants gpxpy uses, so metrics stay comparable with its results
+EARTH_RADIUS = 6378.137 * 1000
+ONE_DEGREE = (2 * np.pi * EARTH_RADIUS) / 360
+HAVERSINE_THRESHOLD = 0.2  # degrees, gpxpy switches to haversine above this
+STOPPED_SPEED_THRESHOLD = 1  # km/h
+MIN_SEGMENT_POINTS = 10
+BYTES_PER_POINT = 120  # rough size of a <trkpt> with ele and time, for preallocation
+
+
+class TrackArrays:
+    def __init__(
+        self,
+        lon: np.ndarray,
+        lat: np.ndarray,
+        ele: np.ndarray,
+        time: np.ndarray,
+        segment_offsets: list[int],
+    ):
+        self.lon = lon
+        self.lat = lat
+        self.ele = ele  # metres, NaN where missing
+        self.time = time  # epoch seconds, NaN where missing
+        self.segment_offsets = segment_offsets  # start index of each segment
+
+    def __len__(self):
+        return len(self.lon)
+
+    def segments(self):
+        bounds = [*self.segment_offsets, len(self)]
+        for start, end in zip(bounds, bounds[1:]):
+            yield slice(start, end)
+
+    def coords(self) -> np.ndarray:
+        return np.column_stack((self.lon, self.lat))
+
+
+class TrackMetrics:
+    def __init__(
+        self,
+        distance: float,
+        moving_time: float,
+        ascent: float,
+        high_point: float,
+        elapsed_time: float = 0.0,
+    ):
+        self.distance = distance
+        self.moving_time = moving_time
+        self.ascent = ascent
+        self.high_point = high_point
+        self.elapsed_time = elapsed_time  # first to last timestamp, seconds
+
+
+def _local_name(tag: str) -> str:
+    return tag[tag.rfind("}") + 1 :]
+
+
+def _child_text(elem, name: str) -> str | None:
+    for child in elem:
+        if _local_name(child.tag) == name:
+            return child.text
+    return None
+
+
+def parse_gpx_stream(stream: BinaryIO, size_hint: int | None = None):
+    """Stream the single track of a GPX file into NumPy arrays.
+
+    Trackpoints are written into a preallocated buffer and dropped from the
+    element tree as soon as they are read, so memory grows with the number
+    of points rather than with the size of a full gpxpy object tree.
+    Returns the track arrays and the timestamp of the first point.
+    """
+    capacity = max(1024, (size_hint or 0) // BYTES_PER_POINT)
+    buffer = np.full((capacity, 4), np.nan)  # lon, lat, ele, time
+    size = 0
+
+    tracks = 0
+    segments = 0
+    segment_points = 0
+    segment_offsets = []
+    start_time = None
+    segment = None
+
+    for event, elem in iterparse(stream, events=("start", "end")):
+        tag = _local_name(elem.tag)
+
+        if event == "start":
+            if tag == "trk":
+                tracks += 1
+                segments = 0
+                if tracks > 1:
+                    raise InvalidGPXError("GPX file contains multiple tracks")
+            elif tag == "trkseg" and tracks:
+                segments += 1
+                segment_points = 0
+                segment_offsets.append(size)
+                segment = elem
+            continue
+
+        if tag == "trkpt" and segment is not None:
+            if size == capacity:
+                capacity *= 2
+                buffer = np.resize(buffer, (capacity, 4))
+
+            buffer[size, 0] = float(elem.attrib["lon"])
+            buffer[size, 1] = float(elem.attrib["lat"])
+            buffer[size, 2] = np.nan
+            buffer[size, 3] = np.nan
+
+            ele = _child_text(elem, "ele")
+            if ele:
+                buffer[size, 2] = float(ele)
+            time = _child_text(elem, "time")
+            if time:
+                timestamp = datetime.fromisoformat(time.strip())
+                buffer[size, 3] = timestamp.timestamp()
+                if size == 0:
+                    start_time = timestamp
+
+            size += 1
+            segment_points += 1
+            segment.clear()  # drop the parsed point from the tree
+        elif tag == "trkseg" and segment is not None:
+            if segment_points < MIN_SEGMENT_POINTS:
+                raise InvalidGPXError(
+                    f"Segment has insufficient points (found {segment_points}, minimum {MIN_SEGMENT_POINTS} required)"
+                )
+            segment = None
+        elif tag == "trk":
+            if not segments:
+                raise InvalidGPXError("Track contains no segments")
+            elem.clear()
+
+    if not tracks:
+        raise InvalidGPXError("GPX file contains no tracks")
+    if not start_time:
+        raise InvalidGPXError("GPX does not contain timestamps.")
+
+    buffer = buffer[:size]
+    track = TrackArrays(
+        lon=buffer[:, 0].copy(),
+        lat=buffer[:, 1].copy(),
+        ele=buffer[:, 2].copy(),
+        time=buffer[:, 3].copy(),
+        segment_offsets=segment_offsets,
+    )
+    return track, start_time
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    d_lon = np.radians(lon1 - lon2)
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    d_lat = lat1 - lat2
+
+    a = np.sin(d_lat / 2) ** 2 + np.sin(d_lon / 2) ** 2 * np.cos(lat1) * np.cos(lat2)
+    return EARTH_RADIUS * 2 * np.arcsin(np.sqrt(a))
+
+
+def step_distances(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """2D distance in metres between consecutive points.
+
+    Short steps use the flat-earth approximation gpxpy uses, long ones
+    fall back to haversine.
+    """
+    # gpxpy measures from each point back to the previous one
+    lat1, lat2 = lat[1:], lat[:-1]
+    lon1, lon2 = lon[1:], lon[:-1]
+
+    coef = np.cos(np.radians(lat1))
+    x = lat1 - lat2
+    y = (lon1 - lon2) * coef
+    flat = np.sqrt(x * x + y * y) * ONE_DEGREE
+
+    far = (np.abs(x) > HAVERSINE_THRESHOLD) | (
+        np.abs(lon1 - lon2) > HAVERSINE_THRESHOLD
+    )
+    if far.any():
+        flat[far] = haversine(lat1[far], lon1[far], lat2[far], lon2[far])
+    return flat
+
+
+def moving_time(distances: np.ndarray, ele: np.ndarray, time: np.ndarray) -> float:
+    seconds = np.diff(time)
+
+    # gpxpy uses the 3D distance when both elevations are set and non zero
+    d_ele = np.diff(ele)
+    has_ele = (ele[:-1] != 0) & (ele[1:] != 0) & ~np.isnan(d_ele)
+    distance = np.where(
+        has_ele, np.sqrt(distances**2 + np.nan_to_num(d_ele) ** 2), distances
+    )
+
+    valid = (seconds > 0) & (distance > 0)
+    speed_kmh = np.divide(
+        distance / 1000, seconds / 3600, out=np.zeros_like(distance), where=valid
+    )
+    moving = valid & (speed_kmh > STOPPED_SPEED_THRESHOLD)
+    return float(seconds[moving].sum())
+
+
+def uphill(ele: np.ndarray) -> float:
+    ele = ele[~np.isnan(ele)]
+    if len(ele) < 2:
+        return 0.0
+
+    smoothed = ele.copy()
+    smoothed[1:-1] = ele[:-2] * 0.3 + ele[1:-1] * 0.4 + ele[2:] * 0.3
+    climbs = np.diff(smoothed)
+    return float(climbs[climbs > 0].sum())
+
+
+def compute_metrics(track: TrackArrays) -> TrackMetrics:
+    distance = 0.0
+    moving = 0.0
+    ascent = 0.0
+
+    for segment in track.segments():
+        lat, lon = track.lat[segment], track.lon[segment]
+        ele, time = track.ele[segment], track.time[segment]
+
+        distances = step_distances(lat, lon)
+        distance += float(distances.sum())
+        moving += moving_time(distances, ele, time)
+        ascent += uphill(ele)
+
+    high_point = None
+    if not np.isnan(track.ele).all():
+        high_point = float(np.nanmax(track.ele))
+
+    elapsed = 0.0
+    if not np.isnan(track.time).all():
+        elapsed = float(np.nanmax(track.time) - np.nanmin(track.time))
+
+    return TrackMetrics(distance, moving, ascent, high_point, elapsed)
+
+
+def read_gpx(content: bytes | BinaryIO, size: int | None = None):
+    """Parse a GPX upload and return only plain arrays and metrics.
+
+    Runs in the CPU worker pool, so the result must stay cheap to pickle:
+    an (n, 2) lon/lat array, the start timestamp and the ride metrics.
+    """
+    try:
+        if isinstance(content, bytes):
+            size = len(content)
+            content = io.BytesIO(content)
+
+        track, start_time = parse_gpx_stream(content, size_hint=size)
+        return track.coords(), start_time, compute_metrics(track)
+    except InvalidGPXError as e:
+        raise InvalidGPXError(f"Error creating ride: {e}")
+    except Exception as e:
+        raise InvalidGPXError(f"Error creating ride: {e}") from e
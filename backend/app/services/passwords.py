@@ -0,0 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from fastapi.concurrency import run_in_threadpool
+from app import security
+from app.config import config
+from db.queries.users import update_user
+
+
+class PasswordPool:
+    """Bounded pool for bcrypt work, kept apart from the request threadpool.
+
+    bcrypt releases the GIL while hashing, so plain threads use every core
+    without pickling anything. A login burst queues here instead of
+    stalling the event loop or taking every worker thread from unrelated
+    sync handlers.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="bcrypt"
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def _timed(self, queued_at: float, fn, *args):
+        waited = time.perf_counter() - queued_at
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, fn, *args):
+        executor = self.executor()
+        with self._lock:
+            self.queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, self._timed, time.perf_counter(), fn, *args
+        )
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "wait_avg_ms": (self.wait_total / self.completed * 1000)
+                if self.completed
+                else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+
+
+# Shared for the app's lifetime, shut down in main.lifespan
+password_pool = PasswordPool(config.workers.password_workers)
+
+
+async def hash_password(password: str) -> bytes:
+    return await password_pool.run(security.hash_password, password)
+
+
+async def verify_password(password: str, hashed_pwd: bytes) -> bool:
+    return await password_pool.run(security.verify_password, password, hashed_pwd)
+
+
+async def rehash_password(user_id: str, password: str):
+    """Store the password again under the configured work factor."""
+    values = {"hashed_password": await hash_password(password)}
+    await run_in_threadpool(update_user, user_id, values)
@@ -0,0 +1,304 @@
+import io
+import os
+import math
+import asyncio
+import logging
+from datetime import datetime, timezone
+from PIL import Image, ExifTags, ImageOps, features
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from app.config import config
+from app.errors import InputError
+from app.services.file_services import (
+    read_from_s3,
+    put_to_s3,
+    remove_from_s3,
+    presigned_url,
+    process_s3_client,
+)
+from app.services.worker_pool import run_cpu_bound
+from db.queries.photos import update_photos
+
+logger = logging.getLogger(__name__)
+
+EXIF_DATE_FORMAT = "%Y:%m:%d %H:%M:%S"
+# JPEG keeps EXIF in its first segments, well before the pixel data
+HEADER_BYTES = 256 * 1024
+
+VARIANT_WIDTHS = (160, 320, 640, 1280, 1920)
+THUMBNAIL_WIDTH = 290  # trip cards
+AVATAR_WIDTH = 120
+# Most compact first: a <picture> uses the first source the browser decodes
+VARIANT_FORMATS = {
+    "image/avif": ("AVIF", "avif", {"quality": 60, "speed": 10}),
+    "image/webp": ("WEBP", "webp", {"quality": 75, "method": 4}),
+    "image/jpeg": ("JPEG", "jpg", {"quality": 80, "progressive": True}),
+}
+if not features.check("avif"):
+    del VARIANT_FORMATS["image/avif"]
+
+
+class PhotoMetadata:
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        taken_at: datetime | None = None,
+        lon: float | None = None,
+        lat: float | None = None,
+    ):
+        self.width = width
+        self.height = height
+        self.taken_at = taken_at
+        self.lon = lon
+        self.lat = lat
+
+    def location(self):
+        if self.lon is None or self.lat is None:
+            return None
+        return from_shape(Point(self.lon, self.lat), srid=4326)
+
+
+def _degrees(dms, ref: str) -> float:
+    degrees, minutes, seconds = (float(value) for value in dms)
+    value = degrees + minutes / 60 + seconds / 3600
+    return -value if ref in ("S", "W") else value
+
+
+def exif_timestamp(exif) -> datetime | None:
+    """DateTimeOriginal, falling back to the file's DateTime.
+
+    EXIF stores local camera time. OffsetTimeOriginal gives its UTC offset
+    when the camera wrote one, otherwise the time is read as UTC.
+    """
+    details = exif.get_ifd(ExifTags.IFD.Exif)
+    value = details.get(ExifTags.Base.DateTimeOriginal) or exif.get(
+        ExifTags.Base.DateTime
+    )
+    if not value:
+        return None
+    try:
+        taken_at = datetime.strptime(value.strip("\x00 "), EXIF_DATE_FORMAT)
+        offset = details.get(ExifTags.Base.OffsetTimeOriginal)
+        if offset:
+            return datetime.fromisoformat(f"{taken_at.isoformat()}{offset.strip()}")
+        return taken_at.replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def exif_position(exif) -> tuple[float, float] | None:
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    try:
+        lat = _degrees(
+            gps[ExifTags.GPS.GPSLatitude], gps.get(ExifTags.GPS.GPSLatitudeRef, "N")
+        )
+        lon = _degrees(
+            gps[ExifTags.GPS.GPSLongitude], gps.get(ExifTags.GPS.GPSLongitudeRef, "E")
+        )
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lon, lat
+
+
+def read_photo_metadata(content: bytes) -> PhotoMetadata:
+    """Size, capture time and GPS position of an uploaded photo."""
+    with Image.open(io.BytesIO(content)) as im:
+        width, height = im.size
+        exif = im.getexif()
+
+    position = exif_position(exif)
+    lon, lat = position if position else (None, None)
+    return PhotoMetadata(width, height, exif_timestamp(exif), lon, lat)
+
+
+async def read_upload_metadata(file: UploadFile) -> PhotoMetadata:
+    """Metadata of an upload, from its first bytes if it can, leaving it at the start.
+
+    Some formats keep their EXIF past the header (PNG reads the whole image
+    for it), so those are read again in full.
+    """
+    await file.seek(0)
+    try:
+        return read_photo_metadata(await file.read(HEADER_BYTES))
+    except Exception:
+        await file.seek(0)
+        content = await file.read()
+    finally:
+        await file.seek(0)
+    try:
+        return read_photo_metadata(content)
+    except Exception as e:
+        raise InputError(f"File : {file.filename} is not a readable image") from e
+
+
+async def load_photo_metadata(key: str) -> PhotoMetadata:
+    """Metadata of a stored photo, reading only its first bytes if it can."""
+    try:
+        return read_photo_metadata(await read_from_s3(key, HEADER_BYTES))
+    except Exception:
+        return read_photo_metadata(await read_from_s3(key))
+
+
+async def extract_photos_metadata(photos: dict[str, str]):
+    """Fill size, capture time and position of uploaded photos by id -> key.
+
+    Runs after direct uploads are registered, so the request that
+    registered them never touches the image bytes.
+    """
+    results = await asyncio.gather(
+        *(load_photo_metadata(key) for key in photos.values()),
+        return_exceptions=True,
+    )
+    values = []
+    for photo_id, metadata in zip(photos, results):
+        if isinstance(metadata, Exception):
+            logger.error(
+                "Could not read metadata of photo %s", photo_id, exc_info=metadata
+            )
+            continue
+        values.append(
+            {
+                "id": photo_id,
+                "h_dimm": metadata.height,
+                "w_dimm": metadata.width,
+                "taken_at": metadata.taken_at,
+                "location": metadata.location(),
+            }
+        )
+    if values:
+        await run_in_threadpool(update_photos, values)
+
+
+def variant_widths(width: int) -> list[int]:
+    """Variant widths below the photo's own, or just its own if it is smaller."""
+    return [w for w in VARIANT_WIDTHS if w < width] or [width]
+
+
+def render_variants(content: bytes) -> list[tuple[dict, bytes]]:
+    """Encode a photo in every variant width and format.
+
+    Runs in the CPU pool. For JPEGs, draft() has the decoder scale by a
+    power of two on the way in, so a 24 MP photo is never decoded at full
+    size just to be shrunk to 1920 px.
+    """
+    with Image.open(io.BytesIO(content)) as im:
+        orientation = im.getexif().get(ExifTags.Base.Orientation, 1)
+        upright_width = im.height if orientation in (5, 6, 7, 8) else im.width
+        widths = variant_widths(upright_width)
+        scale = max(widths) / upright_width
+        im.draft("RGB", (math.ceil(im.width * scale), math.ceil(im.height * scale)))
+        image = ImageOps.exif_transpose(im).convert("RGB")
+
+    variants = []
+    for width in sorted(widths, reverse=True):
+        height = max(1, round(image.height * width / image.width))
+        # Each width is scaled from the one before, which is cheaper and
+        # still at least 1.5x the size it is reduced to
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+        for content_type, (name, _, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            image.save(buffer, format=name, **options)
+            variant = {"width": width, "height": height, "content_type": content_type}
+            variants.append((variant, buffer.getvalue()))
+    return variants
+
+
+def render_stored_variants(key: str) -> list[tuple[dict, bytes]]:
+    """render_variants of a stored photo, fetched by the pool worker itself.
+
+    Only the key is sent to the worker, so the original never passes
+    through the API process; just the much smaller variants come back.
+    """
+    response = process_s3_client().get_object(Bucket=config.s3.bucket, Key=key)
+    with response["Body"] as body:
+        return render_variants(body.read())
+
+
+async def create_variants(key: str) -> list[dict]:
+    """Render and store the variants of a stored photo, next to its original."""
+    rendered = await run_cpu_bound(render_stored_variants, key)
+    base = os.path.splitext(key)[0]
+    variants = []
+    for variant, _ in rendered:
+        extension = VARIANT_FORMATS[variant["content_type"]][1]
+        variants.append({"key": f"{base}/{variant['width']}.{extension}", **variant})
+    await asyncio.gather(
+        *(
+            put_to_s3(variant["key"], body, variant["content_type"])
+            for variant, (_, body) in zip(variants, rendered)
+        )
+    )
+    return variants
+
+
+async def create_photos_variants(photos: dict[str, str]):
+    """Store the variants of uploaded photos by id -> key and record them.
+
+    Runs as a background task. Photos are read and rendered a few at a
+    time so a large batch never holds every original in memory at once;
+    until a photo's variants exist its original is served instead. The
+    variants of photos deleted while they rendered are removed again.
+    """
+    slots = asyncio.Semaphore(config.workers.cpu_workers)
+
+    async def create(key):
+        async with slots:
+            return await create_variants(key)
+
+    results = await asyncio.gather(
+        *(create(key) for key in photos.values()), return_exceptions=True
+    )
+    values = []
+    for photo_id, variants in zip(photos, results):
+        if isinstance(variants, Exception):
+            logger.error(
+                "Could not create variants of photo %s", photo_id, exc_info=variants
+            )
+            continue
+        values.append({"id": photo_id, "variants": variants})
+    if not values:
+        return
+
+    recorded = await run_in_threadpool(update_photos, values)
+    orphaned = [
+        variant["key"]
+        for value in values
+        if value["id"] not in recorded
+        for variant in value["variants"]
+    ]
+    if orphaned:
+        try:
+            await remove_from_s3(orphaned)
+        except Exception:
+            logger.exception("Could not remove the variants of deleted photos")
+
+
+def photo_srcset(variants: list[dict] | None) -> dict[str, str]:
+    """srcset attribute per content type, for the <source>s of a <picture>."""
+    srcset = {}
+    for variant in variants or []:
+        candidate = f"{presigned_url(variant['key'])} {variant['width']}w"
+        content_type = variant["content_type"]
+        srcset[content_type] = (
+            f"{srcset[content_type]}, {candidate}"
+            if content_type in srcset
+            else candidate
+        )
+    return srcset
+
+
+def sized_photo_url(key: str, variants: list[dict] | None, width: int) -> str:
+    """Url of the smallest JPEG variant at least width wide, else the original."""
+    fits = [
+        variant
+        for variant in variants or []
+        if variant["content_type"] == "image/jpeg" and variant["width"] >= width
+    ]
+    if fits:
+        key = min(fits, key=lambda variant: variant["width"])["key"]
+    return presigned_url(key)
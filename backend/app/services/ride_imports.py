@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from datetime import timedelta
+from fastapi.concurrency import run_in_threadpool
+from shapely.geometry import LineString
+from geoalchemy2.shape import from_shape
+from app.config import config
+from app.errors import InvalidGPXError, ServerError
+from app.services.file_services import process_s3_client, remove_from_s3
+from app.services.gpx_services import read_gpx, TrackMetrics
+from app.services.route_services import simplified_routes
+from app.services.trip_aggregates import appended_aggregates
+from app.services.worker_pool import run_cpu_bound, start_cpu_pool, shutdown_cpu_pool
+from db.schema import Ride
+from db.queries.import_jobs import (
+    claim_import_job,
+    touch_import_job,
+    complete_import_job,
+    fail_import_job,
+    retry_import_job,
+)
+
+logger = logging.getLogger(__name__)
+
+# A running job whose worker stopped sending heartbeats for this long is
+# assumed lost with its worker
+STALE_AFTER = timedelta(minutes=10)
+HEARTBEAT_INTERVAL = timedelta(minutes=1)
+MAX_ATTEMPTS = 3
+# Longest pause of the worker loop after the queue itself failed
+MAX_BACKOFF = timedelta(minutes=1)
+
+
+def build_ride(trip_id: str, coords, timestamp, metrics: TrackMetrics):
+    route = LineString(coords)
+    new_ride = Ride(
+        trip_id=trip_id,
+        notes=None,
+        date=timestamp,
+        distance=metrics.distance,
+        elevation_gain=metrics.ascent,
+        high_point=metrics.high_point,
+        moving_time=metrics.moving_time,
+        elapsed_time=metrics.elapsed_time,
+        route=from_shape(route, srid=4326),
+        title=None,
+        **simplified_routes(route),
+    )
+
+    return new_ride
+
+
+def read_stored_gpx(key: str):
+    """Parse a spooled upload, streamed from the bucket by the pool worker.
+
+    Only the key is sent to the worker and only the parsed arrays come
+    back, so the upload itself never passes through the event loop.
+    """
+    response = process_s3_client().get_object(Bucket=config.s3.bucket, Key=key)
+    with response["Body"] as body:
+        return read_gpx(body, response["ContentLength"])
+
+
+async def keep_alive(job_id: str, attempt: int):
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL.total_seconds())
+        try:
+            if not await run_in_threadpool(touch_import_job, job_id, attempt):
+                return
+        except Exception:
+            # Try again next beat: the job only goes stale after several
+            logger.exception("Heartbeat of import job %s failed", job_id)
+
+
+async def remove_uploads(job):
+    try:
+        await remove_from_s3([file.s3_key for file in job.files])
+    except ServerError:
+        logger.exception("Could not remove the uploads of import job %s", job.id)
+
+
+async def process_next_job():
+    # The queue queries block, keep them off the event loop
+    job = await run_in_threadpool(claim_import_job, STALE_AFTER, MAX_ATTEMPTS)
+    if not job:
+        return False
+
+    heartbeat = asyncio.create_task(keep_alive(job.id, job.attempts))
+    try:
+        parsed = await asyncio.gather(
+            *(run_cpu_bound(read_stored_gpx, file.s3_key) for file in job.files)
+        )
+        rides = [build_ride(job.trip_id, *ride) for ride in parsed]
+        done = await run_in_threadpool(
+            complete_import_job, job.id, job.attempts, rides, appended_aggregates
+        )
+    except (InvalidGPXError, ValueError) as e:
+        done = await run_in_threadpool(fail_import_job, job.id, job.attempts, str(e))
+    except Exception:
+        if job.attempts < MAX_ATTEMPTS:
+            # Likely transient (S3, database): the uploads stay for a retry
+            logger.exception("Import job %s failed, queued again", job.id)
+            if not await run_in_threadpool(retry_import_job, job.id, job.attempts):
+                logger.warning("Import job %s was reclaimed by another worker", job.id)
+            return True
+        logger.exception("Import job %s failed", job.id)
+        done = await run_in_threadpool(
+            fail_import_job,
+            job.id,
+            job.attempts,
+            "Internal error while importing rides",
+        )
+    finally:
+        heartbeat.cancel()
+
+    if done:
+        await remove_uploads(job)
+    else:
+        logger.warning("Import job %s was reclaimed by another worker", job.id)
+    return True
+
+
+async def drain_import_jobs():
+    try:
+        while await process_next_job():
+            pass
+    except Exception:
+        # Left in the queue for the next drain or a dedicated worker
+        logger.exception("Draining import jobs failed")
+
+
+async def run_worker():
+    start_cpu_pool()
+    backoff = config.workers.poll_interval
+    try:
+        while True:
+            try:
+                found = await process_next_job()
+            except Exception:
+                logger.exception("Import worker failed, retrying in %ss", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF.total_seconds())
+                continue
+            backoff = config.workers.poll_interval
+            if not found:
+                await asyncio.sleep(config.workers.poll_interval)
+    finally:
+        shutdown_cpu_pool()
+
+
+if __name__ == "__main__":
+    # Standalone worker: python -m app.services.ride_imports
+    asyncio.run(run_worker())
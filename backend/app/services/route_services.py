@@ -0,0 +1,100 @@
+import struct
+import numpy as np
+from typing import Literal
+from shapely import simplify
+from shapely.geometry import LineString
+from geoalchemy2.shape import from_shape
+
+RouteDetail = Literal["low", "medium", "high", "full"]
+RouteFormat = Literal["geojson", "polyline", "binary"]
+
+POLYLINE_MEDIA_TYPE = "application/vnd.trailstory.polyline+json"
+BINARY_MEDIA_TYPE = "application/vnd.trailstory.route"
+
+# Douglas-Peucker tolerance in degrees for each stored level of detail
+ROUTE_TOLERANCES = {
+    "low": 1e-3,  # ~100 m, whole-trip overview
+    "medium": 1e-4,  # ~10 m, regional maps
+    "high": 1e-5,  # ~1 m, street level
+}
+
+
+def route_column(detail: RouteDetail) -> str:
+    return "route" if detail == "full" else f"route_{detail}"
+
+
+def detail_for_zoom(zoom: int) -> RouteDetail:
+    if zoom <= 9:
+        return "low"
+    if zoom <= 13:
+        return "medium"
+    if zoom <= 16:
+        return "high"
+    return "full"
+
+
+def resolve_detail(detail: RouteDetail | None, zoom: int | None) -> RouteDetail:
+    if detail:
+        return detail
+    if zoom is not None:
+        return detail_for_zoom(zoom)
+    return "full"
+
+
+def simplified_routes(route: LineString) -> dict:
+    """Simplified copies of a route, keyed by their column name."""
+    return {
+        route_column(detail): from_shape(
+            simplify(route, tolerance, preserve_topology=False), srid=4326
+        )
+        for detail, tolerance in ROUTE_TOLERANCES.items()
+    }
+
+
+def negotiate_route_format(accept: str | None) -> RouteFormat:
+    accept = accept or ""
+    if BINARY_MEDIA_TYPE in accept:
+        return "binary"
+    if POLYLINE_MEDIA_TYPE in accept:
+        return "polyline"
+    return "geojson"
+
+
+def quantize(coords: np.ndarray, precision: int) -> np.ndarray:
+    return np.round(coords * 10**precision).astype(np.int64)
+
+
+def encode_polyline(coords: np.ndarray, precision: int = 5) -> str:
+    """Google encoded polyline for an (n, 2) lon/lat array."""
+    points = quantize(coords[:, ::-1], precision)  # polylines are lat, lon
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), np.int64)).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1).astype(np.uint64)
+
+    # Split each value into 5 bit chunks, low chunk first, every chunk but
+    # the last flagged with 0x20
+    shifts = np.arange(7, dtype=np.uint64) * np.uint64(5)
+    chunks = (values[:, None] >> shifts) & np.uint64(0x1F)
+    limits = np.uint64(32) ** np.arange(1, 7, dtype=np.uint64)
+    counts = 1 + (values[:, None] >= limits).sum(axis=1)
+    position = np.arange(7)
+    chunks[position < counts[:, None] - 1] |= np.uint64(0x20)
+    chars = chunks[position < counts[:, None]] + np.uint64(63)
+    return chars.astype(np.uint8).tobytes().decode("ascii")
+
+
+def encode_routes_binary(routes: list[tuple[str, np.ndarray]], precision: int) -> bytes:
+    """Pack lon/lat routes as delta encoded little endian int32 pairs.
+
+    Layout: uint8 precision, uint32 route count, then for each route a
+    uint8 id length, the ASCII id, a uint32 point count and the points,
+    the first one absolute and every following one relative to the last.
+    """
+    parts = [struct.pack("<BI", precision, len(routes))]
+    for route_id, coords in routes:
+        points = quantize(coords, precision)
+        deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), np.int64))
+        key = route_id.encode("ascii")
+        parts.append(struct.pack("<B", len(key)) + key)
+        parts.append(struct.pack("<I", len(points)))
+        parts.append(deltas.astype("<i4").tobytes())
+    return b"".join(parts)
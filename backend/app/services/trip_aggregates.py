@@ -0,0 +1,52 @@
+from shapely import bounds, get_coordinates
+from shapely.geometry import LineString, Polygon
+from geoalchemy2.shape import from_shape, to_shape
+import numpy as np
+from app.services.route_services import simplified_routes
+from db.schema import Ride, Trip
+
+
+def generate_bounding_box(route):
+    coords = bounds(route).tolist()
+
+    box = Polygon(
+        [
+            (coords[0], coords[1]),  #   (min_x, min_y)
+            (coords[2], coords[1]),  #    (max_x, min_y)
+            (coords[2], coords[3]),  #   (max_x, max_y)
+            (coords[0], coords[3]),  #   (min_x, max_y)
+            (coords[0], coords[1]),
+        ]
+    )  #  (min_x, min_y)
+
+    return from_shape(box, srid=4326)
+
+
+def append_rides(trip: Trip, rides: list[Ride]):
+    route = np.concatenate(
+        [get_coordinates(to_shape(trip.route))]
+        + [get_coordinates(to_shape(ride.route)) for ride in rides]
+    )
+    route = LineString(route)
+
+    return {
+        "route": from_shape(route, srid=4326),
+        "bounding_box": generate_bounding_box(route),
+        "total_distance": trip.total_distance + sum(r.distance for r in rides),
+        "total_elevation": trip.total_elevation + sum(r.elevation_gain for r in rides),
+        "high_point": max(trip.high_point, *(r.high_point for r in rides)),
+        **simplified_routes(route),
+    }
+
+
+def appended_aggregates(trip: Trip, rides: list[Ride], last_date):
+    """Trip aggregates after new rides, or None if PostGIS must rebuild them.
+
+    Rides that come after every existing ride (last_date) are appended to
+    the stored route and totals. Anything else (first import, or a day
+    inserted in the middle of the trip) is rebuilt from the rides.
+    """
+    rides = sorted(rides, key=lambda ride: ride.date)
+    if trip.route is None or not last_date or rides[0].date <= last_date:
+        return None
+    return append_rides(trip, rides)
@@ -0,0 +1,45 @@
+import base64
+from datetime import date
+from fastapi import Response
+from app.errors import InputError
+from app.models import TripsResponse
+from app.services.photo_services import THUMBNAIL_WIDTH, sized_photo_url
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(start_date: date, trip_id: str) -> str:
+    raw = f"{start_date.isoformat()}|{trip_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str | None):
+    if not cursor:
+        return None
+    try:
+        start_date, trip_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return date.fromisoformat(start_date), trip_id
+    except Exception:
+        raise InputError("Invalid cursor")
+
+
+def thumbnail_url(key: str | None, variants: list[dict] | None) -> str | None:
+    if not key:
+        return None
+    return sized_photo_url(key, variants, THUMBNAIL_WIDTH)
+
+
+def trips_page(rows, limit: int, response: Response) -> list[TripsResponse]:
+    """Turn limit + 1 summary rows into a page and set the next cursor header."""
+    trips = [
+        TripsResponse(
+            **trip._mapping,
+            thumbnail_id=thumbnail_url(trip.thumbnail_key, trip.thumbnail_variants),
+        )
+        for trip in rows[:limit]
+    ]
+
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.start_date, last.id)
+    return trips
@@ -0,0 +1,98 @@
+from sqlalchemy import select, func
+from app.config import config
+from app.services.cache import TTLCache
+from db.schema import async_engine
+from db.session import db_session
+
+INVALIDATION_CHANNEL = "user_cache"
+
+
+class LocalInvalidation:
+    """Single node: dropping the local entry is all there is to do."""
+
+    def publish(self, user_id: str):
+        pass
+
+    async def start(self, on_invalidate):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class PostgresInvalidation:
+    """Share invalidations between nodes with LISTEN/NOTIFY.
+
+    Every node keeps one connection listening on the channel and drops the
+    users other nodes changed. The TTL still bounds staleness if a node
+    misses a notification while reconnecting.
+    """
+
+    def __init__(self, channel: str = INVALIDATION_CHANNEL):
+        self.channel = channel
+        self._connection = None
+
+    def publish(self, user_id: str):
+        with db_session() as session:
+            session.execute(select(func.pg_notify(self.channel, user_id)))
+            session.commit()
+
+    async def start(self, on_invalidate):
+        self._connection = await async_engine.connect()
+        raw = await self._connection.get_raw_connection()
+        await raw.driver_connection.add_listener(
+            self.channel,
+            lambda connection, pid, channel, user_id: on_invalidate(user_id),
+        )
+
+    async def stop(self):
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+BACKENDS = {"local": LocalInvalidation, "postgres": PostgresInvalidation}
+
+
+class UserCache:
+    """Users loaded by get_auth_user, so a valid token costs no query.
+
+    generation moves on every invalidation: a user read from the database
+    before an invalidation is not cached, since it may predate the change.
+    """
+
+    def __init__(self, cache: TTLCache, backend):
+        self.cache = cache
+        self.backend = backend
+        self.generation = 0
+
+    def get(self, user_id: str):
+        return self.cache.get(user_id)
+
+    def set(self, user_id: str, user, generation: int):
+        if generation == self.generation:
+            self.cache.set(user_id, user)
+
+    def drop(self, user_id: str):
+        self.generation += 1
+        self.cache.pop(user_id)
+
+    def invalidate(self, user_id: str):
+        self.drop(user_id)
+        self.backend.publish(user_id)
+
+    def clear(self):
+        self.generation += 1
+        self.cache.clear()
+
+    async def start(self):
+        await self.backend.start(self.drop)
+
+    async def stop(self):
+        await self.backend.stop()
+
+
+user_cache = UserCache(
+    TTLCache(config.cache.user_size, config.cache.user_ttl),
+    BACKENDS[config.cache.user_backend](),
+)
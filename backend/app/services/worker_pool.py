@@ -0,0 +1,30 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from app.config import config
+
+# Shared for the app's lifetime, started and stopped in main.lifespan
+cpu_pool: ProcessPoolExecutor | None = None
+
+
+def start_cpu_pool():
+    global cpu_pool
+    if cpu_pool is None:
+        cpu_pool = ProcessPoolExecutor(max_workers=config.workers.cpu_workers)
+    return cpu_pool
+
+
+def shutdown_cpu_pool():
+    global cpu_pool
+    if cpu_pool is not None:
+        cpu_pool.shutdown(wait=True, cancel_futures=True)
+        cpu_pool = None
+
+
+async def run_cpu_bound(fn, *args):
+    """Run CPU heavy work off the event loop.
+
+    Uses the process pool when the app has started one, otherwise falls
+    back to the default thread pool (e.g. under TestClient without lifespan).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_pool, fn, *args)
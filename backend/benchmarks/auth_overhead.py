@@ -0,0 +1,56 @@
+"""Per-request cost of get_auth_user with and without the user cache.
+
+Needs the database from DB_URL. Creates a throwaway user, resolves its
+bearer token repeatedly and removes the user again. Run from the backend
+directory:
+
+    python -m benchmarks.auth_overhead [requests]
+"""
+
+import asyncio
+import sys
+import time
+import numpy as np
+from app.dependencies import get_auth_user
+from app.security import make_JWT
+from app.services.user_cache import user_cache
+from db.schema import User, async_engine
+from db.queries.users import create_user, delete_user
+
+
+async def measure(authorization: str, requests: int, cached: bool):
+    timings = []
+    for _ in range(requests):
+        if not cached:
+            user_cache.clear()
+        start = time.perf_counter()
+        await get_auth_user(authorization)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1e6
+
+
+async def main(requests: int):
+    user = create_user(
+        User(
+            email="benchmark@trailstory.com",
+            username="benchmark",
+            hashed_password=b"-",
+        )
+    )
+    try:
+        authorization = f"Bearer {make_JWT(user.id)}"
+        await get_auth_user(authorization)  # warm up the pool
+
+        for name, cached in (("database", False), ("cached", True)):
+            timings = await measure(authorization, requests, cached)
+            print(
+                f"{name:<9} p50 {np.percentile(timings, 50):>8.1f} us"
+                f"   p95 {np.percentile(timings, 95):>8.1f} us"
+            )
+    finally:
+        delete_user(user.id)
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,63 @@
+"""Peak memory and wall time of GPX ingestion.
+
+Compares the old gpxpy object tree path with the streaming parser on the
+bundled samples. Run from the backend directory:
+
+    python -m benchmarks.gpx_parsing [path.gpx ...]
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+import gpxpy
+from app.services.gpx_services import parse_gpx_stream, compute_metrics
+
+samples_dir = Path(__file__).parent.parent.joinpath("samples")
+default_samples = [
+    samples_dir.joinpath("izu_day_1.gpx"),
+    samples_dir.joinpath("izu-day-2.gpx"),
+]
+
+
+def gpxpy_path(path: Path):
+    with open(path, "rb") as f:
+        content = f.read()
+    gpx = gpxpy.parse(content)
+    gpx.get_moving_data()
+    gpx.length_2d()
+    gpx.get_uphill_downhill()
+    gpx.get_elevation_extremes()
+
+
+def streaming_path(path: Path):
+    with open(path, "rb") as f:
+        track, _ = parse_gpx_stream(f, size_hint=path.stat().st_size)
+    compute_metrics(track)
+
+
+def measure(fn, path: Path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(paths: list[Path]):
+    print(f"{'file':<20}{'path':<12}{'time (ms)':>12}{'peak (MB)':>12}")
+    for path in paths:
+        size_mb = path.stat().st_size / (1 << 20)
+        for name, fn in [("gpxpy", gpxpy_path), ("streaming", streaming_path)]:
+            elapsed, peak = measure(fn, path)
+            print(
+                f"{path.name:<20}{name:<12}{elapsed * 1000:>12.1f}{peak / (1 << 20):>12.2f}"
+            )
+        print(f"{'':<20}{'file size':<12}{'':>12}{size_mb:>12.2f}")
+
+
+if __name__ == "__main__":
+    paths = [Path(p) for p in sys.argv[1:]] or default_samples
+    main(paths)
@@ -0,0 +1,56 @@
+"""Throughput of a read endpoint as client concurrency grows.
+
+Start the API first (uvicorn app.main:app --workers 1), then run from the
+backend directory:
+
+    python -m benchmarks.load_test <path> [requests] [base_url]
+
+e.g. python -m benchmarks.load_test /trips/<trip_id>/?detail=low
+With blocking queries the req/s column flattens after one connection;
+with the async engine it keeps climbing until the pool or CPU saturates.
+"""
+
+import asyncio
+import sys
+import time
+import httpx
+import numpy as np
+
+CONCURRENCY = [1, 4, 16, 64]
+
+
+async def run(client: httpx.AsyncClient, path: str, requests: int, concurrency: int):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, np.percentile(latencies, [50, 95]) * 1000
+
+
+async def main(path: str, requests: int, base_url: str):
+    limits = httpx.Limits(max_connections=max(CONCURRENCY))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        await run(client, path, 10, 1)  # warm up
+        print(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for concurrency in CONCURRENCY:
+            rate, (p50, p95) = await run(client, path, requests, concurrency)
+            print(f"{concurrency:>11} {rate:>9.1f} {p50:>8.1f} {p95:>8.1f}")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1]
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    base_url = sys.argv[3] if len(sys.argv) > 3 else "http://localhost:8000"
+    asyncio.run(main(path, requests, base_url))
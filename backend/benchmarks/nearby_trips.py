@@ -0,0 +1,81 @@
+"""Nearby trips search over a synthetic dataset of published routes.
+
+Needs the database from DB_URL. Seeds users and trips with 50 point
+routes scattered over Europe inside a transaction, times nearby searches
+around random points and rolls everything back. Run from the backend
+directory:
+
+    python -m benchmarks.nearby_trips [trips] [searches]
+"""
+
+import sys
+import time
+import numpy as np
+from sqlalchemy import text
+from db.schema import engine
+from db.queries.trips import nearby_trips_query
+
+SEED = """
+INSERT INTO users (id, email, username, hashed_password, email_verified,
+                   created_at, updated_at)
+SELECT 'u' || n, 'u' || n || '@bench', 'u' || n, '-', false, now(), now()
+FROM generate_series(1, :users) n;
+
+INSERT INTO trips (id, user_id, title, description, slug, start_date,
+                   is_published, route, created_at, updated_at)
+SELECT 't' || n, 'u' || (n % :users + 1), 'Trip', '', 'trip',
+       date '2000-01-01' + (n / :users), true,
+       (SELECT ST_SetSRID(ST_MakeLine(
+                  ST_MakePoint(x + i * 0.01, y + sin(i) * 0.01) ORDER BY i), 4326)
+        FROM generate_series(0, 49) i),
+       now(), now()
+FROM (SELECT n, random() * 40 - 10 x, random() * 25 + 35 y
+      FROM generate_series(1, :trips) n) s;
+
+ANALYZE users, trips;
+"""
+
+
+def main(trips: int, searches: int, radius_km: float = 25):
+    users = max(trips // 20, 1)
+    rng = np.random.default_rng(42)
+    points = np.column_stack(
+        (rng.uniform(35, 60, searches), rng.uniform(-10, 30, searches))
+    )
+
+    with engine.connect() as conn:
+        with conn.begin() as transaction:
+            for statement in SEED.split(";"):
+                if statement.strip():
+                    conn.execute(text(statement), {"users": users, "trips": trips})
+
+            compiled = nearby_trips_query(*points[0], radius_km, 50).compile(
+                dialect=engine.dialect
+            )
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN ANALYZE {compiled}", compiled.params
+            ).scalars()
+            print("\n".join(plan), end="\n\n")
+
+            timings = []
+            found = 0
+            for lat, lon in points:
+                query = nearby_trips_query(float(lat), float(lon), radius_km, 50)
+                start = time.perf_counter()
+                found += len(conn.execute(query).all())
+                timings.append(time.perf_counter() - start)
+
+            timings = np.array(timings) * 1000
+            print(f"{trips} trips, {searches} searches within {radius_km} km")
+            print(f"p50 {np.percentile(timings, 50):>7.2f} ms")
+            print(f"p95 {np.percentile(timings, 95):>7.2f} ms")
+            print(f"avg trips found {found / searches:.1f}")
+
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    trips = args[0] if args else 100000
+    searches = args[1] if len(args) > 1 else 500
+    main(trips, searches)
@@ -0,0 +1,102 @@
+"""EXPLAIN ANALYZE the hot lookups against a seeded database.
+
+Needs the database from DB_URL with the latest migrations. Seeds a
+synthetic dataset inside a transaction, prints each plan and the index it
+used, then rolls everything back. Run from the backend directory:
+
+    python -m benchmarks.query_plans [trips]
+"""
+
+import re
+import sys
+from datetime import date
+from sqlalchemy import select, update, text, func
+from db.schema import Ride, Photo, refresh_tokens, engine
+from db.queries.trips import (
+    user_trips_query,
+    published_trips_query,
+    bbox_trips_query,
+)
+
+SEED = """
+INSERT INTO users (id, email, username, hashed_password, email_verified,
+                   created_at, updated_at)
+SELECT 'u' || n, 'u' || n || '@bench', 'u' || n, '-', false, now(), now()
+FROM generate_series(1, :users) n;
+
+INSERT INTO trips (id, user_id, title, slug, start_date, is_published,
+                   route, bounding_box, created_at, updated_at)
+SELECT 't' || n, 'u' || (n % :users + 1), 'Trip', 'trip',
+       date '2000-01-01' + (n / :users), n % 3 = 0,
+       ST_SetSRID(ST_MakeLine(ST_MakePoint(x, y), ST_MakePoint(x + 0.5, y + 0.5)), 4326),
+       ST_MakeEnvelope(x, y, x + 0.5, y + 0.5, 4326), now(), now()
+FROM (SELECT n, random() * 340 - 170 x, random() * 160 - 80 y
+      FROM generate_series(1, :trips) n) s;
+
+INSERT INTO rides (id, trip_id, date, distance, elevation_gain, high_point,
+                   moving_time, route, created_at, updated_at)
+SELECT 'r' || t.n || '-' || d, 't' || t.n, timestamp '2000-01-01' + d * interval '1 day',
+       0, 0, 0, 0,
+       ST_SetSRID(ST_MakeLine(ST_MakePoint(t.x, t.y), ST_MakePoint(t.x + 0.1, t.y + 0.1)), 4326),
+       now(), now()
+FROM (SELECT n, random() * 340 - 170 x, random() * 160 - 80 y
+      FROM generate_series(1, :trips) n) t, generate_series(1, 5) d;
+
+INSERT INTO photos (id, trip_id, user_id, mime_type, file_size, created_at, updated_at)
+SELECT 'p' || n, 't' || (n % :trips + 1), 'u' || (n % :users + 1), 'image/jpeg', 0, now(), now()
+FROM generate_series(1, :trips * 2) n;
+
+INSERT INTO refresh_tokens (id, token, user_id, created_at, expires_at, revoked)
+SELECT 'rt' || n, 'rt' || n, 'u' || (n % :users + 1), now(), now(), false
+FROM generate_series(1, :trips) n;
+
+ANALYZE users, trips, rides, photos, refresh_tokens;
+"""
+
+
+def queries():
+    trip_id, user_id = "t42", "u7"
+    view = func.ST_MakeEnvelope(0, 0, 10, 10, 4326)
+    return {
+        "get_trip_rides_asc": select(Ride.id)
+        .where(Ride.trip_id == trip_id)
+        .order_by(Ride.date),
+        "get_trip_photos": select(Photo).where(Photo.trip_id == trip_id),
+        "user avatar photos": select(Photo).where(Photo.user_id == user_id),
+        "get_user_trips": user_trips_query(user_id, None, 50),
+        "get_published_trips (page 50)": published_trips_query(
+            (date(2000, 1, 5), "t1"), 20
+        ),
+        "revoke_tokens_for_user": update(refresh_tokens)
+        .where(refresh_tokens.user_id == user_id)
+        .values(revoked=True),
+        "rides in viewport": select(Ride.id).where(Ride.route.intersects(view)),
+        "get_trips_in_bbox": bbox_trips_query((0, 0, 10, 10), None, 50),
+    }
+
+
+def main(trips: int):
+    users = max(trips // 20, 1)
+    with engine.connect() as conn:
+        with conn.begin() as transaction:
+            for statement in SEED.split(";"):
+                if statement.strip():
+                    conn.execute(text(statement), {"users": users, "trips": trips})
+
+            for name, query in queries().items():
+                compiled = query.compile(dialect=engine.dialect)
+                plan = conn.exec_driver_sql(
+                    f"EXPLAIN ANALYZE {compiled}", compiled.params
+                ).scalars()
+                plan = "\n".join(plan)
+                indexes = sorted(
+                    set(re.findall(r"(?:using|on) (\w*(?:ix|idx|key)\w*)", plan))
+                )
+                print(f"== {name}: {', '.join(indexes) or 'NO INDEX'}")
+                print(plan, end="\n\n")
+
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
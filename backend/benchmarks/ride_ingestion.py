@@ -0,0 +1,38 @@
+"""Wall time of a 15-file ride upload, sequential vs the CPU worker pool.
+
+Run from the backend directory:
+
+    python -m benchmarks.ride_ingestion [workers]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from app.services.gpx_services import read_gpx
+
+samples_dir = Path(__file__).parent.parent.joinpath("samples")
+files = [samples_dir.joinpath("izu_day_1.gpx"), samples_dir.joinpath("izu-day-2.gpx")]
+uploads = [files[i % 2].read_bytes() for i in range(15)]
+
+
+def main(workers: int):
+    start = time.perf_counter()
+    for content in uploads:
+        read_gpx(content)
+    sequential = time.perf_counter() - start
+    print(f"sequential          {sequential * 1000:>8.1f} ms")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(read_gpx, uploads[:workers]))  # warm up the workers
+        start = time.perf_counter()
+        list(pool.map(read_gpx, uploads))
+        pooled = time.perf_counter() - start
+    print(f"pool ({workers} workers)    {pooled * 1000:>8.1f} ms")
+    print(f"speedup             {sequential / pooled:>8.2f}x")
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    main(workers)
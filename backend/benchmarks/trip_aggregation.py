@@ -0,0 +1,110 @@
+"""Trip aggregation: Python/shapely path vs a single PostGIS statement.
+
+Needs the database from DB_URL. Creates a throwaway user and trip with
+dense synthetic rides, times both paths and removes the data again.
+Run from the backend directory:
+
+    python -m benchmarks.trip_aggregation [rides] [points_per_ride]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from shapely import bounds
+from shapely.geometry import LineString, Polygon
+from geoalchemy2.shape import from_shape, to_shape
+from db.schema import User, Trip, Ride
+from db.queries.users import create_user, delete_user
+from db.queries.trips import create_trip, rebuild_trip_aggregates
+from db.queries.rides import create_rides, get_trip_rides_asc
+
+
+def python_aggregation(trip_id: str):
+    # The path handler_save_trip used before aggregation moved into PostGIS
+    rides = get_trip_rides_asc(trip_id)
+    agg_route = []
+    distance = 0.0
+    elevation = 0.0
+    high_point = float("-inf")
+    transferred = 0
+
+    for ride in rides:
+        transferred += len(bytes(ride.route.data))
+        agg_route.extend(list(to_shape(ride.route).coords))
+        distance += ride.distance
+        elevation += ride.elevation_gain
+        high_point = max(high_point, ride.high_point)
+    route = LineString(agg_route)
+    minx, miny, maxx, maxy = bounds(route).tolist()
+    box = Polygon([(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy)])
+    values = {
+        "route": from_shape(route, srid=4326),
+        "bounding_box": from_shape(box, srid=4326),
+        "total_distance": distance,
+        "total_elevation": elevation,
+        "high_point": high_point,
+    }
+    return values, transferred
+
+
+def synthetic_rides(trip_id: str, rides: int, points: int):
+    rng = np.random.default_rng(42)
+    start = np.array([138.9, 35.1])
+    day = datetime(2025, 10, 1, 6, tzinfo=timezone.utc)
+
+    for i in range(rides):
+        steps = rng.normal(0, 1e-4, size=(points, 2)) + 5e-5
+        coords = start + np.cumsum(steps, axis=0)
+        start = coords[-1]
+        yield Ride(
+            trip_id=trip_id,
+            date=day + timedelta(days=i),
+            distance=1000.0 * i,
+            elevation_gain=10.0 * i,
+            high_point=float(i),
+            moving_time=3600.0,
+            route=from_shape(LineString(coords), srid=4326),
+        )
+
+
+def main(rides: int, points: int):
+    user = create_user(
+        User(
+            email="benchmark@trailstory.com",
+            username="benchmark",
+            hashed_password=b"-",
+        )
+    )
+    try:
+        trip = create_trip(
+            Trip(
+                user_id=user.id,
+                title="Benchmark",
+                start_date=datetime(2025, 10, 1).date(),
+                slug="benchmark",
+            )
+        )
+        create_rides(list(synthetic_rides(trip.id, rides, points)))
+
+        start = time.perf_counter()
+        _, transferred = python_aggregation(trip.id)
+        python_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rebuild_trip_aggregates(trip.id)
+        sql_time = time.perf_counter() - start
+
+        print(f"{rides} rides x {points} points")
+        print(f"python + shapely  {python_time * 1000:>9.1f} ms")
+        print(f"postgis           {sql_time * 1000:>9.1f} ms")
+        print(f"route WKB pulled into Python: {transferred / (1 << 20):.1f} MB")
+    finally:
+        delete_user(user.id)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    rides = args[0] if args else 15
+    points = args[1] if len(args) > 1 else 20000
+    main(rides, points)
@@ -0,0 +1,6 @@
+"""Async mirrors of db.queries for the async routers.
+
+Same names and behaviour as their blocking counterparts, running on the
+asyncpg engine so a database round trip doesn't stall the event loop.
+Inside a request they share its connection (see db.session).
+"""
@@ -0,0 +1,11 @@
+from db.schema import ImportJob
+from db.session import async_db_session
+from app.errors import NotFoundError
+
+
+async def get_import_job(job_id: str):
+    async with async_db_session() as session:
+        job = await session.get(ImportJob, job_id)
+        if not job:
+            raise NotFoundError(f"Import job with ID: {job_id}, not found.")
+        return job
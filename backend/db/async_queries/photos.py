@@ -0,0 +1,33 @@
+from sqlalchemy import select
+from db.schema import Photo
+from db.session import async_db_session
+from db.queries.photos import photos_along_route_query
+from app.errors import DatabaseError
+
+
+async def get_photo(id: str):
+    try:
+        async with async_db_session() as session:
+            return await session.get(Photo, id)
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+async def get_trip_photos(trip_id: str):
+    try:
+        async with async_db_session() as session:
+            query = select(Photo).where(Photo.trip_id == trip_id)
+            photos = (await session.scalars(query)).all()
+            return photos
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+async def get_photos_along_route(trip_id: str):
+    try:
+        async with async_db_session() as session:
+            query = photos_along_route_query(trip_id)
+            photos = (await session.execute(query)).all()
+            return photos
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
@@ -0,0 +1,31 @@
+from sqlalchemy import exc as db_err
+from sqlalchemy import select
+from db.schema import Ride
+from db.session import async_db_session
+from db.queries import route_options
+from app.errors import DatabaseError, NotFoundError
+
+
+async def get_trip_rides_asc(trip_ip: str, detail: str = "full"):
+    try:
+        async with async_db_session() as session:
+            query = (
+                select(Ride)
+                .where(Ride.trip_id == trip_ip)
+                .order_by(Ride.date)
+                .options(*route_options(Ride, detail))
+            )
+            rides = (await session.scalars(query)).all()
+            return rides
+    except db_err.NoResultFound as e:
+        raise NotFoundError("No rides found for trip") from e
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+async def get_ride(ride_id: str):
+    async with async_db_session() as session:
+        ride = await session.get(Ride, ride_id)
+        if not ride:
+            raise NotFoundError(f"Trip with ID: {ride_id}, not found.")
+        return ride
@@ -0,0 +1,27 @@
+from db.session import async_db_session
+from db.queries.tiles import tiles_version_query, route_tile_query, join_layers
+from app.errors import DatabaseError
+
+
+async def get_tiles_version(trip_id: str | None = None, user_id: str | None = None):
+    try:
+        async with async_db_session() as session:
+            return await session.scalar(tiles_version_query(trip_id, user_id))
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+async def get_route_tile(
+    z: int,
+    x: int,
+    y: int,
+    column: str = "route",
+    trip_id: str | None = None,
+    user_id: str | None = None,
+) -> bytes:
+    try:
+        async with async_db_session() as session:
+            query = route_tile_query(z, x, y, column, trip_id, user_id)
+            return join_layers((await session.execute(query)).one())
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
@@ -0,0 +1,58 @@
+from db.schema import Trip
+from db.session import async_db_session
+from db.queries import route_options
+from db.queries.trips import (
+    user_trips_query,
+    published_trips_query,
+    bbox_trips_query,
+    nearby_trips_query,
+)
+from app.errors import DatabaseError, NotFoundError
+
+
+async def get_user_trips(user_id, after: tuple | None = None, limit: int = 50):
+    try:
+        async with async_db_session() as session:
+            query = user_trips_query(user_id, after, limit)
+            trips = (await session.execute(query)).all()
+            return trips
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+async def get_published_trips(after: tuple | None = None, limit: int = 50):
+    try:
+        async with async_db_session() as session:
+            query = published_trips_query(after, limit)
+            trips = (await session.execute(query)).all()
+            return trips
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+async def get_trips_in_bbox(bbox: tuple, after: tuple | None = None, limit: int = 50):
+    try:
+        async with async_db_session() as session:
+            query = bbox_trips_query(bbox, after, limit)
+            trips = (await session.execute(query)).all()
+            return trips
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+async def get_nearby_trips(lat: float, lon: float, radius_km: float, limit: int = 50):
+    try:
+        async with async_db_session() as session:
+            query = nearby_trips_query(lat, lon, radius_km, limit)
+            trips = (await session.execute(query)).all()
+            return trips
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+async def get_trip(trip_id, detail: str = "full"):
+    async with async_db_session() as session:
+        trip = await session.get(Trip, trip_id, options=route_options(Trip, detail))
+        if not trip:
+            raise NotFoundError(f"Trip with ID: {trip}, not found.")
+        return trip
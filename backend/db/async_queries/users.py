@@ -0,0 +1,11 @@
+from db.schema import User
+from db.session import async_db_session
+from app.errors import NotFoundError
+
+
+async def get_user_by_id(user_id: str):
+    async with async_db_session() as session:
+        user = await session.get(User, user_id)
+        if not user:
+            raise NotFoundError(f"User with id {user_id} not found.")
+        return user
@@ -0,0 +1,54 @@
+import time
+from threading import Lock
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = Lock()
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+
+class WaitTimingMixin:
+    """Records how long callers wait for a connection in cls.stats."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.stats.record_wait(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(WaitTimingMixin, QueuePool):
+    stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(WaitTimingMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+
+def pool_metrics(pool):
+    if not isinstance(pool, WaitTimingMixin):
+        return None
+    stats = pool.stats
+    checkouts = stats.checkouts
+    return {
+        "size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": checkouts,
+        "wait_avg_ms": stats.wait_total / checkouts * 1000 if checkouts else 0.0,
+        "wait_max_ms": stats.wait_max * 1000,
+    }
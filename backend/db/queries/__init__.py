@@ -0,0 +1,14 @@
+from sqlalchemy.orm import defer, undefer
+
+
+def route_options(model, detail: str | None):
+    """Load a simplified route in place of the full geometry.
+
+    With detail=None no route column is loaded at all.
+    """
+    if detail == "full":
+        return []
+    options = [defer(model.route)]
+    if detail:
+        options.append(undefer(getattr(model, f"route_{detail}")))
+    return options
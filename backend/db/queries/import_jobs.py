@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta
+from db.schema import ImportJob, ImportJobFile, Ride, Trip
+from db.session import db_session
+from db.queries.trips import trip_aggregates_update
+from db.queries.tiles import bump_tile_versions
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, delete, func, or_
+from app.errors import DatabaseError, NotFoundError
+
+
+def create_import_job(job: ImportJob):
+    try:
+        with db_session() as session:
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            return job
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def get_import_job(job_id: str):
+    with db_session() as session:
+        job = session.get(ImportJob, job_id)
+        if not job:
+            raise NotFoundError(f"Import job with ID: {job_id}, not found.")
+        return job
+
+
+def claim_import_job(stale_after: timedelta, max_attempts: int):
+    """Claim the oldest pending job, or one whose worker stopped reporting.
+
+    SKIP LOCKED lets any number of workers poll the same table: each one
+    locks a different row and nobody waits on a job another worker holds.
+    """
+    try:
+        with db_session(expire_on_commit=False) as session:
+            stale = datetime.now() - stale_after
+            # Give up on jobs that keep taking their worker down with them
+            session.execute(
+                update(ImportJob)
+                .where(
+                    ImportJob.status == "running",
+                    ImportJob.updated_at < stale,
+                    ImportJob.attempts >= max_attempts,
+                )
+                .values(status="failed", error="Import timed out")
+            )
+            query = (
+                select(ImportJob)
+                .where(
+                    or_(
+                        ImportJob.status == "pending",
+                        (ImportJob.status == "running")
+                        & (ImportJob.updated_at < stale),
+                    )
+                )
+                .order_by(ImportJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .options(selectinload(ImportJob.files))
+            )
+            job = session.scalars(query).first()
+            if not job:
+                session.commit()
+                return None
+            job.status = "running"
+            job.attempts += 1
+            session.commit()
+            return job
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def touch_import_job(job_id: str, attempt: int):
+    """Heartbeat of the worker running attempt, so the job is not reclaimed.
+
+    Returns False once another worker has reclaimed the job.
+    """
+    try:
+        with db_session() as session:
+            query = (
+                update(ImportJob)
+                .where(
+                    ImportJob.id == job_id,
+                    ImportJob.status == "running",
+                    ImportJob.attempts == attempt,
+                )
+                .values(updated_at=datetime.now())
+            )
+            result = session.execute(query)
+            session.commit()
+            return result.rowcount == 1
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def _lock_running_job(session, job_id: str, attempt: int):
+    query = (
+        select(ImportJob)
+        .where(
+            ImportJob.id == job_id,
+            ImportJob.status == "running",
+            ImportJob.attempts == attempt,
+        )
+        .with_for_update()
+    )
+    return session.scalars(query).first()
+
+
+def complete_import_job(job_id: str, attempt: int, rides: list[Ride], aggregates):
+    """Insert the rides, update the trip and finish the job in one transaction.
+
+    aggregates(trip, rides, last_date) returns the trip's new aggregate
+    values, or None to rebuild them from the rides. The trip row stays
+    locked until commit, so concurrent imports into one trip queue up.
+    Returns False, writing nothing, if the job was reclaimed from this
+    attempt in the meantime.
+    """
+    try:
+        with db_session() as session:
+            job = _lock_running_job(session, job_id, attempt)
+            if not job:
+                return False
+            trip = session.scalars(
+                select(Trip).where(Trip.id == job.trip_id).with_for_update()
+            ).one()
+            last_date = session.scalar(
+                select(func.max(Ride.date)).where(Ride.trip_id == trip.id)
+            )
+
+            session.add_all(rides)
+            session.flush()
+
+            values = aggregates(trip, rides, last_date)
+            if values is None:
+                session.execute(trip_aggregates_update(trip.id))
+            else:
+                session.execute(update(Trip).where(Trip.id == trip.id).values(**values))
+            bump_tile_versions(session, Trip.id == trip.id)
+
+            job.status = "done"
+            job.ride_ids = [ride.id for ride in rides]
+            job.error = None
+            # The uploads are only needed until the rides exist
+            session.execute(delete(ImportJobFile).where(ImportJobFile.job_id == job_id))
+            session.commit()
+            return True
+    except IntegrityError as e:
+        raise ValueError("Duplicate ride detected.") from e
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def fail_import_job(job_id: str, attempt: int, error: str):
+    """Mark the job failed, unless it was reclaimed from this attempt."""
+    try:
+        with db_session() as session:
+            job = _lock_running_job(session, job_id, attempt)
+            if not job:
+                return False
+            job.status = "failed"
+            job.error = error
+            session.execute(delete(ImportJobFile).where(ImportJobFile.job_id == job_id))
+            session.commit()
+            return True
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def retry_import_job(job_id: str, attempt: int):
+    """Queue the job again, keeping its uploads, unless it was reclaimed."""
+    try:
+        with db_session() as session:
+            job = _lock_running_job(session, job_id, attempt)
+            if not job:
+                return False
+            job.status = "pending"
+            job.error = None
+            session.commit()
+            return True
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
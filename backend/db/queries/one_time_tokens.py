@@ -1,5 +1,5 @@
-from db.schema import one_time_tokens, engine
-from sqlalchemy.orm import Session
+from db.schema import one_time_tokens
+from db.session import db_session
 from sqlalchemy import exc as db_err
 from sqlalchemy import select, update
 from app.errors import AuthenticationError, DatabaseError
@@ -8,7 +8,7 @@ from datetime import datetime, timedelta
 
 def register_reset_token(u_id: str, tkn: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             new_token = one_time_tokens(
                 token=tkn,
                 user_id=u_id,
@@ -27,7 +27,7 @@ def register_reset_token(u_id: str, tkn: str):
 
 def register_verify_token(u_id: str, tkn: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             new_token = one_time_tokens(
                 token=tkn,
                 user_id=u_id,
@@ -46,7 +46,7 @@ def register_verify_token(u_id: str, tkn: str):
 
 def get_one_time_token(token: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = select(one_time_tokens).where(one_time_tokens.token == token)
             token_obj = session.scalars(query).one()
             return token_obj
@@ -58,7 +58,7 @@ def get_one_time_token(token: str):
 
 def revoke_one_time_token(token_id: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = (
                 update(one_time_tokens)
                 .where(one_time_tokens.id == token_id)
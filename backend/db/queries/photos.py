@@ -1,12 +1,86 @@
-from db.schema import Photo, engine
-from sqlalchemy.orm import Session
-from sqlalchemy import select, update, delete
+from db.schema import Photo, Ride
+from db.session import db_session
+from sqlalchemy import select, update, delete, func, case, true
+from sqlalchemy.dialects.postgresql import insert
 from app.errors import DatabaseError
 
 
+def photos_along_route_query(trip_id: str):
+    """Place every photo of a trip on one of its rides, in trip order.
+
+    Geotagged photos go to the ride whose route passes closest and are
+    projected onto it with ST_LineLocatePoint. The others go to the last
+    ride started before they were taken, at the share of the ride's
+    duration that had elapsed. Photos with neither are left out.
+    """
+    nearest = (
+        select(Ride.id, Ride.date, Ride.route)
+        .where(Ride.trip_id == Photo.trip_id, Photo.location.is_not(None))
+        .order_by(Ride.route.op("<->")(Photo.location))
+        .limit(1)
+        .lateral("nearest")
+    )
+    duration = func.coalesce(func.nullif(Ride.elapsed_time, 0), Ride.moving_time)
+    timeline = (
+        select(Ride.id, Ride.date, Ride.route, duration.label("duration"))
+        .where(
+            Ride.trip_id == Photo.trip_id,
+            Photo.location.is_(None),
+            Ride.date <= Photo.taken_at,
+        )
+        .order_by(Ride.date.desc())
+        .limit(1)
+        .lateral("timeline")
+    )
+
+    elapsed = func.extract("epoch", Photo.taken_at - timeline.c.date)
+    fraction = case(
+        (
+            nearest.c.id.is_not(None),
+            func.ST_LineLocatePoint(nearest.c.route, Photo.location),
+        ),
+        else_=func.least(
+            func.greatest(elapsed / func.nullif(timeline.c.duration, 0), 0), 1
+        ),
+    )
+    placed = (
+        select(
+            Photo.id,
+            Photo.s3_key,
+            Photo.variants,
+            Photo.taken_at,
+            func.coalesce(nearest.c.id, timeline.c.id).label("ride_id"),
+            func.coalesce(nearest.c.date, timeline.c.date).label("ride_date"),
+            func.coalesce(fraction, 0).label("fraction"),
+            func.coalesce(nearest.c.route, timeline.c.route).label("route"),
+            nearest.c.id.is_not(None).label("geotagged"),
+        )
+        .outerjoin(nearest, true())
+        .outerjoin(timeline, true())
+        .where(Photo.trip_id == trip_id)
+        .subquery()
+    )
+    point = func.ST_LineInterpolatePoint(placed.c.route, placed.c.fraction)
+    return (
+        select(
+            placed.c.id,
+            placed.c.s3_key,
+            placed.c.variants,
+            placed.c.taken_at,
+            placed.c.ride_id,
+            placed.c.fraction,
+            placed.c.geotagged,
+            func.ST_X(point).label("lon"),
+            func.ST_Y(point).label("lat"),
+        )
+        .where(placed.c.ride_id.is_not(None))
+        .order_by(placed.c.ride_date, placed.c.fraction)
+    )
+
+
 def get_trip_photos(trip_id: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = select(Photo).where(Photo.trip_id == trip_id)
             photos = session.scalars(query).all()
             return photos
@@ -14,9 +88,18 @@ def get_trip_photos(trip_id: str):
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
 
 
+def get_photos_along_route(trip_id: str):
+    try:
+        with db_session() as session:
+            photos = session.execute(photos_along_route_query(trip_id)).all()
+            return photos
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
 def get_photo(id: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             return session.get(Photo, id)
     except Exception as e:
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
@@ -24,7 +107,7 @@ def get_photo(id: str):
 
 def add_photo(photo: Photo):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             session.add(photo)
             session.commit()
             session.refresh(photo)
@@ -33,21 +116,72 @@ def add_photo(photo: Photo):
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
 
 
-def delete_photo(id: str):
+def add_photos(photos: list[dict]) -> set[str]:
+    """Insert a batch of photos in one multi-row INSERT.
+
+    Photos that already exist are skipped. Returns the ids of those inserted.
+    """
     try:
-        with Session(engine) as session:
-            session.get(Photo, id)
-            query = delete(Photo).where(Photo.id == id)
-            session.execute(query)
+        with db_session() as session:
+            query = (
+                insert(Photo)
+                .on_conflict_do_nothing(index_elements=[Photo.id])
+                .returning(Photo.id)
+            )
+            inserted = set(session.scalars(query, photos))
+            session.commit()
+            return inserted
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def update_photos(values: list[dict]) -> set[str]:
+    """Update a batch of photos by primary key, each dict holding its id.
+
+    Photos deleted in the meantime are skipped. Returns the ids updated,
+    whose rows stay locked until commit so a delete sees the new values.
+    """
+    try:
+        with db_session() as session:
+            ids = [value["id"] for value in values]
+            query = (
+                select(Photo.id)
+                .where(Photo.id.in_(ids))
+                .order_by(Photo.id)
+                .with_for_update()
+            )
+            existing = set(session.scalars(query))
+            values = [value for value in values if value["id"] in existing]
+            if values:
+                session.execute(update(Photo), values)
+            session.commit()
+            return existing
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def delete_photo(id: str) -> list[str]:
+    """Delete a photo, returning the S3 keys of its original and variants."""
+    try:
+        with db_session() as session:
+            query = (
+                delete(Photo)
+                .where(Photo.id == id)
+                .returning(Photo.s3_key, Photo.variants)
+            )
+            deleted = session.execute(query).first()
             session.commit()
-            return
+            if deleted is None:
+                return []
+            variant_keys = [variant["key"] for variant in deleted.variants or []]
+            return [deleted.s3_key, *variant_keys]
     except Exception as e:
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
 
 
 def update_photo(id: str, photo_data):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = update(Photo).where(Photo.id == id).values(**photo_data)
             session.execute(query)
             session.commit()
@@ -1,5 +1,5 @@
-from db.schema import refresh_tokens, engine
-from sqlalchemy.orm import Session
+from db.schema import refresh_tokens
+from db.session import db_session
 from sqlalchemy import exc as db_err
 from sqlalchemy import select, update
 from app.errors import AuthenticationError, DatabaseError
@@ -7,7 +7,7 @@ from app.errors import AuthenticationError, DatabaseError
 
 def register_refresh_token(u_id: str, rt: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             new_token = refresh_tokens(token=rt, user_id=u_id)
             session.add(new_token)
             session.commit()
@@ -21,7 +21,7 @@ def register_refresh_token(u_id: str, rt: str):
 
 def get_token(token: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = select(refresh_tokens).where(refresh_tokens.token == token)
             token_obj = session.scalars(query).one()
             return token_obj
@@ -33,7 +33,7 @@ def get_token(token: str):
 
 def revoke_tokens_for_user(user_id: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = (
                 update(refresh_tokens)
                 .where(refresh_tokens.user_id == user_id)
@@ -47,7 +47,7 @@ def revoke_tokens_for_user(user_id: str):
 
 def revoke_refresh_token(token_id: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = (
                 update(refresh_tokens)
                 .where(refresh_tokens.id == token_id)
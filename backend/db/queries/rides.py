@@ -1,13 +1,17 @@
-from db.schema import Ride, engine
-from sqlalchemy.orm import Session
+from datetime import datetime
+from db.schema import Ride, Trip
+from db.session import db_session
 from sqlalchemy import exc as db_err
 from sqlalchemy import select, update, delete
 from app.errors import DatabaseError, NotFoundError
+from db.queries import route_options
+from db.queries.tiles import bump_tile_versions
+from db.queries.trips import trip_aggregates_update
 
 
 def create_ride(ride: Ride):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             session.add(ride)
             session.commit()
             session.refresh(ride)
@@ -20,8 +24,11 @@ def create_ride(ride: Ride):
 
 def create_rides(rides: list[Ride]):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             session.add_all(rides)
+            session.flush()
+            trip_ids = {ride.trip_id for ride in rides}
+            bump_tile_versions(session, Trip.id.in_(trip_ids))
             session.commit()
             for ride in rides:
                 session.refresh(ride)
@@ -33,17 +40,22 @@ def create_rides(rides: list[Ride]):
 
 
 def get_ride(ride_id: str):
-    with Session(engine) as session:
+    with db_session() as session:
         ride = session.get(Ride, ride_id)
         if not ride:
             raise NotFoundError(f"Trip with ID: {ride_id}, not found.")
         return ride
 
 
-def get_trip_rides_asc(trip_ip: str):
+def get_trip_rides_asc(trip_ip: str, detail: str = "full"):
     try:
-        with Session(engine) as session:
-            query = select(Ride).where(Ride.trip_id == trip_ip).order_by(Ride.date)
+        with db_session() as session:
+            query = (
+                select(Ride)
+                .where(Ride.trip_id == trip_ip)
+                .order_by(Ride.date)
+                .options(*route_options(Ride, detail))
+            )
             rides = session.scalars(query).all()
             return rides
     except db_err.NoResultFound as e:
@@ -54,9 +66,17 @@ def get_trip_rides_asc(trip_ip: str):
 
 def update_ride(ride_id: str, ride):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = update(Ride).where(Ride.id == ride_id).values(ride)
             session.execute(query)
+            # Ride details are part of the trip response, which is cached by version
+            trip_id = select(Ride.trip_id).where(Ride.id == ride_id).scalar_subquery()
+            session.execute(
+                update(Trip)
+                .where(Trip.id == trip_id)
+                .values(updated_at=datetime.now())
+            )
+            bump_tile_versions(session, Trip.id == trip_id)
             session.commit()
             return session.get(Ride, ride_id)
     except Exception as e:
@@ -64,10 +84,20 @@ def update_ride(ride_id: str, ride):
 
 
 def delete_ride(ride_id: str):
+    """Delete a ride and rebuild its trip's aggregates in one transaction.
+
+    The trip row is locked first, as complete_import_job does, so the
+    rebuild also counts the rides of an import that committed meanwhile.
+    """
     try:
-        with Session(engine) as session:
-            query = delete(Ride).where(Ride.id == ride_id)
-            session.execute(query)
+        with db_session() as session:
+            trip_id = session.scalar(select(Ride.trip_id).where(Ride.id == ride_id))
+            if trip_id is None:
+                return
+            session.execute(select(Trip.id).where(Trip.id == trip_id).with_for_update())
+            session.execute(delete(Ride).where(Ride.id == ride_id))
+            session.execute(trip_aggregates_update(trip_id))
+            bump_tile_versions(session, Trip.id == trip_id)
             session.commit()
     except Exception as e:
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
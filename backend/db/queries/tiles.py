@@ -0,0 +1,149 @@
+from db.schema import Trip, Ride, TileVersion
+from db.session import db_session
+from sqlalchemy import select, func, cast, String
+from sqlalchemy.dialects.postgresql import insert
+from app.errors import DatabaseError
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+
+def trip_filter(trip_id: str | None, user_id: str | None):
+    if trip_id:
+        return Trip.id == trip_id
+    if user_id:
+        return Trip.user_id == user_id
+    return Trip.is_published.is_(True)
+
+
+def tile_scope(trip_id: str | None, user_id: str | None) -> str:
+    if trip_id:
+        return f"trip:{trip_id}"
+    if user_id:
+        return f"user:{user_id}"
+    return "published"
+
+
+def tiles_version_query(trip_id: str | None, user_id: str | None):
+    return select(TileVersion.version).where(
+        TileVersion.scope == tile_scope(trip_id, user_id)
+    )
+
+
+def get_tiles_version(trip_id: str | None = None, user_id: str | None = None):
+    """Version of the tiles for a filter, moved by bump_tile_versions."""
+    try:
+        with db_session() as session:
+            return session.scalar(tiles_version_query(trip_id, user_id))
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def bump_tile_versions(session, trips):
+    """Move the tile version of every filter that shows the given trips.
+
+    trips is a WHERE clause on Trip. Call it inside the transaction that
+    changes them: before deleting a trip, and after changing whether it
+    is published. Drafts never move the published tiles.
+    """
+    rows = session.execute(
+        select(Trip.id, Trip.user_id, Trip.is_published).where(trips)
+    ).all()
+    scopes = set()
+    for trip_id, user_id, is_published in rows:
+        scopes |= {tile_scope(trip_id, None), tile_scope(None, user_id)}
+        if is_published:
+            scopes.add(tile_scope(None, None))
+    if not scopes:
+        return
+
+    # Sorted, so concurrent writers lock the rows in the same order
+    query = insert(TileVersion).values(
+        [{"scope": scope, "version": 1} for scope in sorted(scopes)]
+    )
+    session.execute(
+        query.on_conflict_do_update(
+            index_elements=[TileVersion.scope],
+            set_={"version": TileVersion.version + 1},
+        )
+    )
+
+
+def layer_query(name: str, model, column: str, columns, where, envelope):
+    route = getattr(model, column)
+    bounds = func.ST_Transform(envelope, 4326)
+    features = (
+        select(
+            func.ST_AsMVTGeom(
+                func.ST_Transform(route, 3857),
+                envelope,
+                TILE_EXTENT,
+                TILE_BUFFER,
+                True,
+            ).label("geom"),
+            *columns,
+        )
+        # Match on the full route, which carries the spatial index
+        .where(where, route.is_not(None), func.ST_Intersects(model.route, bounds))
+        .subquery()
+    )
+    return select(func.ST_AsMVT(features.table_valued(), name)).scalar_subquery()
+
+
+def route_tile_query(
+    z: int,
+    x: int,
+    y: int,
+    column: str,
+    trip_id: str | None,
+    user_id: str | None,
+):
+    envelope = func.ST_TileEnvelope(z, x, y)
+    where = trip_filter(trip_id, user_id)
+    trips = layer_query(
+        "trips",
+        Trip,
+        column,
+        [Trip.id, Trip.user_id, Trip.title, Trip.total_distance],
+        where,
+        envelope,
+    )
+    rides = layer_query(
+        "rides",
+        Ride,
+        column,
+        [
+            Ride.id,
+            Ride.trip_id,
+            Ride.title,
+            cast(Ride.date, String).label("date"),
+            Ride.distance,
+        ],
+        Ride.trip_id.in_(select(Trip.id).where(where)),
+        envelope,
+    )
+    return select(trips, rides)
+
+
+def join_layers(layers) -> bytes:
+    return b"".join(bytes(layer) for layer in layers if layer)
+
+
+def get_route_tile(
+    z: int,
+    x: int,
+    y: int,
+    column: str = "route",
+    trip_id: str | None = None,
+    user_id: str | None = None,
+) -> bytes:
+    """Build a Mapbox Vector Tile with a trips layer and a rides layer.
+
+    column picks the stored route (full or simplified) drawn at this zoom.
+    """
+    try:
+        with db_session() as session:
+            query = route_tile_query(z, x, y, column, trip_id, user_id)
+            return join_layers(session.execute(query).one())
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
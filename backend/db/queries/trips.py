@@ -1,13 +1,17 @@
-from db.schema import Trip, engine
-from sqlalchemy.orm import Session
+from db.schema import Trip, Ride, Photo
+from db.session import db_session
 from sqlalchemy import exc as db_err
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, update, delete, func, tuple_, Float
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from app.errors import DatabaseError, NotFoundError
+from app.services.route_services import ROUTE_TOLERANCES
+from db.queries import route_options
+from db.queries.tiles import bump_tile_versions
 
 
 def create_trip(trip: Trip):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             session.add(trip)
             session.commit()
             session.refresh(trip)
@@ -18,45 +22,203 @@ def create_trip(trip: Trip):
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
 
 
-def get_user_trips(user_id):
+def trip_summaries_query():
+    """Summary columns of trips with the thumbnail's S3 key and variants.
+
+    One query for a whole list: no geometry, no per-trip photo lookup.
+    """
+    return select(
+        Trip.id,
+        Trip.user_id,
+        Trip.title,
+        Trip.description,
+        Trip.start_date,
+        Trip.slug,
+        Trip.is_published,
+        Photo.s3_key.label("thumbnail_key"),
+        Photo.variants.label("thumbnail_variants"),
+    ).outerjoin(Photo, Photo.id == Trip.thumbnail_id)
+
+
+def paginate(query, after: tuple | None, limit: int):
+    """Keyset page, newest first, fetching one extra row to detect a next page.
+
+    after is the (start_date, id) of the last trip already returned.
+    """
+    if after:
+        query = query.where(tuple_(Trip.start_date, Trip.id) < tuple_(*after))
+    return query.order_by(Trip.start_date.desc(), Trip.id.desc()).limit(limit + 1)
+
+
+def user_trips_query(user_id, after: tuple | None, limit: int):
+    query = trip_summaries_query().where(Trip.user_id == user_id)
+    return paginate(query, after, limit)
+
+
+def published_trips_query(after: tuple | None, limit: int):
+    query = trip_summaries_query().where(Trip.is_published)
+    return paginate(query, after, limit)
+
+
+def bbox_trips_query(bbox: tuple, after: tuple | None, limit: int):
+    """Published trips whose route crosses the (minx, miny, maxx, maxy) box.
+
+    && runs on the GiST index of the stored bounding box first, so
+    ST_Intersects only checks the full route of trips that can match.
+    """
+    envelope = func.ST_MakeEnvelope(*bbox, 4326)
+    query = trip_summaries_query().where(
+        Trip.is_published,
+        Trip.bounding_box.op("&&")(envelope),
+        func.ST_Intersects(Trip.route, envelope),
+    )
+    return paginate(query, after, limit)
+
+
+def nearby_trips_query(lat: float, lon: float, radius_km: float, limit: int):
+    """Published trips passing within radius_km of a point, closest first.
+
+    Both the radius filter and the <-> ordering run on the geography
+    index of published routes, so the scan stops after limit trips.
+    """
+    route = func.geography(Trip.route)
+    point = func.geography(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326))
+    distance = route.op("<->", return_type=Float)(point)
+    return (
+        trip_summaries_query()
+        .add_columns((distance / 1000.0).label("distance_km"))
+        .where(Trip.is_published, func.ST_DWithin(route, point, radius_km * 1000))
+        .order_by(distance)
+        .limit(limit)
+    )
+
+
+def get_user_trips(user_id, after: tuple | None = None, limit: int = 50):
+    try:
+        with db_session() as session:
+            trips = session.execute(user_trips_query(user_id, after, limit)).all()
+            return trips
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def get_published_trips(after: tuple | None = None, limit: int = 50):
     try:
-        with Session(engine) as session:
-            query = select(Trip).where(Trip.user_id == user_id)
-            trips = session.scalars(query).all()
+        with db_session() as session:
+            trips = session.execute(published_trips_query(after, limit)).all()
             return trips
-    except db_err.NoResultFound as e:
-        raise NotFoundError("No trip found for user") from e
     except Exception as e:
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
-    pass
 
 
-def get_trip(trip_id):
-    with Session(engine) as session:
-        trip = session.get(Trip, trip_id)
+def get_trips_in_bbox(bbox: tuple, after: tuple | None = None, limit: int = 50):
+    try:
+        with db_session() as session:
+            trips = session.execute(bbox_trips_query(bbox, after, limit)).all()
+            return trips
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def get_nearby_trips(lat: float, lon: float, radius_km: float, limit: int = 50):
+    try:
+        with db_session() as session:
+            query = nearby_trips_query(lat, lon, radius_km, limit)
+            trips = session.execute(query).all()
+            return trips
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
+def get_trip(trip_id, detail: str = "full"):
+    with db_session() as session:
+        trip = session.get(Trip, trip_id, options=route_options(Trip, detail))
         if not trip:
             raise NotFoundError(f"Trip with ID: {trip}, not found.")
         return trip
 
 def get_total_trips():
-    with Session(engine) as session:   
+    with db_session() as session:   
         count = session.scalar(select(func.count(Trip.id)))
         return count
 
 def update_trip(trip_id: str, values: dict):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
+            if "is_published" in values:
+                bump_tile_versions(session, Trip.id == trip_id)
             query = update(Trip).where(Trip.id == trip_id).values(**values)
             session.execute(query)
+            bump_tile_versions(session, Trip.id == trip_id)
             session.commit()
             return session.get(Trip, trip_id)
     except Exception as e:
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
 
 
+def trip_aggregates_update(trip_id: str):
+    """UPDATE recomputing every trip aggregate from its rides.
+
+    PostGIS merges the routes in ride order and takes their extent, so no
+    ride geometry leaves the database. A trip without rides gets NULLs.
+    """
+    totals = (
+        select(
+            func.ST_MakeLine(aggregate_order_by(Ride.route, Ride.date)).label("route"),
+            func.ST_Extent(Ride.route).label("extent"),
+            func.sum(Ride.distance).label("distance"),
+            func.sum(Ride.elevation_gain).label("elevation"),
+            func.max(Ride.high_point).label("high_point"),
+        )
+        .where(Ride.trip_id == trip_id)
+        .subquery()
+    )
+    bounding_box = func.ST_MakeEnvelope(
+        func.ST_XMin(totals.c.extent),
+        func.ST_YMin(totals.c.extent),
+        func.ST_XMax(totals.c.extent),
+        func.ST_YMax(totals.c.extent),
+        4326,
+    )
+    simplified = {
+        f"route_{detail}": func.ST_Simplify(totals.c.route, tolerance, True)
+        for detail, tolerance in ROUTE_TOLERANCES.items()
+    }
+    return (
+        update(Trip)
+        .where(Trip.id == trip_id)
+        .values(
+            route=totals.c.route,
+            bounding_box=bounding_box,
+            total_distance=totals.c.distance,
+            total_elevation=totals.c.elevation,
+            high_point=totals.c.high_point,
+            **simplified,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild_trip_aggregates(trip_id: str) -> bool:
+    """Recompute every trip aggregate from its rides in one statement.
+
+    Returns whether the trip has a route, i.e. at least one ride.
+    """
+    try:
+        with db_session() as session:
+            query = trip_aggregates_update(trip_id).returning(Trip.route.is_not(None))
+            has_route = session.execute(query).scalar()
+            bump_tile_versions(session, Trip.id == trip_id)
+            session.commit()
+            return bool(has_route)
+    except Exception as e:
+        raise DatabaseError(f"Internal database Error:{str(e)}") from e
+
+
 def delete_trip(trip_id: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
+            bump_tile_versions(session, Trip.id == trip_id)
             query = delete(Trip).where(Trip.id == trip_id)
             session.execute(query)
             session.commit()
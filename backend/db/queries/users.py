@@ -1,13 +1,15 @@
-from db.schema import User, engine
-from sqlalchemy.orm import Session
+from db.schema import User, Trip
+from db.session import db_session
 from sqlalchemy import exc as db_err
 from sqlalchemy import select, update, delete, func
 from app.errors import DatabaseError, NotFoundError
+from app.services.user_cache import user_cache
+from db.queries.tiles import bump_tile_versions
 
 
 def create_user(user_data: User):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             session.add(user_data)
             session.commit()
             session.refresh(user_data)
@@ -18,12 +20,12 @@ def create_user(user_data: User):
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
 
 def get_total_users():
-    with Session(engine) as session:   
+    with db_session() as session:   
         count = session.scalar(select(func.count(User.id)))
         return count
 
 def get_user_by_id(user_id: str):
-    with Session(engine) as session:
+    with db_session() as session:
         user = session.get(User, user_id)
         if not user:
             raise NotFoundError(f"User with id {user_id} not found.")
@@ -32,7 +34,7 @@ def get_user_by_id(user_id: str):
 
 def get_user_by_username(username: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = select(User).where(User.username == username)
             user = session.scalars(query).one()
             return user
@@ -44,7 +46,7 @@ def get_user_by_username(username: str):
 
 def get_user_by_email(email: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = select(User).where(User.email == email)
             user = session.scalars(query).one()
             return user
@@ -56,20 +58,23 @@ def get_user_by_email(email: str):
 
 def delete_user(user_id: str):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
+            bump_tile_versions(session, Trip.user_id == user_id)
             query = delete(User).where(User.id == user_id)
             session.execute(query)
             session.commit()
+        user_cache.invalidate(user_id)
     except Exception as e:
         raise DatabaseError(f"Internal database Error:{str(e)}") from e
 
 
 def update_user(user_id: str, user_data):
     try:
-        with Session(engine) as session:
+        with db_session() as session:
             query = update(User).where(User.id == user_id).values(**user_data)
             session.execute(query)
             session.commit()
+            user_cache.invalidate(user_id)
             updated_user = session.get(User, user_id)
             return updated_user
     except db_err.IntegrityError as e:
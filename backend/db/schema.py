@@ -1,10 +1,23 @@
 from datetime import date, datetime, timedelta
 import secrets
 from uuid import uuid4
-from sqlalchemy import ForeignKey, String, UniqueConstraint, DateTime, create_engine
+from sqlalchemy import (
+    ForeignKey,
+    String,
+    UniqueConstraint,
+    DateTime,
+    JSON,
+    Index,
+    create_engine,
+    make_url,
+    text,
+)
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from geoalchemy2 import Geometry
 from app.config import config
+from db.pool import InstrumentedQueuePool, InstrumentedAsyncQueuePool
 
 
 class Base(DeclarativeBase):
@@ -38,7 +51,24 @@ class User(Base, TimestampMixin):
 
 class Trip(Base, TimestampMixin):
     __tablename__ = "trips"
-    __table_args__ = (UniqueConstraint("user_id", "start_date"),)
+    __table_args__ = (
+        # Also serves keyset pagination of a user's trips by start_date
+        UniqueConstraint("user_id", "start_date"),
+        # Keyset pagination of the published feed
+        Index(
+            "ix_trips_published_start_date_id",
+            "start_date",
+            "id",
+            postgresql_where=text("is_published"),
+        ),
+        # Nearby search: ST_DWithin and KNN ordering in metres
+        Index(
+            "ix_trips_published_route_geography",
+            text("geography(route)"),
+            postgresql_using="gist",
+            postgresql_where=text("is_published"),
+        ),
+    )
     id: Mapped[str] = mapped_column(
         primary_key=True, default=lambda: secrets.token_hex(8)
     )
@@ -57,6 +87,22 @@ class Trip(Base, TimestampMixin):
     bounding_box: Mapped[str | None] = mapped_column(
         Geometry("POLYGON", srid=4326), default=None
     )
+    # Simplified copies of route, only loaded when a read asks for them
+    route_low: Mapped[str | None] = mapped_column(
+        Geometry("LINESTRING", srid=4326, spatial_index=False),
+        default=None,
+        deferred=True,
+    )
+    route_medium: Mapped[str | None] = mapped_column(
+        Geometry("LINESTRING", srid=4326, spatial_index=False),
+        default=None,
+        deferred=True,
+    )
+    route_high: Mapped[str | None] = mapped_column(
+        Geometry("LINESTRING", srid=4326, spatial_index=False),
+        default=None,
+        deferred=True,
+    )
     is_published: Mapped[bool] = mapped_column(default=False)
     cover_id: Mapped[str | None]
     thumbnail_id: Mapped[str | None]
@@ -76,8 +122,24 @@ class Ride(Base, TimestampMixin):
     elevation_gain: Mapped[float]
     high_point: Mapped[float]
     moving_time: Mapped[float]
+    elapsed_time: Mapped[float | None]
     gpx_url: Mapped[str | None]
     route: Mapped[str] = mapped_column(Geometry("LINESTRING", srid=4326))
+    route_low: Mapped[str | None] = mapped_column(
+        Geometry("LINESTRING", srid=4326, spatial_index=False),
+        default=None,
+        deferred=True,
+    )
+    route_medium: Mapped[str | None] = mapped_column(
+        Geometry("LINESTRING", srid=4326, spatial_index=False),
+        default=None,
+        deferred=True,
+    )
+    route_high: Mapped[str | None] = mapped_column(
+        Geometry("LINESTRING", srid=4326, spatial_index=False),
+        default=None,
+        deferred=True,
+    )
     trip: Mapped[list["Trip"]] = relationship(back_populates="rides")
 
 
@@ -85,24 +147,71 @@ class Photo(Base, TimestampMixin):
     __tablename__ = "photos"
     id: Mapped[str] = mapped_column(primary_key=True, default=lambda: str(uuid4()))
     trip_id: Mapped[str | None] = mapped_column(
-        ForeignKey("trips.id", ondelete="CASCADE")
+        ForeignKey("trips.id", ondelete="CASCADE"), index=True
     )
     user_id: Mapped[str | None] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE")
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
     )
     mime_type: Mapped[str]
     file_size: Mapped[int]
     h_dimm: Mapped[int | None]
     w_dimm: Mapped[int | None]
     s3_key: Mapped[str | None]
-    taken_at: Mapped[str | None]
+    taken_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    location: Mapped[str | None] = mapped_column(Geometry("POINT", srid=4326))
+    # Downscaled copies, each {"key", "width", "height", "content_type"}
+    variants: Mapped[list[dict] | None] = mapped_column(JSON, default=None)
+
+
+class ImportJob(Base, TimestampMixin):
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        Index("ix_import_jobs_status_created_at", "status", "created_at"),
+    )
+    id: Mapped[str] = mapped_column(primary_key=True, default=lambda: str(uuid4()))
+    trip_id: Mapped[str] = mapped_column(
+        ForeignKey("trips.id", ondelete="CASCADE"), index=True
+    )
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    status: Mapped[str] = mapped_column(default="pending")
+    attempts: Mapped[int] = mapped_column(default=0)
+    error: Mapped[str | None]
+    ride_ids: Mapped[list[str] | None] = mapped_column(JSON, default=None)
+    files: Mapped[list["ImportJobFile"]] = relationship(
+        back_populates="job", cascade="all, delete-orphan"
+    )
+
+
+class ImportJobFile(Base):
+    __tablename__ = "import_job_files"
+    id: Mapped[str] = mapped_column(primary_key=True, default=lambda: str(uuid4()))
+    job_id: Mapped[str] = mapped_column(
+        ForeignKey("import_jobs.id", ondelete="CASCADE"), index=True
+    )
+    filename: Mapped[str]
+    s3_key: Mapped[str]  # the upload, spooled to the bucket until imported
+    job: Mapped[ImportJob] = relationship(back_populates="files")
+
+
+class TileVersion(Base):
+    """Version of the tiles drawn for one filter: published, a user or a trip.
+
+    Moved by every write to the trips shown, so a tile request reads one
+    row to validate its cache instead of aggregating over the trips.
+    """
+
+    __tablename__ = "tile_versions"
+    scope: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(default=0)
 
 
 class refresh_tokens(Base):
     __tablename__ = "refresh_tokens"
     id: Mapped[str] = mapped_column(primary_key=True, default=lambda: str(uuid4()))
     token: Mapped[str] = mapped_column(unique=True)
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now())
     expires_at: Mapped[datetime] = mapped_column(
         default=lambda: datetime.now() + timedelta(days=30)
@@ -115,7 +224,9 @@ class one_time_tokens(Base):
     id: Mapped[str] = mapped_column(primary_key=True, default=lambda: str(uuid4()))
     token: Mapped[str] = mapped_column(unique=True)
     type: Mapped[str] = mapped_column()
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now())
     expires_at: Mapped[datetime] = mapped_column(
         default=lambda: datetime.now() + timedelta(hours=1)
@@ -123,4 +234,47 @@ class one_time_tokens(Base):
     revoked: Mapped[bool] = mapped_column(default=False)
 
 
-engine = create_engine(config.db.url, echo=config.db.echo_flag, plugins=["geoalchemy2"])
+def split_pool(total: int) -> tuple[int, int]:
+    """Share of a connection budget for the (sync, async) engines."""
+    async_share = total // 2
+    return total - async_share, async_share
+
+
+# The two engines split DB_POOL_SIZE and DB_MAX_OVERFLOW, so a process never
+# opens more connections than configured. Either pool keeps at least one
+# connection: a pool_size of 0 would mean no limit at all.
+sync_pool_size, async_pool_size = (max(n, 1) for n in split_pool(config.db.pool_size))
+sync_max_overflow, async_max_overflow = split_pool(config.db.max_overflow)
+
+engine = create_engine(
+    config.db.url,
+    echo=config.db.echo_flag,
+    plugins=["geoalchemy2"],
+    poolclass=InstrumentedQueuePool,
+    pool_size=sync_pool_size,
+    max_overflow=sync_max_overflow,
+    pool_timeout=config.db.pool_timeout,
+    pool_recycle=config.db.pool_recycle,
+    pool_pre_ping=config.db.pool_pre_ping,
+)
+
+# asyncpg engine for the async routers. TestClient starts a new event loop per
+# request and asyncpg connections can't move between loops, so tests don't pool.
+if config.environment == "TEST":
+    async_pool = {"poolclass": NullPool}
+else:
+    async_pool = {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": async_pool_size,
+        "max_overflow": async_max_overflow,
+        "pool_timeout": config.db.pool_timeout,
+        "pool_recycle": config.db.pool_recycle,
+        "pool_pre_ping": config.db.pool_pre_ping,
+    }
+
+async_engine = create_async_engine(
+    make_url(config.db.url).set(drivername="postgresql+asyncpg"),
+    echo=config.db.echo_flag,
+    plugins=["geoalchemy2"],
+    **async_pool,
+)
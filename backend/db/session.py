@@ -0,0 +1,96 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from threading import Lock
+from fastapi import BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from db.schema import engine, async_engine
+
+
+class RequestConnection:
+    """One pooled connection per engine shared by every query made during a request.
+
+    Each is checked out on first use, so requests that never touch the
+    database, or only one of the engines, don't hold a connection.
+    """
+
+    def __init__(self):
+        self.connection = None
+        self.async_connection = None
+        self.closed = False
+        self._lock = Lock()
+        self._async_lock = asyncio.Lock()
+
+    def get(self):
+        """The request's connection, or None once the request is over."""
+        with self._lock:
+            if self.closed:
+                return None
+            if self.connection is None:
+                self.connection = engine.connect()
+            return self.connection
+
+    async def get_async(self):
+        async with self._async_lock:
+            if self.closed:
+                return None
+            if self.async_connection is None:
+                self.async_connection = await async_engine.connect()
+            return self.async_connection
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            connection, self.connection = self.connection, None
+        if connection is not None:
+            connection.close()
+
+    async def aclose(self):
+        self.close()
+        async with self._async_lock:
+            connection, self.async_connection = self.async_connection, None
+        if connection is not None:
+            await connection.close()
+
+
+_request_connection: ContextVar[RequestConnection | None] = ContextVar(
+    "request_connection", default=None
+)
+
+
+def db_session(**kwargs) -> Session:
+    """Session for a query function.
+
+    Inside a request the session runs on the request's connection, each
+    query function still in its own transaction. Anywhere else (workers,
+    background tasks, scripts) it checks out its own connection.
+    """
+    scope = _request_connection.get()
+    connection = scope.get() if scope is not None else None
+    if connection is None:
+        return Session(engine, **kwargs)
+    return Session(bind=connection, **kwargs)
+
+
+@asynccontextmanager
+async def async_db_session(**kwargs):
+    """AsyncSession for an async query function, the counterpart of db_session."""
+    scope = _request_connection.get()
+    connection = await scope.get_async() if scope is not None else None
+    bind = async_engine if connection is None else connection
+    async with AsyncSession(bind, **kwargs) as session:
+        yield session
+
+
+async def request_connection(background_tasks: BackgroundTasks):
+    scope = RequestConnection()
+    _request_connection.set(scope)
+    # Background tasks run before this dependency exits, and in the request's
+    # context. Closing the scope ahead of them hands them their own
+    # connections instead of the request's, which they would hold until done.
+    background_tasks.add_task(scope.aclose)
+    try:
+        yield scope
+    finally:
+        await scope.aclose()
@@ -0,0 +1,58 @@
+import pytest
+from pathlib import Path
+from geoalchemy2.shape import from_shape, to_shape
+from shapely import bounds
+from shapely.geometry import LineString
+from app.routers.trips import extract_gpx_data
+from app.services.trip_aggregates import append_rides
+from db.schema import Trip
+
+tests_dir = Path(__file__).parent.parent
+samples_dir = tests_dir.joinpath("./samples")
+ride_paths = [samples_dir.joinpath(f"ride{i}.gpx") for i in (1, 2, 3)]
+
+
+def load_rides():
+    rides = []
+    for path in ride_paths:
+        with open(path, "rb") as f:
+            rides.append(extract_gpx_data(trip_id="trip", content=f.read()))
+    return rides
+
+
+def test_append_rides_matches_full_aggregate():
+    first, *later = load_rides()
+    trip = Trip(
+        route=first.route,
+        total_distance=first.distance,
+        total_elevation=first.elevation_gain,
+        high_point=first.high_point,
+    )
+
+    values = append_rides(trip, later)
+
+    expected = LineString(
+        [c for ride in [first, *later] for c in to_shape(ride.route).coords]
+    )
+    route = to_shape(values["route"])
+    assert route.equals(expected)
+    assert to_shape(values["bounding_box"]).bounds == tuple(bounds(expected))
+    assert values["total_distance"] == pytest.approx(
+        sum(r.distance for r in [first, *later])
+    )
+    assert values["high_point"] == 212.0
+
+
+def test_append_rides_keeps_trip_values():
+    first, second, _ = load_rides()
+    trip = Trip(
+        route=from_shape(LineString(to_shape(first.route).coords), srid=4326),
+        total_distance=first.distance,
+        total_elevation=first.elevation_gain,
+        high_point=300.0,
+    )
+
+    values = append_rides(trip, [second])
+
+    assert values["high_point"] == 300.0
+    assert values["total_elevation"] == first.elevation_gain + second.elevation_gain
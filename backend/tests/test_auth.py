@@ -215,3 +215,23 @@ def test_wrong_password():
 
     assert response.status_code == 401
     assert "Incorrect password" in response.json()["detail"]
+
+
+def test_login_rehashes_old_work_factor(monkeypatch):
+    from db.queries.users import get_user_by_email
+
+    client.post(
+        "/admin/reset", headers={"Authorization": f"Bearer {config.auth.admin_token}"}
+    )
+    monkeypatch.setattr(config.auth, "bcrypt_rounds", 4)
+    client.post("/users", data=fakeUser)
+    assert get_user_by_email(fakeUser["email"]).hashed_password.startswith(b"$2b$04$")
+
+    monkeypatch.setattr(config.auth, "bcrypt_rounds", 5)
+    response = client.post(
+        "/auth/login",
+        data={"email": fakeUser["email"], "password": fakeUser["password"]},
+    )
+
+    assert response.status_code == 200
+    assert get_user_by_email(fakeUser["email"]).hashed_password.startswith(b"$2b$05$")
@@ -0,0 +1,57 @@
+from freezegun import freeze_time
+from app.services.cache import LRUCache, TTLCache
+from app.services.user_cache import UserCache, LocalInvalidation
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_disabled():
+    cache = LRUCache(maxsize=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_ttl_expires_entries():
+    with freeze_time("2025-12-01 10:00:00") as frozen:
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        frozen.tick(59)
+        assert cache.get("a") == 1
+
+        frozen.tick(2)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+def test_user_cache_invalidation():
+    published = []
+
+    class Backend(LocalInvalidation):
+        def publish(self, user_id):
+            published.append(user_id)
+
+    users = UserCache(TTLCache(maxsize=10, ttl=60), Backend())
+    users.set("u1", "user 1", users.generation)
+    assert users.get("u1") == "user 1"
+
+    users.invalidate("u1")
+    assert users.get("u1") is None
+    assert published == ["u1"]
+
+    # A read that started before an invalidation may be stale: not cached
+    generation = users.generation
+    users.drop("u2")
+    users.set("u1", "stale user 1", generation)
+    assert users.get("u1") is None
@@ -112,6 +112,8 @@ def test_retrieve_trip(setup):
     for trip in trips:
         assert trip["title"] == trip_data["title"]
         assert trip["id"] == trip_data["id"]
+        assert trip["thumbnail_id"] is None
+        assert "route" not in trip
 
 
 def test_delete_user(setup):
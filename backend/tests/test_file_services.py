@@ -0,0 +1,169 @@
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import boto3
+import requests
+import pytest
+from fastapi import UploadFile
+from moto import mock_aws
+from PIL import Image
+from starlette.datastructures import Headers
+from app.config import config
+from app.errors import ServerError
+from app.services import file_services
+from app.services.photo_services import VARIANT_FORMATS, render_stored_variants
+from app.services.ride_imports import read_stored_gpx
+
+samples_dir = Path(__file__).parent.parent / "samples"
+LATENCY = 0.1  # seconds added to every put, standing in for the network
+
+
+def upload_file(content: bytes, filename="photo.jpg"):
+    return UploadFile(
+        io.BytesIO(content),
+        filename=filename,
+        headers=Headers({"content-type": "image/jpeg"}),
+    )
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    monkeypatch.setattr(config.s3, "bucket", "trailstory-test")
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket=config.s3.bucket)
+        monkeypatch.setattr(file_services, "s3", s3)
+        yield s3.Bucket(config.s3.bucket)
+
+
+def add_latency(s3, fail_key=None):
+    def slow_put(params, **kwargs):
+        time.sleep(LATENCY)
+        if fail_key and params["url_path"].endswith(fail_key):
+            raise ConnectionError("upload failed")
+
+    s3.meta.client.meta.events.register("before-call.s3.PutObject", slow_put)
+
+
+def test_uploads_run_concurrently(bucket):
+    add_latency(file_services.s3)
+    uploads = [(upload_file(b"jpeg"), "trip", f"photo{i}") for i in range(20)]
+
+    start = time.perf_counter()
+    keys = asyncio.run(file_services.upload_many_to_s3(uploads, limit=20))
+    elapsed = time.perf_counter() - start
+
+    assert keys == [f"trip/photo{i}.jpg" for i in range(20)]
+    assert sorted(o.key for o in bucket.objects.all()) == sorted(keys)
+    # About as long as a single put, not the 2 s of one put after another
+    assert elapsed < 5 * LATENCY
+
+
+def test_failed_upload_removes_the_others(bucket):
+    add_latency(file_services.s3, fail_key="photo3.jpg")
+    uploads = [(upload_file(b"jpeg"), "trip", f"photo{i}") for i in range(5)]
+
+    with pytest.raises(ServerError):
+        asyncio.run(file_services.upload_many_to_s3(uploads, limit=5))
+
+    assert list(bucket.objects.all()) == []
+
+
+def test_presigned_post_upload(bucket):
+    post = file_services.presigned_post("trip/photo.jpg", "image/jpeg", 1000, 60)
+    response = requests.post(
+        post["url"], data=post["fields"], files={"file": ("photo.jpg", b"x" * 100)}
+    )
+    assert response.status_code == 204
+
+    head, missing = asyncio.run(
+        file_services.head_objects(["trip/photo.jpg", "trip/missing.jpg"])
+    )
+    assert head["ContentLength"] == 100
+    assert head["ContentType"] == "image/jpeg"
+    assert missing is None
+
+    start = asyncio.run(file_services.read_from_s3("trip/photo.jpg", 10))
+    assert start == b"x" * 10
+
+
+def test_large_upload_streams_in_parts(bucket, monkeypatch):
+    part_size = 5 * (1 << 20)  # the smallest part S3 accepts
+    monkeypatch.setattr(config.s3, "part_size", part_size)
+    monkeypatch.setattr(config.s3, "part_concurrency", 2)
+    content = bytes(range(256)) * (12 * (1 << 20) // 256)
+
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_part(**kwargs):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(LATENCY)
+        with lock:
+            in_flight -= 1
+
+    events = file_services.s3.meta.client.meta.events
+    events.register("before-call.s3.UploadPart", slow_part)
+
+    key = asyncio.run(
+        file_services.upload_stream_to_s3(upload_file(content), "trip", "big")
+    )
+
+    stored = bucket.Object(key)
+    assert stored.get()["Body"].read() == content
+    assert stored.e_tag.strip('"').endswith("-3")  # 5 + 5 + 2 MB
+    assert peak == 2
+
+
+def test_presigned_urls_are_reused_within_a_window(bucket, monkeypatch):
+    bucket.put_object(Key="trip/photo.jpg", Body=b"jpeg")
+    file_services.url_cache.clear()
+    now = 1_000_000 * config.s3.url_reuse  # start of a window
+    monkeypatch.setattr(file_services.time, "time", lambda: now)
+
+    url = file_services.presigned_url("trip/photo.jpg")
+    assert file_services.url_expiry() == config.s3.url_ttl
+    now += config.s3.url_reuse - 1
+    assert file_services.presigned_url("trip/photo.jpg") == url
+    assert file_services.url_expiry() == config.s3.url_ttl - config.s3.url_reuse + 1
+
+    now += 1
+    assert file_services.presigned_url("trip/photo.jpg") != url
+    assert file_services.presigned_url("trip/other.jpg") != url
+
+    assert requests.get(url).content == b"jpeg"
+    assert "response-cache-control=max-age" in url
+
+
+def test_stored_gpx_is_parsed_in_the_worker(bucket):
+    with open(samples_dir / "ride1.gpx", "rb") as f:
+        bucket.put_object(Key="imports/trip/ride.gpx", Body=f.read())
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(read_stored_gpx, "imports/trip/ride.gpx")
+        coords, timestamp, metrics = future.result()
+
+    assert coords.shape[1] == 2
+    assert "2025-01-12" in str(timestamp)
+
+
+def test_stored_photo_is_rendered_in_the_worker(bucket):
+    buffer = io.BytesIO()
+    Image.new("RGB", (200, 100), "green").save(buffer, "JPEG")
+    bucket.put_object(Key="trip/photo.jpg", Body=buffer.getvalue())
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(render_stored_variants, "trip/photo.jpg")
+        variants = future.result()
+
+    assert [variant for variant, _ in variants] == [
+        {"width": 160, "height": 80, "content_type": content_type}
+        for content_type in VARIANT_FORMATS
+    ]
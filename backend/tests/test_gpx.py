@@ -3,7 +3,20 @@ import pytest
 from app.errors import InputError, InvalidGPXError
 from pathlib import Path
 from app.routers.trips import extract_gpx_data, validate_gpx_upload
+from app.services.gpx_services import parse_gpx_stream, compute_metrics, read_gpx
+from app.services.route_services import (
+    resolve_detail,
+    encode_polyline,
+    encode_routes_binary,
+)
+import numpy as np
+import struct
+from shapely import to_geojson
+from shapely.geometry import LineString
+from geoalchemy2.shape import to_shape
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+import gpxpy
 
 
 tests_dir = Path(__file__).parent.parent
@@ -14,6 +27,8 @@ no_timestamps = samples_dir.joinpath("no_timestamps.gpx")
 low_points = samples_dir.joinpath("not_enough.gpx")
 two_segments = samples_dir.joinpath("two_segments.gpx")
 no_segments = samples_dir.joinpath("no_segments.gpx")
+izu_day_1 = samples_dir.joinpath("izu_day_1.gpx")
+izu_day_2 = samples_dir.joinpath("izu-day-2.gpx")
 
 
 def test_valid_ride():
@@ -160,3 +175,106 @@ def test_multiple_segments():
             extract_gpx_data(trip_id=1234, content=file_content)
 
         assert "multiple tracks" in str(exc.value)
+
+
+@pytest.mark.parametrize("path", [ride1_path, izu_day_1, izu_day_2])
+def test_metrics_match_gpxpy(path):
+    with open(path, "rb") as f:
+        gpx = gpxpy.parse(f.read())
+        f.seek(0)
+        track, _ = parse_gpx_stream(f)
+
+    metrics = compute_metrics(track)
+
+    assert metrics.distance == pytest.approx(gpx.length_2d(), rel=1e-6)
+    assert metrics.moving_time == pytest.approx(gpx.get_moving_data().moving_time)
+    assert metrics.ascent == pytest.approx(gpx.get_uphill_downhill().uphill, rel=1e-6)
+    assert metrics.high_point == gpx.get_elevation_extremes().maximum
+    assert metrics.elapsed_time == pytest.approx(gpx.get_duration())
+
+
+def test_stream_parser_reads_all_points():
+    with open(izu_day_1, "rb") as f:
+        gpx = gpxpy.parse(f.read())
+        f.seek(0)
+        # A tiny size hint forces the point buffer to grow while streaming
+        track, start_time = parse_gpx_stream(f, size_hint=1)
+
+    points = gpx.tracks[0].segments[0].points
+    assert len(track) == len(points)
+    assert start_time == points[0].time
+    assert track.lon[-1] == points[-1].longitude
+    assert track.lat[-1] == points[-1].latitude
+    assert track.ele[-1] == points[-1].elevation
+
+
+def test_extract_from_stream():
+    with open(ride1_path, "rb") as f:
+        ride = extract_gpx_data(trip_id=1234, content=f)
+
+    assert "2025-01-12" in str(ride.date)
+    assert 921 * 0.95 < ride.distance < 921 * 1.05
+
+
+def test_read_gpx_in_process_pool():
+    with open(ride1_path, "rb") as f:
+        valid = f.read()
+    with open(low_points, "rb") as f:
+        invalid = f.read()
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        coords, timestamp, metrics = pool.submit(read_gpx, valid).result()
+        with pytest.raises(InvalidGPXError) as exc:
+            pool.submit(read_gpx, invalid).result()
+
+    assert coords.shape[1] == 2
+    assert "2025-01-12" in str(timestamp)
+    assert 921 * 0.95 < metrics.distance < 921 * 1.05
+    assert "insufficient points" in str(exc.value)
+
+
+def test_ride_stores_simplified_routes():
+    with open(izu_day_1, "rb") as f:
+        ride = extract_gpx_data(trip_id=1234, content=f.read())
+
+    full = to_shape(ride.route)
+    counts = [
+        len(to_shape(getattr(ride, f"route_{detail}")).coords)
+        for detail in ("low", "medium", "high")
+    ]
+    assert counts[0] < counts[1] < counts[2] <= len(full.coords)
+    assert to_shape(ride.route_low).coords[0] == full.coords[0]
+    assert to_shape(ride.route_low).coords[-1] == full.coords[-1]
+
+
+def test_route_detail_from_zoom():
+    assert resolve_detail(None, None) == "full"
+    assert resolve_detail(None, 5) == "low"
+    assert resolve_detail(None, 12) == "medium"
+    assert resolve_detail(None, 15) == "high"
+    assert resolve_detail(None, 18) == "full"
+    assert resolve_detail("medium", 18) == "medium"
+
+
+def test_encode_polyline():
+    # Example from Google's polyline format documentation
+    coords = np.array([[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]])
+    assert encode_polyline(coords) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_encode_routes_binary():
+    with open(izu_day_1, "rb") as f:
+        coords, _, _ = read_gpx(f.read())
+
+    data = encode_routes_binary([("ride1", coords)], precision=6)
+
+    precision, count = struct.unpack_from("<BI", data)
+    id_length = data[5]
+    route_id = data[6 : 6 + id_length].decode()
+    (points,) = struct.unpack_from("<I", data, 6 + id_length)
+    deltas = np.frombuffer(data, "<i4", offset=10 + id_length).reshape(-1, 2)
+    decoded = np.cumsum(deltas, axis=0) / 10**precision
+
+    assert (precision, count, route_id, points) == (6, 1, "ride1", len(coords))
+    assert np.abs(decoded - coords).max() <= 0.5e-6
+    assert len(data) * 4 < len(to_geojson(LineString(coords)))
@@ -0,0 +1,155 @@
+import asyncio
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.main import app
+import pytest
+from app.config import config
+from app.errors import DatabaseError
+from app.services import ride_imports
+from db.schema import engine, ImportJob, ImportJobFile
+from db.queries.import_jobs import (
+    create_import_job,
+    claim_import_job,
+    touch_import_job,
+    fail_import_job,
+    retry_import_job,
+)
+
+client = TestClient(app)
+
+
+def reset():
+    client.post(
+        "/admin/reset", headers={"Authorization": f"Bearer {config.auth.admin_token}"}
+    )
+
+
+@pytest.fixture(scope="function")
+def user():
+    reset()
+    fakeUser = {
+        "email": "sample@pineapple.com",
+        "username": "spongebob",
+        "password": "YourNameIs123!",
+    }
+
+    user = client.post("/users", data=fakeUser)
+    user_data = user.json()
+    return user_data
+
+
+@pytest.fixture(scope="function")
+def trip(user):
+    at = user["access_token"]
+
+    fake_trip = {
+        "title": "The Lanna Kingdom",
+        "description": "A bikepacking loop in Northern Thailand.",
+        "start_date": "2025-12-01",
+    }
+
+    trip = client.post(
+        "/trips", data=fake_trip, headers={"Authorization": f"Bearer {at}"}
+    )
+
+    trip_data = trip.json()
+    return trip_data
+
+
+def queue_job(user, trip):
+    job = ImportJob(
+        trip_id=trip["id"],
+        user_id=user["user"]["id"],
+        files=[ImportJobFile(filename="ride.gpx", s3_key="imports/trip/ride.gpx")],
+    )
+    return create_import_job(job)
+
+
+def test_claim_skips_locked_jobs(user, trip):
+    first = queue_job(user, trip)
+    second = queue_job(user, trip)
+
+    # Another worker holds the oldest job
+    with Session(engine) as other_worker:
+        query = (
+            select(ImportJob)
+            .where(ImportJob.id == first.id)
+            .with_for_update(skip_locked=True)
+        )
+        assert other_worker.scalars(query).one()
+
+        claimed = claim_import_job(timedelta(minutes=10), 3)
+
+    assert claimed.id == second.id
+    assert claimed.status == "running"
+    assert claimed.files[0].filename == "ride.gpx"
+    assert claim_import_job(timedelta(minutes=10), 3).id == first.id
+    assert claim_import_job(timedelta(minutes=10), 3) is None
+
+
+def test_get_job_unauth(user, trip):
+    job = queue_job(user, trip)
+
+    other = client.post(
+        "/users",
+        data={
+            "email": "patrick@pineapple.com",
+            "username": "patrick",
+            "password": "YourNameIs123!",
+        },
+    ).json()
+
+    response = client.get(
+        f"/jobs/{job.id}", headers={"Authorization": f"Bearer {other['access_token']}"}
+    )
+
+    assert response.status_code == 403
+
+
+def test_reclaimed_job_ignores_its_old_worker(user, trip):
+    queue_job(user, trip)
+    first = claim_import_job(timedelta(minutes=10), 3)
+    assert touch_import_job(first.id, first.attempts)
+
+    # The heartbeat stopped: a second worker takes the job over
+    again = claim_import_job(timedelta(seconds=0), 3)
+    assert again.id == first.id and again.attempts == first.attempts + 1
+
+    assert not touch_import_job(first.id, first.attempts)
+    assert not fail_import_job(first.id, first.attempts, "too late")
+    assert fail_import_job(again.id, again.attempts, "invalid gpx")
+
+
+def test_retried_job_is_claimed_again_with_its_files(user, trip):
+    queue_job(user, trip)
+    first = claim_import_job(timedelta(minutes=10), 3)
+    assert retry_import_job(first.id, first.attempts)
+    assert not retry_import_job(first.id, first.attempts)
+
+    again = claim_import_job(timedelta(minutes=10), 3)
+    assert again.id == first.id and again.attempts == first.attempts + 1
+    assert [file.s3_key for file in again.files] == ["imports/trip/ride.gpx"]
+
+
+def test_worker_survives_queue_errors(monkeypatch):
+    calls = []
+
+    async def process_next_job():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise DatabaseError("Internal database Error:connection refused")
+        raise asyncio.CancelledError  # stop the loop
+
+    async def sleep(seconds):
+        pass
+
+    monkeypatch.setattr(ride_imports, "process_next_job", process_next_job)
+    monkeypatch.setattr(ride_imports, "start_cpu_pool", lambda: None)
+    monkeypatch.setattr(ride_imports, "shutdown_cpu_pool", lambda: None)
+    monkeypatch.setattr(ride_imports.asyncio, "sleep", sleep)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(ride_imports.run_worker())
+    assert calls == [0, 1]
@@ -0,0 +1,44 @@
+import asyncio
+import time
+from app.config import config
+from app.security import hash_password, needs_rehash
+from app.services.passwords import PasswordPool
+
+
+def test_needs_rehash(monkeypatch):
+    monkeypatch.setattr(config.auth, "bcrypt_rounds", 4)
+    hashed = hash_password("YourNameIs123!")
+
+    assert hashed.startswith(b"$2b$04$")
+    assert not needs_rehash(hashed)
+
+    monkeypatch.setattr(config.auth, "bcrypt_rounds", 5)
+    assert needs_rehash(hashed)
+    assert needs_rehash(b"-")
+
+
+def test_pool_keeps_event_loop_free():
+    pool = PasswordPool(max_workers=1)
+
+    async def burst():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(*(pool.run(time.sleep, 0.05) for _ in range(4)))
+        task.cancel()
+        return ticks
+
+    # Four 50 ms jobs on one worker: queued one after another, loop still ticks
+    assert asyncio.run(burst()) >= 10
+
+    metrics = pool.metrics()
+    assert metrics["completed"] == 4
+    assert metrics["queued"] == 0 and metrics["running"] == 0
+    assert metrics["wait_max_ms"] >= 100
+    pool.shutdown()
@@ -1,9 +1,24 @@
+import asyncio
+import io
+import json
+import os
+from uuid import uuid4
+from datetime import datetime, timedelta, timezone
+from PIL import Image, ExifTags
+from fastapi import UploadFile
 from fastapi.testclient import TestClient
 from app.main import app
 import pytest
 from app.config import config
 from pathlib import Path
 from app.services.file_services import clear_test_bucket
+from app.services.photo_services import (
+    HEADER_BYTES,
+    VARIANT_FORMATS,
+    read_photo_metadata,
+    read_upload_metadata,
+    render_variants,
+)
 
 client = TestClient(app)
 tests_dir = Path(__file__).parent.parent
@@ -157,3 +172,171 @@ def test_add_avatar(setup):
     finally:
         f.close()
         clear_test_bucket()
+
+
+def exif_jpeg(taken_at=None, offset=None, lat=None, lon=None):
+    exif = Image.Exif()
+    details = exif.get_ifd(ExifTags.IFD.Exif)
+    if taken_at:
+        details[ExifTags.Base.DateTimeOriginal] = taken_at
+    if offset:
+        details[ExifTags.Base.OffsetTimeOriginal] = offset
+    if lat is not None:
+        gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+        gps[ExifTags.GPS.GPSLatitudeRef] = "N" if lat >= 0 else "S"
+        gps[ExifTags.GPS.GPSLatitude] = (abs(lat), 0.0, 0.0)
+        gps[ExifTags.GPS.GPSLongitudeRef] = "E" if lon >= 0 else "W"
+        gps[ExifTags.GPS.GPSLongitude] = (abs(lon), 0.0, 0.0)
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30)).save(buffer, format="JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def test_read_photo_metadata():
+    content = exif_jpeg("2025:12:02 10:15:00", "+07:00", lat=-18.5, lon=98.25)
+    metadata = read_photo_metadata(content)
+
+    assert (metadata.width, metadata.height) == (40, 30)
+    assert metadata.taken_at == datetime(2025, 12, 2, 3, 15, tzinfo=timezone.utc)
+    assert (metadata.lon, metadata.lat) == (98.25, -18.5)
+    assert metadata.location() is not None
+
+    metadata = read_photo_metadata(exif_jpeg("2025:12:02 10:15:00"))
+    assert metadata.taken_at == datetime(2025, 12, 2, 10, 15, tzinfo=timezone.utc)
+    assert metadata.location() is None
+
+
+def test_read_large_png_upload():
+    # Noise doesn't compress, so the image data runs past the header
+    im = Image.frombytes("RGB", (400, 400), os.urandom(400 * 400 * 3))
+    buffer = io.BytesIO()
+    im.save(buffer, "PNG")
+    assert buffer.tell() > HEADER_BYTES
+    buffer.seek(0)
+
+    file = UploadFile(buffer, filename="large.png")
+    metadata = asyncio.run(read_upload_metadata(file))
+
+    assert (metadata.width, metadata.height) == (400, 400)
+    assert metadata.taken_at is None
+    assert buffer.tell() == 0
+
+
+def test_render_variants():
+    with open(photos_dir / "ben-guernsey-rfuOpSqD0ks-unsplash.jpg", "rb") as f:
+        variants = render_variants(f.read())
+
+    widths = [variant["width"] for variant, _ in variants]
+    assert widths == [w for w in (1920, 1280, 640, 320, 160) for _ in VARIANT_FORMATS]
+    for variant, content in variants:
+        with Image.open(io.BytesIO(content)) as im:
+            assert im.get_format_mimetype() == variant["content_type"]
+            assert im.size == (variant["width"], variant["height"])
+
+    # Rotated by its EXIF orientation, and never scaled up
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 100)).save(buffer, format="JPEG", exif=exif)
+    variants = render_variants(buffer.getvalue())
+    assert {(v["width"], v["height"]) for v, _ in variants} == {(100, 300)}
+
+
+def test_photos_along_route(setup):
+    from geoalchemy2 import WKTElement
+    from db.queries.photos import add_photo
+    from db.schema import Photo
+
+    _, trip_data = setup
+    trip_id = trip_data["id"]
+    rides = client.get(f"/trips/{trip_id}/").json()["rides"]
+    coords = json.loads(rides[0]["route"])["coordinates"]
+    lon, lat = coords[len(coords) // 2]
+    second_start = datetime.fromisoformat(rides[1]["date"])
+
+    def photo(**values):
+        return add_photo(
+            Photo(
+                trip_id=trip_id,
+                mime_type="image/jpeg",
+                file_size=1,
+                s3_key="k",
+                **values,
+            )
+        ).id
+
+    geotagged = photo(location=WKTElement(f"POINT({lon} {lat})", srid=4326))
+    timed = photo(taken_at=second_start + timedelta(seconds=1))
+    photo()  # neither position nor time, cannot be placed
+
+    placed = client.get(f"/trips/{trip_id}/photos/along-route").json()
+
+    assert [p["id"] for p in placed] == [geotagged, timed]
+    assert placed[0]["ride_id"] == rides[0]["id"]
+    assert placed[0]["geotagged"] and 0.4 < placed[0]["fraction"] < 0.6
+    assert placed[1]["ride_id"] == rides[1]["id"]
+    assert not placed[1]["geotagged"] and placed[1]["fraction"] < 0.01
+
+
+def test_direct_photo_upload(setup, monkeypatch):
+    import boto3
+    import requests
+    from moto import mock_aws
+    from app.services import file_services
+    from db.queries.photos import get_photo, add_photos
+
+    user_response, trip_data = setup
+    headers = {"Authorization": f"Bearer {user_response['access_token']}"}
+    trip_id = trip_data["id"]
+    content = exif_jpeg("2025:12:02 10:15:00", lat=18.5, lon=98.25)
+
+    monkeypatch.setattr(config.s3, "bucket", "trailstory-test")
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket=config.s3.bucket)
+        monkeypatch.setattr(file_services, "s3", s3)
+
+        file = {"filename": "day1.jpg", "content_type": "image/jpeg", "size": 1}
+        response = client.post(
+            f"/trips/{trip_id}/photos/uploads", json={"files": [file]}, headers=headers
+        )
+        assert response.status_code == 201
+        (upload,) = response.json()["uploads"]
+        assert upload["key"] == f"{trip_id}/{upload['id']}.jpg"
+
+        requests.post(
+            upload["url"], data=upload["fields"], files={"file": ("day1.jpg", content)}
+        )
+        complete = f"/trips/{trip_id}/photos/uploads/complete"
+        response = client.post(
+            complete, json={"keys": [upload["key"]]}, headers=headers
+        )
+        assert response.status_code == 201
+        assert len(response.json()["links"]) == 1
+
+        # Variants are rendered in the background as well
+        (photo,) = client.get(f"/trips/{trip_id}/photos/gallery").json()
+        assert set(photo["srcset"]) == set(VARIANT_FORMATS)
+        assert photo["srcset"]["image/webp"].endswith(" 40w")
+
+        response = client.post(
+            complete, json={"keys": [f"{trip_id}/{uuid4()}.jpg"]}, headers=headers
+        )
+        assert response.status_code == 400
+
+    # Metadata is filled in the background, from the object in S3
+    photo = get_photo(upload["id"])
+    assert photo.file_size == len(content)
+    assert (photo.w_dimm, photo.h_dimm) == (40, 30)
+    assert photo.taken_at == datetime(2025, 12, 2, 10, 15, tzinfo=timezone.utc)
+
+    # A completion racing past the existence check inserts nothing
+    row = {
+        "id": upload["id"],
+        "trip_id": trip_id,
+        "mime_type": "image/jpeg",
+        "file_size": len(content),
+        "s3_key": upload["key"],
+    }
+    assert add_photos([row]) == set()
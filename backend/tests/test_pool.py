@@ -0,0 +1,73 @@
+import asyncio
+from fastapi import BackgroundTasks, Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from db.pool import InstrumentedQueuePool, pool_metrics
+from db.schema import async_engine
+from db.session import (
+    db_session,
+    async_db_session,
+    RequestConnection,
+    _request_connection,
+    request_connection,
+)
+
+
+def test_pool_records_checkouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=0,
+    )
+    before = InstrumentedQueuePool.stats.checkouts
+
+    with engine.connect() as first, engine.connect():
+        first.execute(text("SELECT 1"))
+        metrics = pool_metrics(engine.pool)
+        assert metrics["in_use"] == 2
+
+    metrics = pool_metrics(engine.pool)
+    assert metrics["in_use"] == 0
+    assert metrics["size"] == 2
+    assert metrics["checkouts"] == before + 2
+    assert metrics["wait_max_ms"] >= 0
+
+
+def test_session_after_request_opens_own_connection():
+    scope = RequestConnection()
+    scope.close()
+    _request_connection.set(scope)
+
+    with db_session() as session:
+        assert session.bind is not None
+        assert scope.connection is None
+
+
+def test_async_session_after_request_opens_own_connection():
+    scope = RequestConnection()
+    asyncio.run(scope.aclose())
+    _request_connection.set(scope)
+
+    async def bind():
+        async with async_db_session() as session:
+            return session.bind
+
+    assert asyncio.run(bind()) is async_engine
+    assert scope.async_connection is None
+
+
+def test_background_tasks_do_not_share_the_request_connection():
+    app = FastAPI(dependencies=[Depends(request_connection)])
+    seen = {}
+
+    def task():
+        seen["closed"] = _request_connection.get().closed
+
+    @app.get("/")
+    def endpoint(background_tasks: BackgroundTasks):
+        seen["open"] = not _request_connection.get().closed
+        background_tasks.add_task(task)
+
+    assert TestClient(app).get("/").status_code == 200
+    assert seen == {"open": True, "closed": True}
@@ -69,9 +69,19 @@ def test_add_ride(user, trip):
             files=[("files", ("ride1.gpx", f, "application/gpx+xml"))],
             headers={"Authorization": f"Bearer {at}"},
         )
-        ride_data = response.json()[0]
+        job = response.json()
 
-    assert response.status_code == 201
+    assert response.status_code == 202
+    assert job["trip_id"] == trip_id
+
+    # TestClient runs the background import before returning
+    job = client.get(
+        f"/jobs/{job['id']}", headers={"Authorization": f"Bearer {at}"}
+    ).json()
+    ride_data = client.get(f"/trips/{trip_id}/rides").json()[0]
+
+    assert job["status"] == "done"
+    assert job["ride_ids"] == [ride_data["id"]]
     assert ride_data["distance"] == 921.0259820926173
     assert ride_data["trip_id"] == trip_id
 
@@ -86,11 +96,14 @@ def test_add_ride_invalid_xml(user, trip):
             files=[("files", ("ride1.gpx", f, "application/gpx+xml"))],
             headers={"Authorization": f"Bearer {at}"},
         )
-        error = response.json()
-        detail: str = error["detail"]
-    assert response.status_code == 400
-    assert "detail" in error
-    assert "GPX file contains no tracks" in detail
+        job_id = response.json()["id"]
+
+    job = client.get(
+        f"/jobs/{job_id}", headers={"Authorization": f"Bearer {at}"}
+    ).json()
+    assert response.status_code == 202
+    assert job["status"] == "failed"
+    assert "GPX file contains no tracks" in job["error"]
 
 
 def test_add_ride_invalid_gpx(user, trip):
@@ -120,12 +133,17 @@ def test_add_ride_insufficient_points(user, trip):
             files=[("files", ("ride1.gpx", f, "application/gpx+xml"))],
             headers={"Authorization": f"Bearer {at}"},
         )
-        error = response.json()
-        detail: str = error["detail"]
+        job_id = response.json()["id"]
 
-    assert response.status_code == 400
-    assert "detail" in error
-    assert "insufficient points" in detail
+    job = client.get(
+        f"/jobs/{job_id}", headers={"Authorization": f"Bearer {at}"}
+    ).json()
+    rides = client.get(f"/trips/{trip_id}/rides").json()
+
+    assert response.status_code == 202
+    assert job["status"] == "failed"
+    assert "insufficient points" in job["error"]
+    assert len(rides) == 0
 
 
 def test_add_rides(user, trip):
@@ -272,3 +290,132 @@ def test_bounding_box_coverage(user, trip):
     for coord in route2["coordinates"]:
         assert min_lon <= coord[0] <= max_lon
         assert min_lat <= coord[1] <= max_lat
+
+
+def test_delete_ride_updates_aggregates(user, trip):
+    trip_id = trip["id"]
+    at = user["access_token"]
+
+    f1 = open(ride1_path, "rb")
+    f2 = open(ride2_path, "rb")
+
+    client.post(
+        f"/trips/{trip_id}/rides",
+        files=[
+            ("files", ("ride1.gpx", f1, "application/gpx+xml")),
+            ("files", ("ride2.gpx", f2, "application/gpx+xml")),
+        ],
+        headers={"Authorization": f"Bearer {at}"},
+    )
+    f1.close()
+    f2.close()
+
+    rides = client.get(f"/trips/{trip_id}/rides").json()
+    aggregated = client.get(f"/trips/{trip_id}").json()["trip"]
+
+    assert aggregated["total_distance"] == pytest.approx(
+        rides[0]["distance"] + rides[1]["distance"]
+    )
+    assert aggregated["high_point"] == 212.0
+
+    response = client.delete(
+        f"/rides/{rides[1]['id']}", headers={"Authorization": f"Bearer {at}"}
+    )
+    aggregated = client.get(f"/trips/{trip_id}").json()["trip"]
+
+    assert response.status_code == 204
+    assert aggregated["total_distance"] == pytest.approx(rides[0]["distance"])
+    assert aggregated["high_point"] == rides[0]["high_point"]
+
+
+def test_get_rides_low_detail(user, trip):
+    at = user["access_token"]
+    trip_id = trip["id"]
+
+    with open(ride1_path, "rb") as f:
+        client.post(
+            f"/trips/{trip_id}/rides",
+            files=[("files", ("ride1.gpx", f, "application/gpx+xml"))],
+            headers={"Authorization": f"Bearer {at}"},
+        )
+
+    full = client.get(f"/trips/{trip_id}/rides").json()[0]
+    low = client.get(f"/trips/{trip_id}/rides?detail=low").json()[0]
+    zoomed_out = client.get(f"/trips/{trip_id}/rides?zoom=3").json()[0]
+
+    full_coords = json.loads(full["route"])["coordinates"]
+    low_coords = json.loads(low["route"])["coordinates"]
+    assert len(low_coords) < len(full_coords)
+    assert low_coords[0] == full_coords[0]
+    assert zoomed_out["route"] == low["route"]
+
+    response = client.get(f"/trips/{trip_id}/rides?zoom=40")
+    assert response.status_code == 422
+
+
+def test_published_trip_cache_follows_ride_changes(user, trip):
+    trip_id = trip["id"]
+    at = user["access_token"]
+
+    with open(ride1_path, "rb") as f:
+        client.post(
+            f"/trips/{trip_id}/rides",
+            files=[("files", ("ride1.gpx", f, "application/gpx+xml"))],
+            headers={"Authorization": f"Bearer {at}"},
+        )
+
+    trip_data = {
+        "title": "Cached Trip",
+        "description": "Testing",
+        "start_date": "2025-01-12",
+        "end_date": "2025-01-12",
+        "is_published": "true",
+    }
+    client.put(
+        f"/trips/{trip_id}", data=trip_data, headers={"Authorization": f"Bearer {at}"}
+    )
+
+    first = client.get(f"/trips/{trip_id}").json()
+    assert first == client.get(f"/trips/{trip_id}").json()
+
+    ride_id = first["rides"][0]["id"]
+    client.put(
+        f"/rides/{ride_id}",
+        data={"title": "Day one", "notes": "Windy"},
+        headers={"Authorization": f"Bearer {at}"},
+    )
+    updated = client.get(f"/trips/{trip_id}").json()
+    assert updated["rides"][0]["title"] == "Day one"
+
+    client.delete(f"/rides/{ride_id}", headers={"Authorization": f"Bearer {at}"})
+    emptied = client.get(f"/trips/{trip_id}").json()
+    assert emptied["rides"] == []
+    assert emptied["trip"]["route"] is None
+
+
+def test_get_rides_as_polyline(user, trip):
+    at = user["access_token"]
+    trip_id = trip["id"]
+
+    with open(ride1_path, "rb") as f:
+        client.post(
+            f"/trips/{trip_id}/rides",
+            files=[("files", ("ride1.gpx", f, "application/gpx+xml"))],
+            headers={"Authorization": f"Bearer {at}"},
+        )
+
+    geojson = client.get(f"/trips/{trip_id}/rides").json()[0]
+    polyline = client.get(
+        f"/trips/{trip_id}/rides?precision=6",
+        headers={"Accept": "application/vnd.trailstory.polyline+json"},
+    )
+    binary = client.get(
+        f"/trips/{trip_id}/",
+        headers={"Accept": "application/vnd.trailstory.route"},
+    )
+
+    assert polyline.headers["vary"] == "Accept"
+    assert polyline.json()[0]["id"] == geojson["id"]
+    assert len(polyline.json()[0]["route"]) * 5 < len(geojson["route"])
+    assert binary.headers["content-type"] == "application/vnd.trailstory.route"
+    assert geojson["id"].encode() in binary.content
@@ -0,0 +1,108 @@
+from fastapi.testclient import TestClient
+from app.main import app
+import pytest
+from app.config import config
+from pathlib import Path
+
+client = TestClient(app)
+
+tests_dir = Path(__file__).parent.parent
+samples_dir = tests_dir.joinpath("./samples")
+ride1_path = samples_dir.joinpath("ride1.gpx")
+
+
+def reset():
+    client.post(
+        "/admin/reset", headers={"Authorization": f"Bearer {config.auth.admin_token}"}
+    )
+
+
+@pytest.fixture(scope="function")
+def user():
+    reset()
+    fakeUser = {
+        "email": "sample@pineapple.com",
+        "username": "spongebob",
+        "password": "YourNameIs123!",
+    }
+
+    user = client.post("/users", data=fakeUser)
+    user_data = user.json()
+    return user_data
+
+
+@pytest.fixture(scope="function")
+def trip(user):
+    at = user["access_token"]
+
+    fake_trip = {
+        "title": "The Lanna Kingdom",
+        "description": "A bikepacking loop in Northern Thailand.",
+        "start_date": "2025-12-01",
+    }
+
+    trip = client.post(
+        "/trips", data=fake_trip, headers={"Authorization": f"Bearer {at}"}
+    )
+
+    trip_data = trip.json()
+    return trip_data
+
+
+def test_trip_tile_follows_ride_changes(user, trip):
+    at = user["access_token"]
+    trip_id = trip["id"]
+
+    empty = client.get(f"/tiles/0/0/0.mvt?trip_id={trip_id}")
+
+    assert empty.status_code == 200
+    assert empty.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+    assert empty.content == b""
+
+    with open(ride1_path, "rb") as f:
+        client.post(
+            f"/trips/{trip_id}/rides",
+            files=[("files", ("ride1.gpx", f, "application/gpx+xml"))],
+            headers={"Authorization": f"Bearer {at}"},
+        )
+
+    tile = client.get(f"/tiles/0/0/0.mvt?trip_id={trip_id}")
+    assert b"trips" in tile.content
+    assert b"rides" in tile.content
+
+    # Drafts stay out of the public layer
+    published = client.get("/tiles/0/0/0.mvt")
+    assert published.content == b""
+
+
+def test_tile_outside_map():
+    response = client.get("/tiles/2/4/0.mvt")
+    assert response.status_code == 400
+
+
+def test_published_tile_follows_publishing(user, trip):
+    at = user["access_token"]
+    trip_id = trip["id"]
+
+    with open(ride1_path, "rb") as f:
+        client.post(
+            f"/trips/{trip_id}/rides",
+            files=[("files", ("ride1.gpx", f, "application/gpx+xml"))],
+            headers={"Authorization": f"Bearer {at}"},
+        )
+    assert client.get("/tiles/0/0/0.mvt").content == b""
+
+    final_trip = {
+        "title": "The Lanna Kingdom",
+        "description": "Test Trip",
+        "start_date": "2025-12-01",
+        "end_date": "2025-12-01",
+        "is_published": True,
+    }
+    client.put(
+        f"/trips/{trip_id}", data=final_trip, headers={"Authorization": f"Bearer {at}"}
+    )
+    assert b"trips" in client.get("/tiles/0/0/0.mvt").content
+
+    client.delete(f"/trips/{trip_id}", headers={"Authorization": f"Bearer {at}"})
+    assert client.get("/tiles/0/0/0.mvt").content == b""
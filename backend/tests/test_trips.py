@@ -133,6 +133,10 @@ def test_submit_trip_no_rides(user, trip):
     )
 
     assert response.status_code == 500
+    # Nothing was saved, the trip is still an unpublished draft
+    saved = client.get(f"/trips/{trip_id}/").json()["trip"]
+    assert saved["is_published"] is False
+    assert saved["description"] == trip["description"]
 
 
 def test_submit_deleted_trip(user, trip):
@@ -204,3 +208,117 @@ def test_slug_generation():
 
 
 reset()
+
+
+def draft_trips(at, start_dates):
+    trips = []
+    for start_date in start_dates:
+        response = client.post(
+            "/trips",
+            data={
+                "title": f"Trip {start_date}",
+                "description": "Paging",
+                "start_date": start_date,
+            },
+            headers={"Authorization": f"Bearer {at}"},
+        )
+        trips.append(response.json())
+    return trips
+
+
+def test_user_trips_pagination(user):
+    at = user["access_token"]
+    user_id = user["user"]["id"]
+    draft_trips(at, ["2025-01-01", "2025-03-01", "2025-02-01"])
+
+    first = client.get(f"/users/{user_id}/trips?limit=2")
+    cursor = first.headers["x-next-cursor"]
+    second = client.get(
+        f"/users/{user_id}/trips", params={"limit": 2, "cursor": cursor}
+    )
+
+    assert [t["start_date"] for t in first.json()] == ["2025-03-01", "2025-02-01"]
+    assert [t["start_date"] for t in second.json()] == ["2025-01-01"]
+    assert "x-next-cursor" not in second.headers
+
+    response = client.get(f"/users/{user_id}/trips?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_published_feed(user):
+    from db.queries.trips import update_trip
+
+    at = user["access_token"]
+    published, draft = draft_trips(at, ["2025-04-01", "2025-05-01"])
+    update_trip(published["id"], {"is_published": True})
+
+    feed = client.get("/trips/feed/").json()
+
+    assert [t["id"] for t in feed] == [published["id"]]
+    assert draft["id"] not in [t["id"] for t in feed]
+
+
+def test_search_bbox(user):
+    from geoalchemy2 import WKTElement
+    from db.queries.trips import update_trip
+
+    at = user["access_token"]
+    inside, outside, draft = draft_trips(at, ["2025-06-01", "2025-07-01", "2025-08-01"])
+    routes = {
+        inside["id"]: "LINESTRING(100 10, 101 11)",
+        outside["id"]: "LINESTRING(-50 -10, -49 -9)",
+        draft["id"]: "LINESTRING(100 10, 101 11)",
+    }
+    for trip_id, route in routes.items():
+        update_trip(
+            trip_id,
+            {
+                "route": WKTElement(route, srid=4326),
+                "bounding_box": WKTElement(
+                    "POLYGON((-180 -90, 180 -90, 180 90, -180 90, -180 -90))",
+                    srid=4326,
+                ),
+                "is_published": trip_id != draft["id"],
+            },
+        )
+
+    bbox = {"minx": 99, "miny": 9, "maxx": 102, "maxy": 12}
+    response = client.get("/trips/search/bbox", params=bbox)
+
+    # The outside trip's box covers the query, but its route does not cross it
+    assert [t["id"] for t in response.json()] == [inside["id"]]
+
+    response = client.get("/trips/search/bbox", params={**bbox, "minx": 103})
+    assert response.status_code == 400
+
+
+def test_nearby_trips(user):
+    from geoalchemy2 import WKTElement
+    from db.queries.trips import update_trip
+
+    at = user["access_token"]
+    near, far, out_of_range, draft = draft_trips(
+        at, ["2025-09-01", "2025-10-01", "2025-11-01", "2025-12-01"]
+    )
+    # Roughly 1 km, 11 km and 111 km east of the search point at lon 0
+    routes = {
+        near["id"]: "LINESTRING(0.01 0, 0.01 0.01)",
+        far["id"]: "LINESTRING(0.1 0, 0.1 0.01)",
+        out_of_range["id"]: "LINESTRING(1 0, 1 0.01)",
+        draft["id"]: "LINESTRING(0 0, 0 0.01)",
+    }
+    for trip_id, route in routes.items():
+        update_trip(
+            trip_id,
+            {
+                "route": WKTElement(route, srid=4326),
+                "is_published": trip_id != draft["id"],
+            },
+        )
+
+    response = client.get("/trips/nearby", params={"lat": 0, "lon": 0, "radius_km": 50})
+    trips = response.json()
+
+    assert [t["id"] for t in trips] == [near["id"], far["id"]]
+    assert 1 < trips[0]["distance_km"] < 1.2
+    assert 11 < trips[1]["distance_km"] < 11.2
@@ -429,19 +429,57 @@ function ImagesUploadDialog({ trip_id }: { trip_id: string }) {
     setOpen(false);
     setUploadingPhotos(true);
     try {
-      const formData = new FormData();
-      for (const file of uploadFiles) {
-        formData.append("files", file);
+      const headers = {
+        authorization: `Bearer ${localStorage.getItem("access_token")}`,
+        "Content-Type": "application/json",
+      };
+      // Ask for one presigned POST per file, send the files straight to S3,
+      // then register the uploaded keys with the API
+      const ticketsResponse = await fetch(
+        `${serverBaseURL}/trips/${trip_id}/photos/uploads`,
+        {
+          method: "POST",
+          headers,
+          body: JSON.stringify({
+            files: uploadFiles.map((file) => ({
+              filename: file.name,
+              content_type: file.type,
+              size: file.size,
+            })),
+          }),
+        }
+      );
+      if (!ticketsResponse.ok) {
+        const error = await ticketsResponse.json();
+        console.error("Error:", error);
+        return;
       }
+      const { uploads } = await ticketsResponse.json();
+
+      await Promise.all(
+        uploads.map(
+          (
+            upload: { url: string; fields: Record<string, string> },
+            i: number
+          ) => {
+            const formData = new FormData();
+            for (const [name, value] of Object.entries(upload.fields)) {
+              formData.append(name, value);
+            }
+            formData.append("file", uploadFiles[i]);
+            return fetch(upload.url, { method: "POST", body: formData });
+          }
+        )
+      );
 
       const response = await fetch(
-        `${serverBaseURL}/trips/${trip_id}/photos/`,
+        `${serverBaseURL}/trips/${trip_id}/photos/uploads/complete`,
         {
           method: "POST",
-          body: formData,
-          headers: {
-            authorization: `Bearer ${localStorage.getItem("access_token")}`,
-          },
+          headers,
+          body: JSON.stringify({
+            keys: uploads.map((upload: { key: string }) => upload.key),
+          }),
         }
       );
 
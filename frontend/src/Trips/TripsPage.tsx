@@ -26,25 +26,35 @@ interface tripsData {
 }
 
 async function fetchUserTrips(userID: string): Promise<tripsData[]> {
+  const trips: tripsData[] = [];
+  let cursor: string | null = null;
   try {
-    const response = await fetch(`${serverBaseURL}/users/${userID}/trips/`, {
-      method: "GET",
-      headers: {
-        authorization: `Bearer ${localStorage.getItem("access_token")}`,
-      },
-    });
-    if (response.ok) {
-      const trips = await response.json();
-      console.log("Fetched trips", trips);
-      return trips;
-    } else {
-      const error = await response.json();
-      console.error("Error:", error);
-      return [];
-    }
+    // The listing is paginated, follow the cursor until the last page
+    do {
+      const params = new URLSearchParams({ limit: "100" });
+      if (cursor) params.set("cursor", cursor);
+      const response = await fetch(
+        `${serverBaseURL}/users/${userID}/trips/?${params}`,
+        {
+          method: "GET",
+          headers: {
+            authorization: `Bearer ${localStorage.getItem("access_token")}`,
+          },
+        }
+      );
+      if (!response.ok) {
+        const error = await response.json();
+        console.error("Error:", error);
+        return trips;
+      }
+      trips.push(...(await response.json()));
+      cursor = response.headers.get("X-Next-Cursor");
+    } while (cursor);
+    console.log("Fetched trips", trips);
+    return trips;
   } catch (error) {
     console.error("Unknown error:", error);
-    return [];
+    return trips;
   }
 }
 
@@ -4,14 +4,16 @@ import mapboxgl from "mapbox-gl";
 import { serverBaseURL } from "../utils";
 import type { tripData, rideData } from "./EditTrip";
 import { Spinner } from "@/components/ui/spinner";
-import PhotosCarousel from "@/components/PhotosCarousel";
+import PhotosCarousel, {
+  type galleryPhoto,
+} from "@/components/PhotosCarousel";
 
 mapboxgl.accessToken = import.meta.env.VITE_MAPBOX_TOKEN;
 
 export default function ViewTripPage() {
   const [trip, setTrip] = useState<tripData | null>(null);
   const [rides, setRides] = useState<rideData[]>([]);
-  const [photos, setPhotos] = useState<string[]>([]);
+  const [photos, setPhotos] = useState<galleryPhoto[]>([]);
   const [loading, setLoading] = useState(true);
   const { id } = useParams();
   const mapContainer = useRef<HTMLDivElement>(null);
@@ -41,15 +43,12 @@ export default function ViewTripPage() {
     async function fetchTripPhotos() {
       setLoading(true);
       try {
-        const response = await fetch(`${serverBaseURL}/trips/${id}/photos/`);
-        const response_dict = await response.json();
-        console.log("Received:", response_dict);
-        const url_array: string[] = [];
-
-        for (const id in response_dict) {
-          url_array.push(response_dict[id]);
-        }
-        setPhotos(url_array);
+        const response = await fetch(
+          `${serverBaseURL}/trips/${id}/photos/gallery`
+        );
+        const gallery: galleryPhoto[] = await response.json();
+        console.log("Received:", gallery);
+        setPhotos(gallery);
       } catch (error) {
         console.error("Error fetching trip:", error);
         alert("Failed to load trip");
@@ -180,7 +179,7 @@ export default function ViewTripPage() {
 
         <div className="bg-gray-100 p-8 rounded-lg">
           {photos.length > 0 ? (
-            <PhotosCarousel links={photos} />
+            <PhotosCarousel photos={photos} />
           ) : (
             <p className="text-center text-gray-600">
               📷 You have not added any pictures to your trip. Add some now!
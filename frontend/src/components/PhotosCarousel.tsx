@@ -7,20 +7,47 @@ import {
   CarouselPrevious,
 } from "@/components/ui/carousel";
 
-export default function PhotosCarousel({ links }: { links: string[] }) {
+export interface galleryPhoto {
+  id: string;
+  url: string;
+  width: number | null;
+  height: number | null;
+  // content type -> srcset, empty until the variants are rendered
+  srcset: Record<string, string>;
+}
+
+// The carousel is at most max-w-4xl (896px) wide
+const SIZES = "(max-width: 896px) 100vw, 896px";
+
+export default function PhotosCarousel({
+  photos,
+}: {
+  photos: galleryPhoto[];
+}) {
   return (
     <Carousel className="w-full max-w-4xl mx-auto">
       <CarouselContent>
-        {links.map((link, index) => (
-          <CarouselItem key={index}>
+        {photos.map((photo, index) => (
+          <CarouselItem key={photo.id}>
             <div className="p-1">
               <Card className="border-0 shadow-none">
                 <CardContent className="p-0">
-                  <img
-                    src={link}
-                    alt={`Photo ${index + 1}`}
-                    className="w-full h-[500px] object-cover rounded-lg"
-                  />
+                  <picture>
+                    {Object.entries(photo.srcset).map(([type, srcset]) => (
+                      <source
+                        key={type}
+                        type={type}
+                        srcSet={srcset}
+                        sizes={SIZES}
+                      />
+                    ))}
+                    <img
+                      src={photo.url}
+                      alt={`Photo ${index + 1}`}
+                      loading={index > 0 ? "lazy" : "eager"}
+                      className="w-full h-[500px] object-cover rounded-lg"
+                    />
+                  </picture>
                 </CardContent>
               </Card>
             </div>